@@ -0,0 +1,286 @@
+"""
+FeishuClient 压测：启动本地飞书替身 feishu_stub_server，测量不同批量大小/并发下的写入吞吐（条/秒）、
+去重查询吞吐（id/秒）、全量同步与图片上传速度，以及每种场景实际发出的请求数，用于调整批量与并发参数。
+
+- 客户端的请求地址指向替身（FeishuClient.BASE_URL），使用 Playwright 的 APIRequestContext，不需要浏览器；
+- token 与字段类型走进程内共享缓存（只用内存，不读写 FEISHU_CACHE_PATH），与 main.py 中多个任务的行为一致；
+- 默认把 config.RATE_LIMITS 中 open.feishu.cn 的限速套用到替身地址，--no-client-rate-limit 关闭；
+- 替身可加延迟（--latency-ms）、全局 QPS 上限（--qps，超出返回 99991400）、随机 5xx（--fault-rate），
+  --fields-unavailable 让 fields 接口失败，数值字段按文本写入，测量 add_note 修正重试路径的代价。
+
+用法：python benchmarks/bench_feishu.py [--records 2000] [--batch-sizes 1,50,500] [--concurrency 1,4]
+      [--dedup-ids 1000] [--existing 5000] [--uploads 50] [--latency-ms 20] [--qps 0] [--fault-rate 0] [--fields-unavailable]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+import config  # noqa: E402
+from dedup_index import DedupIndex  # noqa: E402
+from feishu_cache import reset_feishu_cache  # noqa: E402
+from feishu_client import FeishuClient  # noqa: E402
+from rate_limiter import get_rate_limiter, reset_rate_limiter  # noqa: E402
+
+from feishu_stub_server import FeishuStubServer  # noqa: E402
+
+APP_TOKEN = "bench_app"
+FIELD_MAPPING = getattr(config, "FEISHU_FIELD_MAPPING_XHS", {})
+
+
+def _make_note(seq: int) -> Dict:
+    note_id = f"bench{seq:019d}"
+    return {
+        "note_id": note_id,
+        "title": f"压测笔记 {seq}",
+        "content": f"第 {seq} 条压测笔记正文。" * 8,
+        "images": [f"https://example.com/img/{note_id}/{i}.jpg" for i in range(4)],
+        "post_time": "2025-10-18 10:23",
+        "post_url": f"https://www.xiaohongshu.com/explore/{note_id}",
+        "author_name": "压测作者",
+        "likes_count": "1.2万",
+        "collections_count": str(seq % 500),
+        "comments_count": str(seq % 50),
+        "shares_count": "3",
+    }
+
+
+def _stub_fields(note: Dict) -> Dict:
+    """直接写入替身的存量记录（与 FeishuClient._build_fields 的结果结构一致）。"""
+    return {
+        FIELD_MAPPING["note_id"]: note["note_id"],
+        FIELD_MAPPING["title"]: note["title"],
+        FIELD_MAPPING["post_url"]: {"link": note["post_url"], "text": note["title"]},
+    }
+
+
+class _Bench:
+    def __init__(self, args, stub: FeishuStubServer, request_context):
+        self.args = args
+        self.stub = stub
+        self.request_context = request_context
+        self.results: List[Dict] = []
+        self._seq = 0
+
+    def client(self, table_id: str) -> FeishuClient:
+        client = FeishuClient(self.request_context, app_token=APP_TOKEN, table_id=table_id, field_mapping=FIELD_MAPPING)
+        client.BASE_URL = self.stub.api_base
+        client.request_retry_backoff_sec = self.args.backoff_sec
+        return client
+
+    def notes(self, count: int) -> List[Dict]:
+        start = self._seq
+        self._seq += count
+        return [_make_note(i) for i in range(start, start + count)]
+
+    async def run(self, label: str, unit: str, fn: Callable[[], Awaitable[Tuple[int, int]]]):
+        """fn 返回 (成功数, 失败数)；吞吐按成功数计算。"""
+        self.stub.reset_hits()
+        sink = io.StringIO()
+        error = ""
+        ok = failed = 0
+        started = time.perf_counter()
+        try:
+            # FeishuClient 每次查询/失败都会打印日志，默认不输出
+            with contextlib.redirect_stdout(sys.stdout if self.args.verbose else sink):
+                ok, failed = await fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - started
+        hits = self.stub.snapshot_hits()
+        requests = sum(hits.values())
+        rate = ok / elapsed if elapsed > 0 else 0
+        print(f"\n== {label}: 成功 {ok}，失败 {failed}，耗时 {elapsed:.2f}s，{rate:.1f} {unit}/秒，请求 {requests} 次")
+        if hits:
+            print("   接口: " + ", ".join(f"{k}={v}" for k, v in sorted(hits.items())))
+        if error:
+            print(f"   [失败] {error}")
+        self.results.append({"label": label, "ok": ok, "failed": failed, "elapsed": elapsed,
+                             "rate": rate, "unit": unit, "requests": requests, "error": error})
+
+    # ---- 场景 ----
+    async def writes(self, batch_size: int, concurrency: int):
+        table_id = f"tbl_write_b{batch_size}_c{concurrency}"
+        self.stub.create_table(APP_TOKEN, table_id)
+        client = self.client(table_id)
+        notes = self.notes(self.args.records)
+        chunks = [notes[i:i + batch_size] for i in range(0, len(notes), batch_size)]
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(chunk):
+            async with sem:
+                return await client.add_notes_batch(chunk)
+
+        async def _run():
+            await client._get_field_types()
+            batches = await asyncio.gather(*(_one(c) for c in chunks))
+            ok = sum(1 for results in batches for r in results if r.get("ok"))
+            return ok, len(notes) - ok
+
+        await self.run(f"批量写入 batch={batch_size} 并发={concurrency}", "条", _run)
+
+    async def single_writes(self, concurrency: int):
+        table_id = f"tbl_single_c{concurrency}"
+        self.stub.create_table(APP_TOKEN, table_id)
+        client = self.client(table_id)
+        notes = self.notes(self.args.single)
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(note):
+            async with sem:
+                try:
+                    await client.add_note(note)
+                    return True
+                except Exception:
+                    return False
+
+        async def _run():
+            results = await asyncio.gather(*(_one(n) for n in notes))
+            ok = sum(1 for r in results if r)
+            return ok, len(results) - ok
+
+        await self.run(f"逐条写入 add_note 并发={concurrency}", "条", _run)
+
+    async def dedup(self):
+        table_id = "tbl_dedup"
+        self.stub.create_table(APP_TOKEN, table_id)
+        existing = self.notes(self.args.existing)
+        self.stub.seed_records(APP_TOKEN, table_id, [_stub_fields(n) for n in existing])
+        # 一半已存在、一半是新 id
+        half = self.args.dedup_ids // 2
+        query_ids = [n["note_id"] for n in existing[:half]] + [n["note_id"] for n in self.notes(self.args.dedup_ids - half)]
+        client = self.client(table_id)
+
+        for chunk_size in self.args.dedup_chunks:
+            async def _batch(chunk_size=chunk_size):
+                found = await client.check_notes_exist_batch(query_ids, chunk_size=chunk_size)
+                return len(query_ids), abs(len(found) - min(half, len(existing)))
+            await self.run(f"批量去重查询 chunk={chunk_size}（{len(query_ids)} 个 id）", "id", _batch)
+
+        single_ids = query_ids[: min(len(query_ids), self.args.single_dedup)]
+        sem = asyncio.Semaphore(max(self.args.concurrency))
+
+        async def _single():
+            async def _one(nid):
+                async with sem:
+                    return await client.check_note_exists(nid)
+            await asyncio.gather(*(_one(n) for n in single_ids))
+            return len(single_ids), 0
+
+        await self.run(f"逐个去重查询 check_note_exists 并发={max(self.args.concurrency)}", "id", _single)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            index = DedupIndex(os.path.join(tmp, "bench_dedup.sqlite3"))
+
+            async def _sync():
+                rows = await index.sync(client)
+                return rows, 0
+
+            try:
+                await self.run(f"去重索引全量同步（存量 {len(existing)} 条）", "条", _sync)
+                await self.run("去重索引增量同步", "条", _sync)
+            finally:
+                index.close()
+
+    async def uploads(self):
+        if self.args.uploads <= 0:
+            return
+        client = self.client("tbl_media")
+        payloads = [os.urandom(self.args.upload_kb * 1024) for _ in range(self.args.uploads)]
+        sem = asyncio.Semaphore(max(self.args.concurrency))
+
+        async def _one(data):
+            async with sem:
+                try:
+                    return bool(await client._upload_image(data))
+                except Exception:
+                    return False
+
+        async def _run():
+            results = await asyncio.gather(*(_one(d) for d in payloads))
+            ok = sum(1 for r in results if r)
+            return ok, len(results) - ok
+
+        await self.run(f"图片上传 {self.args.upload_kb}KB 并发={max(self.args.concurrency)}", "张", _run)
+
+
+def _int_list(raw: str) -> List[int]:
+    return [max(1, int(x)) for x in str(raw).split(",") if x.strip()]
+
+
+async def run(args):
+    stub = FeishuStubServer(latency_ms=args.latency_ms, qps=args.qps, fault_rate=args.fault_rate,
+                            fields_unavailable=args.fields_unavailable, seed=0).start()
+    stub_host = urlsplit(stub.base_url).hostname
+    cache = reset_feishu_cache("")
+    if args.no_client_rate_limit:
+        reset_rate_limiter({})
+    else:
+        feishu_limit = (getattr(config, "RATE_LIMITS", {}) or {}).get("open.feishu.cn") or {}
+        reset_rate_limiter({stub_host: feishu_limit} if feishu_limit else {})
+    print(f"飞书替身: {stub.api_base}（延迟 {args.latency_ms}ms，QPS 上限 {args.qps or '无'}，5xx 比例 {args.fault_rate}）")
+
+    try:
+        async with async_playwright() as p:
+            request_context = await p.request.new_context()
+            bench = _Bench(args, stub, request_context)
+            try:
+                for batch_size in args.batch_sizes:
+                    for concurrency in args.concurrency:
+                        await bench.writes(batch_size, concurrency)
+                if args.single > 0:
+                    for concurrency in args.concurrency:
+                        await bench.single_writes(concurrency)
+                if args.dedup_ids > 0:
+                    await bench.dedup()
+                await bench.uploads()
+            finally:
+                await cache.close()
+                await request_context.dispose()
+    finally:
+        stub.stop()
+
+    print("\n场景汇总：")
+    for r in bench.results:
+        status = "失败" if r["error"] else "完成"
+        print(f"  {r['label']:<40} {r['rate']:>9.1f} {r['unit']}/秒  成功 {r['ok']:>6}  失败 {r['failed']:>5}  请求 {r['requests']:>6}  {status}")
+    stats = get_rate_limiter().format_stats()
+    if stats:
+        print(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FeishuClient 压测（本地飞书替身）")
+    parser.add_argument("--records", type=int, default=2000, help="每个批量写入场景写入的条数")
+    parser.add_argument("--batch-sizes", type=_int_list, default=_int_list("1,50,500"))
+    parser.add_argument("--concurrency", type=_int_list, default=_int_list("1,4"))
+    parser.add_argument("--single", type=int, default=200, help="add_note 逐条写入的条数（0 跳过）")
+    parser.add_argument("--dedup-ids", type=int, default=1000, help="去重查询的 id 数（一半已存在，0 跳过）")
+    parser.add_argument("--dedup-chunks", type=_int_list, default=_int_list("10,30,100"))
+    parser.add_argument("--single-dedup", type=int, default=200, help="check_note_exists 逐个查询的 id 数")
+    parser.add_argument("--existing", type=int, default=5000, help="去重表中的存量记录数")
+    parser.add_argument("--uploads", type=int, default=50, help="上传图片数（0 跳过）")
+    parser.add_argument("--upload-kb", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20, help="替身每个请求的延迟")
+    parser.add_argument("--qps", type=float, default=0, help="替身全局 QPS 上限（0 不限制）")
+    parser.add_argument("--fault-rate", type=float, default=0, help="替身随机返回 500 的比例")
+    parser.add_argument("--fields-unavailable", action="store_true", help="fields 接口失败，数值字段按文本写入")
+    parser.add_argument("--backoff-sec", type=int, default=1, help="客户端重试退避基数（秒）")
+    parser.add_argument("--no-client-rate-limit", action="store_true", help="不套用 open.feishu.cn 的客户端限速")
+    parser.add_argument("--verbose", action="store_true", help="输出 FeishuClient 日志")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
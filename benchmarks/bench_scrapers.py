@@ -0,0 +1,177 @@
+"""
+抓取器离线基准：启动 fixture_server 夹具服务器，把浏览器对小红书/微博域名的请求改写到本地，
+按不同主页规模（默认 10/100/1000 条）测量列表抓取与详情抓取的耗时、各阶段耗时（metrics）与请求往返次数。
+
+- 浏览器上下文级路由把 xiaohongshu.com / weibo.com 的请求转发到夹具服务器，其余外部请求一律拦截；
+  抓取器以 routing_profile="off" 创建，避免页面级路由绕过上下文路由；
+- 微博接口走 context.request，不经过路由，直接把抓取器实例的 API_BASE 指向夹具服务器；
+- 默认关闭进程内限速（--keep-rate-limits 保留 config.RATE_LIMITS），只测量抓取本身。
+
+用法：python benchmarks/bench_scrapers.py [--sizes 10,100,1000] [--details 10] [--latency-ms 0] [--headed] [--keep-rate-limits]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright  # noqa: E402
+
+import metrics  # noqa: E402
+from rate_limiter import reset_rate_limiter  # noqa: E402
+from scrapers.weibo import WeiboHomeScraper  # noqa: E402
+from xhs_scraper import XhsScraper  # noqa: E402
+
+from fixture_server import FixtureServer, weibo_uid, xhs_profile_path  # noqa: E402
+
+_FIXTURE_HOSTS = ("xiaohongshu.com", "weibo.com")
+
+
+async def _install_fixture_route(context, base_url: str):
+    """上下文级路由：目标站点请求转发到夹具服务器，夹具服务器直连，其余请求拦截。"""
+    local_host = urlsplit(base_url).netloc
+
+    async def _handle(route):
+        parts = urlsplit(route.request.url)
+        host = (parts.hostname or "").lower()
+        if parts.netloc == local_host:
+            await route.continue_()
+            return
+        if any(host == h or host.endswith("." + h) for h in _FIXTURE_HOSTS):
+            target = f"{base_url}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else "")
+            try:
+                response = await route.fetch(url=target)
+                await route.fulfill(response=response)
+            except Exception:
+                await route.abort()
+            return
+        await route.abort()
+
+    await context.route("**/*", _handle)
+
+
+async def _run_scenario(server: FixtureServer, label: str, fn: Callable[[], Awaitable[int]], *, verbose: bool) -> Dict:
+    metrics.reset()
+    server.reset_hits()
+    started = time.perf_counter()
+    sink = io.StringIO()
+    error = ""
+    count = 0
+    try:
+        # 抓取器日志较多，默认不输出
+        with contextlib.redirect_stdout(sys.stdout if verbose else sink):
+            count = await fn()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - started
+    hits = server.snapshot_hits()
+    round_trips = sum(v for k, v in hits.items() if k != "image")
+    per_item = f"{elapsed / count * 1000:.1f} ms/条" if count else "-"
+    print(f"\n== {label}: {count} 条，耗时 {elapsed * 1000:.0f} ms（{per_item}），往返 {round_trips} 次（图片 {hits.get('image', 0)} 次）")
+    if hits:
+        print("   请求: " + ", ".join(f"{k}={v}" for k, v in sorted(hits.items())))
+    summary = metrics.format_phase_summary()
+    if summary:
+        print("   " + summary.replace("\n", "\n   "))
+    if error:
+        print(f"   [失败] {error}")
+    return {"label": label, "items": count, "elapsed_ms": round(elapsed * 1000, 1), "round_trips": round_trips, "error": error}
+
+
+async def run(args):
+    sizes = [int(s) for s in str(args.sizes).split(",") if s.strip()]
+    if not args.keep_rate_limits:
+        reset_rate_limiter({})
+
+    server = FixtureServer(latency_ms=args.latency_ms).start()
+    print(f"夹具服务器: {server.base_url}")
+    results: List[Dict] = []
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=not args.headed)
+            context = await browser.new_context(viewport={"width": 1280, "height": 900})
+            await _install_fixture_route(context, server.base_url)
+
+            xhs = XhsScraper(context, routing_profile="off")
+            weibo = WeiboHomeScraper(context, routing_profile="off")
+            weibo.API_BASE = server.base_url
+            try:
+                for size in sizes:
+                    xhs_url = f"https://www.xiaohongshu.com{xhs_profile_path(size)}"
+                    weibo_url = f"https://weibo.com/u/{weibo_uid(size)}"
+                    scrolls = size // 10 + 3
+                    listed: Dict[str, List[Dict]] = {}
+
+                    for engine in ("network", "dom"):
+                        async def _xhs_list(engine=engine):
+                            notes = await xhs.scrape_user_notes(xhs_url, max_notes=size, scrolls=scrolls, engine=engine)
+                            listed.setdefault("xhs", notes)
+                            return len(notes)
+                        results.append(await _run_scenario(server, f"小红书列表 {size} 条 [{engine}]", _xhs_list, verbose=args.verbose))
+
+                    for engine in ("api", "dom"):
+                        async def _weibo_list(engine=engine):
+                            posts = await weibo.scrape_home_posts(weibo_url, max_posts=size, scrolls=scrolls, engine=engine)
+                            listed.setdefault("weibo", posts)
+                            return len(posts)
+                        results.append(await _run_scenario(server, f"微博列表 {size} 条 [{engine}]", _weibo_list, verbose=args.verbose))
+
+                    if size != max(sizes) or args.details <= 0:
+                        continue
+                    xhs_notes = [n for n in listed.get("xhs") or [] if n.get("note_id")][: args.details]
+                    # 去掉列表阶段带回的 status，让 api 引擎实际请求 statuses/show
+                    weibo_posts = [
+                        {k: v for k, v in post.items() if k != "status"}
+                        for post in (listed.get("weibo") or [])[: args.details]
+                    ]
+                    for engine in ("state", "dom"):
+                        async def _xhs_details(engine=engine):
+                            done = 0
+                            for note in xhs_notes:
+                                details = await xhs.scrape_note_details(note, engine=engine)
+                                done += 1 if details and details.get("content") else 0
+                            return done
+                        results.append(await _run_scenario(server, f"小红书详情 {len(xhs_notes)} 条 [{engine}]", _xhs_details, verbose=args.verbose))
+
+                    for engine in ("api", "dom"):
+                        async def _weibo_details(engine=engine):
+                            done = 0
+                            for post in weibo_posts:
+                                details = await weibo.scrape_post_details(dict(post), engine=engine)
+                                done += 1 if details and details.get("content") else 0
+                            return done
+                        results.append(await _run_scenario(server, f"微博详情 {len(weibo_posts)} 条 [{engine}]", _weibo_details, verbose=args.verbose))
+            finally:
+                await xhs.close()
+                await weibo.close()
+                await context.close()
+                await browser.close()
+    finally:
+        server.stop()
+
+    print("\n场景汇总：")
+    for r in results:
+        status = "失败" if r["error"] else "完成"
+        print(f"  {r['label']:<28} {r['items']:>5} 条  {r['elapsed_ms']:>9.1f} ms  往返 {r['round_trips']:>4} 次  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抓取器离线基准（本地夹具服务器）")
+    parser.add_argument("--sizes", default="10,100,1000", help="主页内容条数，逗号分隔")
+    parser.add_argument("--details", type=int, default=10, help="在最大规模的主页上抓取的详情条数（0 跳过详情）")
+    parser.add_argument("--latency-ms", type=float, default=0, help="夹具服务器每个请求附加的延迟")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="保留 config.RATE_LIMITS 中的站点限速")
+    parser.add_argument("--verbose", action="store_true", help="输出抓取器日志")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+time_parser 微基准：用各平台页面/接口上实际出现过的时间文本，测量单条解析、批量解析与窗口过滤的耗时。
+
+用法：python benchmarks/bench_time_parser.py [--rounds 2000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time_parser  # noqa: E402
+
+# 小红书详情页 .date、微博列表/详情时间链接、微博接口 created_at、抓取结果中的展示字符串
+CORPUS = [
+    "刚刚",
+    "3分钟前",
+    "12分钟前",
+    "1小时前",
+    "5小时前 来自 iPhone客户端",
+    "今天 09:41",
+    "今天 下午3:05",
+    "昨天 21:03",
+    "昨天 08:15 来自 微博网页版",
+    "前天 23:59",
+    "2天前 上海",
+    "4天前 江苏",
+    "09-01 江苏",
+    "10-18",
+    "10-18 08:30",
+    "11-4 20:16",
+    "1-3 10:00",
+    "编辑于 10-15 广东",
+    "25-12-21 15:46",
+    "2025-10-18",
+    "2025-10-18 10:23",
+    "2025-10-18 10:23:45",
+    "2025/10/18 10:23",
+    "2025年10月18日 10:23",
+    "2024年12月31日",
+    "Sat Oct 18 10:23:45 +0800 2025",
+    "Mon Dec 30 23:01:02 +0800 2024",
+    "2025-10-18T10:23:45+08:00",
+    "1760754225",
+    "1760754225000",
+]
+
+
+def _bench(label: str, fn, rounds: int, per_round: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    elapsed = time.perf_counter() - start
+    per_item_us = elapsed / (rounds * per_round) * 1e6
+    print(f"{label:<28} 总耗时 {elapsed * 1000:8.1f} ms  单条 {per_item_us:6.2f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="time_parser 微基准")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    unparsed = [t for t in CORPUS if time_parser.parse(t, now=now, search=True) is None]
+    print(f"语料 {len(CORPUS)} 条，无法解析 {len(unparsed)} 条{('：' + ', '.join(unparsed)) if unparsed else ''}")
+
+    # 模拟一个账号的列表：同一批时间文本重复出现
+    batch = CORPUS * 4
+    timestamps = [time_parser.to_timestamp(dt) for dt in time_parser.parse_many(batch, now=now, search=True)]
+    window_days = 30
+
+    _bench("parse（逐条）", lambda: [time_parser.parse(t, now=now, search=True) for t in CORPUS],
+           args.rounds, len(CORPUS))
+    _bench("parse_many（批量+去重）", lambda: time_parser.parse_many(batch, now=now, search=True),
+           args.rounds, len(batch))
+    _bench("窗口过滤：解析文本", lambda: [
+        (time_parser.age_days(time_parser.to_timestamp(time_parser.parse_post_time(t, now=now, search=True))) or 0)
+        <= window_days for t in batch
+    ], args.rounds, len(batch))
+    _bench("窗口过滤：比较时间戳", lambda: [
+        ts is not None and (time_parser.age_days(ts) or 0) <= window_days for ts in timestamps
+    ], args.rounds, len(batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""
+本地飞书开放平台替身：在内存中实现 FeishuClient 用到的接口，用于压测写入/去重而不触碰线上表格。
+
+- POST /open-apis/auth/v3/tenant_access_token/internal
+- GET  /open-apis/bitable/v1/apps/<app>/tables/<table>/fields
+- GET  /open-apis/bitable/v1/apps/<app>/tables/<table>/records?filter=CurrentValue.[字段]="值"
+- POST /open-apis/bitable/v1/apps/<app>/tables/<table>/records/search（is / isGreater+ExactDate 过滤、field_names、分页）
+- POST .../records、.../records/batch_create、.../records/batch_update，PUT .../records/<record_id>
+- POST /open-apis/drive/v1/medias/upload_all
+- GET  /__stats、/__reset：按接口统计的请求数与注入的错误数
+
+写入时按字段类型校验单元格（与线上一致，只报告第一个出错的字段）：文本字段只接受字符串，
+数字字段只接受数值（NumberFieldConvFail 1254061），超链接字段只接受 {"link", "text"}（URLFieldConvFail 1254068），
+附件字段只接受已上传素材的 [{"file_token"}]（AttachFieldConvFail 1254069），
+未知字段返回 FieldNameNotFound 1254045；batch_create 任一记录出错则整批失败。
+可配置每个请求的延迟、全局 QPS 限制（超出返回 429 + 99991400）、随机 5xx 比例，
+以及 fields 接口不可用（客户端拿不到字段类型，数值按文本写入后依赖 add_note 的修正重试）。
+
+用法：python benchmarks/feishu_stub_server.py [--port 8766] [--latency-ms 0] [--qps 0] [--fault-rate 0] [--fields-unavailable]
+      然后以 FEISHU_BASE_URL=http://127.0.0.1:8766/open-apis 运行 main.py 或 bench_feishu.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+# 飞书多维表格字段类型
+FIELD_TEXT = 1
+FIELD_NUMBER = 2
+FIELD_URL = 15
+FIELD_ATTACHMENT = 17
+FIELD_CREATED_TIME = 1001
+FIELD_MODIFIED_TIME = 1002
+
+# 未显式建表时使用的字段（覆盖 config 中小红书与微博两套字段映射，另加“最后更新时间”供增量同步）
+DEFAULT_FIELDS: Dict[str, int] = {
+    "内容ID": FIELD_TEXT,
+    "描述": FIELD_TEXT,
+    "图片数组": FIELD_TEXT,
+    "发布时间": FIELD_TEXT,
+    "笔记链接": FIELD_URL,
+    "内容链接": FIELD_URL,
+    "标题": FIELD_TEXT,
+    "作者": FIELD_TEXT,
+    "点赞数": FIELD_NUMBER,
+    "收藏数": FIELD_NUMBER,
+    "评论数": FIELD_NUMBER,
+    "转发数": FIELD_NUMBER,
+    "图片附件": FIELD_ATTACHMENT,
+    "最后更新时间": FIELD_MODIFIED_TIME,
+}
+
+CODE_OK = 0
+CODE_RATE_LIMIT = 99991400
+CODE_INVALID_TOKEN = 99991663
+CODE_TEXT_CONV_FAIL = 1254060
+CODE_NUMBER_CONV_FAIL = 1254061
+CODE_URL_CONV_FAIL = 1254068
+CODE_ATTACH_CONV_FAIL = 1254069
+CODE_FIELD_NOT_FOUND = 1254045
+CODE_RECORD_NOT_FOUND = 1254043
+CODE_TOO_MANY_RECORDS = 1254104
+CODE_INTERNAL_ERROR = 1255001
+
+BATCH_LIMIT = 500
+SEARCH_PAGE_LIMIT = 500
+
+
+class _Table:
+    def __init__(self, fields: Dict[str, int]):
+        self.fields = dict(fields)
+        self.records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+class _FieldError(Exception):
+    def __init__(self, code: int, msg: str, field_name: str):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.field_name = field_name
+
+
+def _error(code: int, msg: str, detail: str = "") -> Dict:
+    data = {"code": code, "msg": msg}
+    if detail:
+        data["error"] = {"message": detail}
+    return data
+
+
+def _cell_texts(value: Any) -> List[str]:
+    if isinstance(value, list):
+        out = []
+        for item in value:
+            cand = item.get("text") if isinstance(item, dict) else item
+            if cand is not None:
+                out.append(str(cand))
+        return out
+    if isinstance(value, dict):
+        cand = value.get("text") or value.get("link")
+        return [str(cand)] if cand is not None else []
+    return [] if value is None else [str(value)]
+
+
+class FeishuStubServer:
+    """在后台线程运行的飞书接口替身；hits 按接口统计请求数（含被限流/注入错误的请求）。"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, latency_ms: float = 0,
+                 qps: float = 0, fault_rate: float = 0, fields_unavailable: bool = False,
+                 token_expire_sec: int = 7200, seed: Optional[int] = None):
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.qps = max(0.0, float(qps))
+        self.fault_rate = min(1.0, max(0.0, float(fault_rate)))
+        self.fields_unavailable = fields_unavailable
+        self.token_expire_sec = int(token_expire_sec)
+        self.hits: Counter = Counter()
+        self._tables: Dict[Tuple[str, str], _Table] = {}
+        self._tokens: Dict[str, float] = {}
+        self._media: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._bucket_tokens = self.qps
+        self._bucket_at = time.monotonic()
+        self._seq = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base(self) -> str:
+        """对应 config.FEISHU_BASE_URL 的地址。"""
+        return f"{self.base_url}/open-apis"
+
+    def start(self) -> "FeishuStubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="feishu-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # ---- 数据准备 ----
+    def create_table(self, app_token: str, table_id: str, fields: Optional[Dict[str, int]] = None):
+        with self._lock:
+            self._tables[(app_token, table_id)] = _Table(fields or DEFAULT_FIELDS)
+
+    def seed_records(self, app_token: str, table_id: str, rows: List[Dict[str, Any]]) -> int:
+        """直接写入记录（不经过校验与统计），用于准备去重基准的存量数据。"""
+        with self._lock:
+            table = self._table(app_token, table_id)
+            for fields in rows:
+                self._insert(table, dict(fields))
+        return len(rows)
+
+    def record_count(self, app_token: str, table_id: str) -> int:
+        with self._lock:
+            return len(self._table(app_token, table_id).records)
+
+    def reset_hits(self):
+        with self._lock:
+            self.hits.clear()
+
+    def snapshot_hits(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.hits)
+
+    # ---- 内部工具 ----
+    def _table(self, app_token: str, table_id: str) -> _Table:
+        table = self._tables.get((app_token, table_id))
+        if table is None:
+            table = self._tables[(app_token, table_id)] = _Table(DEFAULT_FIELDS)
+        return table
+
+    def _insert(self, table: _Table, fields: Dict[str, Any]) -> Dict[str, Any]:
+        self._seq += 1
+        now_ms = int(time.time() * 1000)
+        record_id = f"rec{self._seq:010d}"
+        record = {"record_id": record_id, "fields": fields, "created_time": now_ms, "last_modified_time": now_ms}
+        table.records[record_id] = record
+        return record
+
+    def _take_token(self) -> bool:
+        if not self.qps:
+            return True
+        now = time.monotonic()
+        self._bucket_tokens = min(self.qps, self._bucket_tokens + (now - self._bucket_at) * self.qps)
+        self._bucket_at = now
+        if self._bucket_tokens >= 1:
+            self._bucket_tokens -= 1
+            return True
+        return False
+
+    def _validate(self, table: _Table, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """按字段类型校验并规整单元格，返回存储用的 fields；出错时抛出 _FieldError（只报告第一个字段）。"""
+        if not isinstance(fields, dict):
+            raise _FieldError(CODE_FIELD_NOT_FOUND, "FieldNameNotFound", "")
+        stored: Dict[str, Any] = {}
+        for name, value in fields.items():
+            ftype = table.fields.get(name)
+            if ftype is None or ftype in (FIELD_CREATED_TIME, FIELD_MODIFIED_TIME):
+                raise _FieldError(CODE_FIELD_NOT_FOUND, "FieldNameNotFound", name)
+            if ftype == FIELD_NUMBER:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise _FieldError(CODE_NUMBER_CONV_FAIL, "NumberFieldConvFail", name)
+                stored[name] = value
+            elif ftype == FIELD_URL:
+                if not isinstance(value, dict) or not value.get("link"):
+                    raise _FieldError(CODE_URL_CONV_FAIL, "URLFieldConvFail", name)
+                stored[name] = {"link": str(value["link"]), "text": str(value.get("text") or value["link"])}
+            elif ftype == FIELD_ATTACHMENT:
+                tokens = [v.get("file_token") for v in value if isinstance(v, dict)] if isinstance(value, list) else None
+                if not tokens or any(t not in self._media for t in tokens):
+                    raise _FieldError(CODE_ATTACH_CONV_FAIL, "AttachFieldConvFail", name)
+                stored[name] = [{"file_token": t, "size": self._media[t]} for t in tokens]
+            else:
+                if isinstance(value, str):
+                    stored[name] = value
+                elif isinstance(value, list) and all(isinstance(v, dict) and "text" in v for v in value):
+                    stored[name] = "".join(str(v["text"]) for v in value)
+                else:
+                    raise _FieldError(CODE_TEXT_CONV_FAIL, "TextFieldConvFail", name)
+        return stored
+
+    @staticmethod
+    def _field_error_payload(err: _FieldError) -> Dict:
+        # 与线上一致：字段名出现在 error.message 的 'fields.<名称>' 中，客户端据此定位报错字段
+        return _error(err.code, err.msg, f"Invalid request parameter: 'fields.{err.field_name}'.")
+
+    @staticmethod
+    def _render_cell(ftype: int, value: Any) -> Any:
+        if ftype == FIELD_TEXT and isinstance(value, str):
+            return [{"text": value, "type": "text"}]
+        return value
+
+    def _render_record(self, table: _Table, record: Dict, field_names: Optional[List[str]] = None,
+                       automatic: bool = False) -> Dict:
+        fields = {}
+        for name, value in record["fields"].items():
+            if field_names is None or name in field_names:
+                fields[name] = self._render_cell(table.fields.get(name, FIELD_TEXT), value)
+        for name, ftype in table.fields.items():
+            if ftype == FIELD_MODIFIED_TIME and (field_names is None or name in field_names):
+                fields[name] = record["last_modified_time"]
+        out = {"record_id": record["record_id"], "fields": fields}
+        if automatic:
+            out["created_time"] = record["created_time"]
+            out["last_modified_time"] = record["last_modified_time"]
+        return out
+
+    @staticmethod
+    def _match(table: _Table, record: Dict, flt: Optional[Dict]) -> bool:
+        if not flt or not flt.get("conditions"):
+            return True
+        results = []
+        for cond in flt.get("conditions") or []:
+            name = cond.get("field_name")
+            operator = cond.get("operator")
+            values = [str(v) for v in (cond.get("value") or [])]
+            ftype = table.fields.get(name)
+            if ftype == FIELD_MODIFIED_TIME:
+                cell_ms = record["last_modified_time"]
+                target = int(values[-1]) if values and values[-1].isdigit() else 0
+                if operator == "isGreater":
+                    results.append(cell_ms > target)
+                elif operator == "isLess":
+                    results.append(cell_ms < target)
+                else:
+                    results.append(cell_ms == target)
+                continue
+            texts = _cell_texts(record["fields"].get(name))
+            if operator == "is":
+                results.append(bool(values) and values[0] in texts)
+            elif operator == "isNot":
+                results.append(not values or values[0] not in texts)
+            elif operator == "contains":
+                results.append(bool(values) and any(values[0] in t for t in texts))
+            elif operator == "isEmpty":
+                results.append(not texts)
+            elif operator == "isNotEmpty":
+                results.append(bool(texts))
+            else:
+                results.append(False)
+        return any(results) if (flt.get("conjunction") or "and") == "or" else all(results)
+
+    # ---- 请求分发 ----
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], headers, body: bytes) -> Tuple[str, int, Dict]:
+        """返回 (接口类型, HTTP 状态码, JSON 响应)。"""
+        def q(name: str, default: str = "") -> str:
+            return (query.get(name) or [default])[0]
+
+        def payload() -> Dict:
+            try:
+                data = json.loads(body.decode("utf-8") or "{}")
+            except ValueError:
+                return {}
+            return data if isinstance(data, dict) else {}
+
+        if path == "/open-apis/auth/v3/tenant_access_token/internal" and method == "POST":
+            token = "t-stub-" + hashlib.sha1(f"{time.time()}:{self._rng.random()}".encode()).hexdigest()[:24]
+            with self._lock:
+                self._tokens[token] = time.time() + self.token_expire_sec
+            return "token", 200, {"code": CODE_OK, "msg": "ok", "tenant_access_token": token, "expire": self.token_expire_sec}
+
+        auth = headers.get("Authorization") or ""
+        token = auth[7:] if auth.startswith("Bearer ") else ""
+        with self._lock:
+            token_ok = self._tokens.get(token, 0) > time.time()
+        if not token_ok:
+            return "unauthorized", 400, _error(CODE_INVALID_TOKEN, "Invalid access token for authorization.")
+
+        if path == "/open-apis/drive/v1/medias/upload_all" and method == "POST":
+            file_token = "box" + hashlib.sha256(body).hexdigest()[:24]
+            with self._lock:
+                self._media[file_token] = len(body)
+            return "media_upload", 200, {"code": CODE_OK, "msg": "success", "data": {"file_token": file_token}}
+
+        m = re.fullmatch(r"/open-apis/bitable/v1/apps/([^/]+)/tables/([^/]+)/(fields|records)(?:/([^/]+))?", path)
+        if not m:
+            return "other", 404, _error(404, "not found")
+        app_token, table_id, resource, tail = m.group(1), m.group(2), m.group(3), m.group(4)
+
+        if resource == "fields" and method == "GET":
+            if self.fields_unavailable:
+                return "fields", 403, _error(91403, "Forbidden")
+            with self._lock:
+                table = self._table(app_token, table_id)
+                items = [
+                    {"field_id": f"fld{i:04d}", "field_name": name, "type": ftype}
+                    for i, (name, ftype) in enumerate(table.fields.items())
+                ]
+            size = max(1, min(100, int(q("page_size", "20") or 20)))
+            start = int(q("page_token", "0") or 0)
+            page = items[start:start + size]
+            end = start + len(page)
+            data = {"items": page, "has_more": end < len(items), "total": len(items)}
+            if end < len(items):
+                data["page_token"] = str(end)
+            return "fields", 200, {"code": CODE_OK, "msg": "success", "data": data}
+
+        if resource != "records":
+            return "other", 404, _error(404, "not found")
+
+        with self._lock:
+            table = self._table(app_token, table_id)
+
+            if tail is None and method == "GET":
+                # 旧版 records?filter=CurrentValue.[字段]="值"（check_note_exists）
+                flt = None
+                fm = re.fullmatch(r'CurrentValue\.\[(.+?)\]\s*=\s*"(.*)"', unquote(q("filter")))
+                if fm:
+                    flt = {"conjunction": "and", "conditions": [{"field_name": fm.group(1), "operator": "is", "value": [fm.group(2)]}]}
+                matched = [r for r in table.records.values() if self._match(table, r, flt)]
+                size = max(1, min(SEARCH_PAGE_LIMIT, int(q("page_size", "20") or 20)))
+                items = [self._render_record(table, r) for r in matched[:size]]
+                return "records_list", 200, {"code": CODE_OK, "msg": "success",
+                                             "data": {"items": items, "total": len(matched), "has_more": len(matched) > size}}
+
+            if tail == "search" and method == "POST":
+                data = payload()
+                field_names = data.get("field_names")
+                size = max(1, min(SEARCH_PAGE_LIMIT, int(q("page_size", "") or data.get("page_size") or 20)))
+                start = int(q("page_token", "") or data.get("page_token") or 0)
+                matched = [r for r in table.records.values() if self._match(table, r, data.get("filter"))]
+                page = matched[start:start + size]
+                end = start + len(page)
+                out = {
+                    "items": [self._render_record(table, r, field_names, bool(data.get("automatic_fields"))) for r in page],
+                    "has_more": end < len(matched),
+                    "total": len(matched),
+                }
+                if end < len(matched):
+                    out["page_token"] = str(end)
+                return "records_search", 200, {"code": CODE_OK, "msg": "success", "data": out}
+
+            if tail is None and method == "POST":
+                try:
+                    stored = self._validate(table, payload().get("fields"))
+                except _FieldError as e:
+                    return "record_create", 400, self._field_error_payload(e)
+                record = self._insert(table, stored)
+                return "record_create", 200, {"code": CODE_OK, "msg": "success",
+                                              "data": {"record": self._render_record(table, record)}}
+
+            if tail == "batch_create" and method == "POST":
+                records = payload().get("records") or []
+                if len(records) > BATCH_LIMIT:
+                    return "records_batch_create", 400, _error(CODE_TOO_MANY_RECORDS, "TooManyRecords")
+                try:
+                    validated = [self._validate(table, (r or {}).get("fields")) for r in records]
+                except _FieldError as e:
+                    return "records_batch_create", 400, self._field_error_payload(e)
+                created = [self._render_record(table, self._insert(table, f)) for f in validated]
+                return "records_batch_create", 200, {"code": CODE_OK, "msg": "success", "data": {"records": created}}
+
+            if (tail == "batch_update" and method == "POST") or (tail and tail.startswith("rec") and method == "PUT"):
+                kind = "records_batch_update" if tail == "batch_update" else "record_update"
+                updates = payload().get("records") if kind == "records_batch_update" else [{"record_id": tail, **payload()}]
+                updates = updates or []
+                if len(updates) > BATCH_LIMIT:
+                    return kind, 400, _error(CODE_TOO_MANY_RECORDS, "TooManyRecords")
+                prepared = []
+                for upd in updates:
+                    record = table.records.get(str((upd or {}).get("record_id") or ""))
+                    if record is None:
+                        return kind, 400, _error(CODE_RECORD_NOT_FOUND, "RecordIdNotFound")
+                    try:
+                        prepared.append((record, self._validate(table, upd.get("fields") or {})))
+                    except _FieldError as e:
+                        return kind, 400, self._field_error_payload(e)
+                now_ms = int(time.time() * 1000)
+                for record, fields in prepared:
+                    record["fields"].update(fields)
+                    record["last_modified_time"] = now_ms
+                rendered = [self._render_record(table, r) for r, _ in prepared]
+                data = {"records": rendered} if kind == "records_batch_update" else {"record": rendered[0]}
+                return kind, 200, {"code": CODE_OK, "msg": "success", "data": data}
+
+        return "other", 404, _error(404, "not found")
+
+    def _make_handler(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self, method: str):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if parsed.path == "/__stats":
+                    kind, status, data = None, 200, server.snapshot_hits()
+                elif parsed.path == "/__reset":
+                    server.reset_hits()
+                    kind, status, data = None, 200, {}
+                else:
+                    if server.latency_ms:
+                        time.sleep(server.latency_ms / 1000)
+                    with server._lock:
+                        allowed = server._take_token()
+                        faulted = allowed and server.fault_rate and server._rng.random() < server.fault_rate
+                    if not allowed:
+                        kind, status, data = "rate_limited", 429, _error(CODE_RATE_LIMIT, "request trigger frequency limit")
+                    elif faulted:
+                        kind, status, data = "fault", 500, _error(CODE_INTERNAL_ERROR, "InternalError")
+                    else:
+                        kind, status, data = server.handle(method, parsed.path, parse_qs(parsed.query), self.headers, body)
+                if kind:
+                    with server._lock:
+                        server.hits[kind] += 1
+                raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PUT(self):
+                self._dispatch("PUT")
+
+            def log_message(self, format, *args):
+                pass
+
+        return _Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地飞书开放平台替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=0, help="每个请求附加的延迟")
+    parser.add_argument("--qps", type=float, default=0, help="全局每秒请求上限，超出返回 429/99991400（0 不限制）")
+    parser.add_argument("--fault-rate", type=float, default=0, help="随机返回 500 的比例")
+    parser.add_argument("--fields-unavailable", action="store_true", help="fields 接口返回 403")
+    args = parser.parse_args()
+    server = FeishuStubServer(args.host, args.port, latency_ms=args.latency_ms, qps=args.qps,
+                              fault_rate=args.fault_rate, fields_unavailable=args.fields_unavailable)
+    print(f"飞书替身已启动: FEISHU_BASE_URL={server.api_base}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
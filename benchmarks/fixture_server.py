@@ -0,0 +1,583 @@
+"""
+离线夹具服务器：模拟小红书主页/详情页与微博主页/时间线接口/详情页的页面结构与 JSON，
+用于在不访问线上站点的情况下测量 XhsScraper / WeiboHomeScraper 的抓取耗时与往返次数。
+
+- 小红书：/user/profile/<uid>（__INITIAL_STATE__ 首屏 + #userPostedFeeds 卡片，滚动到底部时请求 user_posted 接口追加卡片）、
+  /api/sns/web/v1/user_posted、/explore/<note_id>（__INITIAL_STATE__.note.noteDetailMap + swiper 图片 + .interact-container）；
+- 微博：/u/<uid>（.wbpro-scroller-item 虚拟列表，固定数量的节点随滚动原地复用）、/ajax/statuses/mymblog、
+  /ajax/statuses/show、/ajax/statuses/longtext、/<uid>/<mblogid> 详情页；
+- /fixture-img/...：1x1 图片；/__stats、/__reset：按请求类型统计的往返次数。
+
+账号的内容条数编码在 uid 中，见 xhs_profile_path() / weibo_uid()，生成 10～1000 条或更多都可以。
+
+用法：python benchmarks/fixture_server.py [--port 8765] [--latency-ms 0]
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+XHS_PAGE_SIZE = 30
+WEIBO_PAGE_SIZE = 20
+XHS_NOTE_INTERVAL = timedelta(hours=6)
+WEIBO_STATUS_INTERVAL = timedelta(hours=3)
+IMAGES_PER_NOTE = 4
+
+# 1x1 透明 GIF
+_PIXEL_GIF = bytes.fromhex("47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b")
+
+_CST = timezone(timedelta(hours=8))
+
+
+def xhs_profile_path(count: int) -> str:
+    """内容条数为 count 的小红书主页路径。"""
+    return f"/user/profile/bench{int(count):07d}"
+
+
+def weibo_uid(count: int) -> str:
+    """内容条数为 count 的微博 uid（以 9 开头的 8 位数字）。"""
+    return f"9{int(count):07d}"
+
+
+def _count_from_id(raw: str, default: int = 100) -> int:
+    m = re.search(r"(\d{7})$", raw or "")
+    return int(m.group(1)) if m else default
+
+
+# ---------------------------------------------------------------------------
+# 小红书数据
+# ---------------------------------------------------------------------------
+
+def xhs_note_id(uid: str, index: int) -> str:
+    return f"{index:08x}{hashlib.md5(uid.encode()).hexdigest()[:16]}"
+
+
+def _xhs_index_from_note_id(note_id: str) -> Optional[int]:
+    if not re.fullmatch(r"[0-9a-f]{24}", note_id or ""):
+        return None
+    return int(note_id[:8], 16)
+
+
+def _xhs_time(index: int, now: datetime) -> datetime:
+    return now - XHS_NOTE_INTERVAL * index - timedelta(minutes=5)
+
+
+def _xhs_date_text(dt: datetime, now: datetime) -> str:
+    delta = now - dt
+    if delta < timedelta(hours=1):
+        return f"{max(1, int(delta.total_seconds() // 60))}分钟前"
+    if delta < timedelta(days=1):
+        return f"{int(delta.total_seconds() // 3600)}小时前"
+    if delta < timedelta(days=7):
+        return f"{delta.days}天前 上海"
+    return dt.strftime("%m-%d") + " 上海"
+
+
+def _xhs_feed_item(uid: str, index: int, *, camel: bool) -> Dict:
+    note_id = xhs_note_id(uid, index)
+    title = f"夹具笔记 {index}"
+    cover = f"https://www.xiaohongshu.com/fixture-img/xhs/{note_id}/cover.gif"
+    liked = str(1000 - index % 1000)
+    sticky = index == 0
+    if camel:
+        return {
+            "noteId": note_id,
+            "xsecToken": f"XT{note_id[:10]}",
+            "displayTitle": title,
+            "type": "video" if index % 17 == 16 else "normal",
+            "cover": {"urlDefault": cover},
+            "interactInfo": {"likedCount": liked, "sticky": sticky},
+        }
+    return {
+        "note_id": note_id,
+        "xsec_token": f"XT{note_id[:10]}",
+        "display_title": title,
+        "type": "video" if index % 17 == 16 else "normal",
+        "cover": {"url_default": cover},
+        "interact_info": {"liked_count": liked, "sticky": sticky},
+    }
+
+
+def _xhs_note_detail(note_id: str, index: int, now: datetime) -> Dict:
+    images = [
+        {
+            "urlDefault": f"https://www.xiaohongshu.com/fixture-img/xhs/{note_id}/{i}.gif",
+            "infoList": [
+                {"imageScene": "WB_PRV", "url": f"https://www.xiaohongshu.com/fixture-img/xhs/{note_id}/{i}_prv.gif"},
+                {"imageScene": "WB_DFT", "url": f"https://www.xiaohongshu.com/fixture-img/xhs/{note_id}/{i}.gif"},
+            ],
+        }
+        for i in range(IMAGES_PER_NOTE)
+    ]
+    return {
+        "noteId": note_id,
+        "title": f"夹具笔记 {index}",
+        "desc": f"这是第 {index} 条夹具笔记的正文。#夹具[话题]# #性能测试[话题]#\n第二段正文。",
+        "type": "normal",
+        "time": int(_xhs_time(index, now).timestamp() * 1000),
+        "imageList": images,
+        "interactInfo": {
+            "likedCount": "1.2万",
+            "collectedCount": str(300 + index),
+            "commentCount": str(40 + index % 10),
+            "shareCount": str(5 + index % 3),
+        },
+        "user": {"nickname": "夹具作者"},
+        "tagList": [{"name": "夹具"}, {"name": "性能测试"}],
+    }
+
+
+def _json_for_script(data) -> str:
+    return json.dumps(data, ensure_ascii=False).replace("</", "<\\/")
+
+
+def xhs_profile_html(uid: str) -> str:
+    total = _count_from_id(uid)
+    first = [_xhs_feed_item(uid, i, camel=True) for i in range(min(XHS_PAGE_SIZE, total))]
+    state = {
+        "user": {
+            "notes": [first],
+            "noteQueries": [{"hasMore": total > len(first), "cursor": str(len(first))}],
+        }
+    }
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>夹具主页 {uid}</title>
+<style>
+body {{ margin: 0; font-family: sans-serif; }}
+.feeds-container {{ display: flex; flex-wrap: wrap; width: 1200px; }}
+section.note-item {{ width: 280px; height: 360px; margin: 8px; }}
+a.cover {{ display: block; height: 280px; background: #eee; }}
+</style></head>
+<body>
+<div class="user-page"><div class="feeds-tab-container"><div id="userPostedFeeds" class="feeds-container"></div></div></div>
+<script>window.__INITIAL_STATE__ = {_json_for_script(state)};</script>
+<script>
+(() => {{
+    const uid = {json.dumps(uid)};
+    const feeds = document.getElementById('userPostedFeeds');
+    const query = window.__INITIAL_STATE__.user.noteQueries[0];
+    let cursor = query.cursor, hasMore = query.hasMore, loading = false;
+    const esc = (s) => String(s).replace(/[&<>"]/g, c => ({{'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}})[c]);
+    const append = (n) => {{
+        const id = n.note_id || n.noteId;
+        const token = n.xsec_token || n.xsecToken;
+        const info = n.interact_info || n.interactInfo || {{}};
+        const cover = n.cover || {{}};
+        const isVideo = (n.type || '') === 'video';
+        const html = `<section class="note-item" data-width="3" data-height="4">
+            <div>${{info.sticky ? '<div class="top-tag-area"><div class="top-wrapper">置顶</div></div>' : ''}}
+            <a class="cover mask ld" href="/user/profile/${{uid}}/${{id}}?xsec_token=${{encodeURIComponent(token)}}&xsec_source=pc_user">
+                <img src="${{esc(cover.url_default || cover.urlDefault || '')}}">${{isVideo ? '<span class="play-icon"></span>' : ''}}
+            </a>
+            <div class="footer"><a class="title"><span>${{esc(n.display_title || n.displayTitle || '')}}</span></a>
+                <div class="card-bottom-wrapper"><span class="like-wrapper like-active"><span class="count">${{esc(info.liked_count || info.likedCount || '0')}}</span></span></div>
+            </div></div></section>`;
+        feeds.insertAdjacentHTML('beforeend', html);
+    }};
+    window.__INITIAL_STATE__.user.notes[0].forEach(append);
+    const loadMore = async () => {{
+        if (loading || !hasMore) return;
+        loading = true;
+        try {{
+            const resp = await fetch(`/api/sns/web/v1/user_posted?num=30&cursor=${{cursor}}&user_id=${{uid}}&image_formats=jpg,webp`);
+            const payload = await resp.json();
+            (payload.data.notes || []).forEach(append);
+            cursor = payload.data.cursor;
+            hasMore = payload.data.has_more;
+        }} finally {{
+            loading = false;
+        }}
+    }};
+    window.addEventListener('scroll', () => {{
+        if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 400) loadMore();
+    }});
+}})();
+</script>
+</body></html>"""
+
+
+def xhs_user_posted_json(uid: str, cursor: str, num: int) -> Dict:
+    total = _count_from_id(uid)
+    try:
+        start = max(0, int(cursor or 0))
+    except ValueError:
+        start = 0
+    end = min(total, start + max(1, num))
+    notes = [_xhs_feed_item(uid, i, camel=False) for i in range(start, end)]
+    return {
+        "code": 0,
+        "success": True,
+        "msg": "成功",
+        "data": {"notes": notes, "cursor": str(end), "has_more": end < total},
+    }
+
+
+def xhs_note_html(note_id: str, now: datetime) -> Optional[str]:
+    index = _xhs_index_from_note_id(note_id)
+    if index is None:
+        return None
+    note = _xhs_note_detail(note_id, index, now)
+    state = {"note": {"noteDetailMap": {note_id: {"note": note, "comments": {"list": []}}}}}
+    slides = "".join(
+        f'<div class="swiper-slide" data-swiper-slide-index="{i}"><img class="preview-image" src="{img["urlDefault"]}"></div>'
+        for i, img in enumerate(note["imageList"])
+    )
+    interact = note["interactInfo"]
+    date_text = _xhs_date_text(_xhs_time(index, now), now)
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>{note['title']} - 夹具</title></head>
+<body>
+<div id="noteContainer" class="note-container">
+  <div class="media-container"><div class="swiper"><div class="swiper-wrapper">{slides}</div></div></div>
+  <div class="interaction-container">
+    <div class="author-container"><div class="author-info"><a href="/user/profile/fixture"><span class="name">{note['user']['nickname']}</span></a></div></div>
+    <div class="note-scroller">
+      <div class="note-content">
+        <div id="detail-title" class="title">{note['title']}</div>
+        <div id="detail-desc" class="desc"><span class="note-text">{note['desc'].replace('[话题]', '')}</span></div>
+        <div class="tag-list"><a class="tag">#夹具</a><a class="tag">#性能测试</a></div>
+        <div class="bottom-container"><span class="date">{date_text}</span></div>
+      </div>
+    </div>
+    <div class="interact-container">
+      <div class="left"><span class="like-wrapper"><span class="count">{interact['likedCount']}</span></span>
+      <span class="collect-wrapper"><span class="count">{interact['collectedCount']}</span></span>
+      <span class="chat-wrapper"><span class="count">{interact['commentCount']}</span></span>
+      <span class="share-wrapper"><span class="count">{interact['shareCount']}</span></span></div>
+    </div>
+  </div>
+</div>
+<script>window.__INITIAL_STATE__ = {_json_for_script(state)};</script>
+</body></html>"""
+
+
+# ---------------------------------------------------------------------------
+# 微博数据
+# ---------------------------------------------------------------------------
+
+def weibo_mblogid(uid: str, index: int) -> str:
+    return f"N{uid}x{index}"
+
+
+def _weibo_parse_mblogid(mblogid: str) -> Optional[Tuple[str, int]]:
+    m = re.fullmatch(r"N(\d+)x(\d+)", mblogid or "")
+    return (m.group(1), int(m.group(2))) if m else None
+
+
+def _weibo_time(index: int, now: datetime) -> datetime:
+    return now - WEIBO_STATUS_INTERVAL * index - timedelta(minutes=7)
+
+
+def _weibo_time_text(dt: datetime, now: datetime) -> str:
+    delta = now - dt
+    if delta < timedelta(hours=1):
+        return f"{max(1, int(delta.total_seconds() // 60))}分钟前"
+    if dt.date() == now.date():
+        return f"今天 {dt:%H:%M}"
+    if dt.year == now.year:
+        return f"{dt.month}-{dt.day} {dt:%H:%M}"
+    return f"{dt:%y-%m-%d %H:%M}"
+
+
+def weibo_status(uid: str, index: int, now: datetime) -> Dict:
+    mblogid = weibo_mblogid(uid, index)
+    created = _weibo_time(index, now).astimezone(_CST)
+    pic_ids = [f"{mblogid}p{i}" for i in range(IMAGES_PER_NOTE if index % 5 != 4 else 0)]
+    text = f"第 {index} 条夹具微博正文 #性能测试#"
+    status = {
+        "idstr": str(5000000000000000 + index),
+        "mid": str(5000000000000000 + index),
+        "mblogid": mblogid,
+        "created_at": created.strftime("%a %b %d %H:%M:%S %z %Y"),
+        "text_raw": text + ("（正文较长，展开见全文）" if index % 7 == 6 else ""),
+        "isLongText": index % 7 == 6,
+        "isTop": 1 if index == 0 else 0,
+        "pic_ids": pic_ids,
+        "pic_infos": {
+            pid: {
+                "thumbnail": {"url": f"https://weibo.com/fixture-img/weibo/{pid}_thumb.gif"},
+                "largest": {"url": f"https://weibo.com/fixture-img/weibo/{pid}.gif"},
+            }
+            for pid in pic_ids
+        },
+        "user": {"idstr": uid, "id": int(uid), "screen_name": f"夹具博主{uid[-4:]}"},
+        "attitudes_count": 1000 + index,
+        "comments_count": 100 + index,
+        "reposts_count": 10 + index,
+        # 夹具页面渲染列表时间用，真实接口没有该字段
+        "fixture_time_text": _weibo_time_text(_weibo_time(index, now), now),
+    }
+    if index % 5 == 4:
+        status["page_info"] = {"object_type": "article", "page_title": "夹具文章"}
+    return status
+
+
+def weibo_timeline_json(uid: str, page: int, now: datetime) -> Dict:
+    total = _count_from_id(uid)
+    start = max(0, (page - 1) * WEIBO_PAGE_SIZE)
+    end = min(total, start + WEIBO_PAGE_SIZE)
+    statuses = [weibo_status(uid, i, now) for i in range(start, end)]
+    return {"ok": 1, "data": {"list": statuses, "since_id": f"{uid}_{end}" if end < total else "", "total": total}}
+
+
+def weibo_profile_html(uid: str) -> str:
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>夹具微博主页 {uid}</title>
+<style>
+body {{ margin: 0; font-family: sans-serif; }}
+.vue-recycle-scroller__item-wrapper {{ position: relative; width: 700px; }}
+.vue-recycle-scroller__item-view {{ position: absolute; left: 0; width: 100%; height: 400px; }}
+</style></head>
+<body>
+<div id="app"><main><div class="vue-recycle-scroller ready page-mode direction-vertical">
+<div class="vue-recycle-scroller__item-wrapper"></div></div></main></div>
+<script>
+(() => {{
+    const uid = {json.dumps(uid)};
+    const ITEM_H = 400, POOL = 12;
+    const wrapper = document.querySelector('.vue-recycle-scroller__item-wrapper');
+    const items = [];
+    let page = 0, sinceId = '', hasMore = true, loading = false;
+    const pool = [];
+    for (let k = 0; k < POOL; k++) {{
+        const view = document.createElement('div');
+        view.className = 'vue-recycle-scroller__item-view';
+        view.innerHTML = '<div class="wbpro-scroller-item"></div>';
+        view.style.display = 'none';
+        wrapper.appendChild(view);
+        pool.push(view);
+    }}
+    const esc = (s) => String(s).replace(/[&<>"]/g, c => ({{'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}})[c]);
+    const itemHtml = (s) => `<article class="woo-panel-main Feed_wrap_3v9LH">
+        <header class="woo-box-flex"><div class="head_main">
+            <a class="head-info_nick_2Ejv" href="/u/${{uid}}"><span>${{esc(s.user.screen_name)}}</span></a>
+            ${{s.isTop ? '<div class="title_wrap"><span class="title_title">置顶</span></div>' : ''}}
+            <div class="head-info_info"><a class="head-info_time_6sFQg" href="/${{uid}}/${{s.mblogid}}">${{esc(s.fixture_time_text)}}</a></div>
+        </div></header>
+        <div class="wbpro-feed-content"><div class="detail_wbtext_4CRf9">${{esc(s.text_raw)}}</div></div>
+    </article>`;
+    // 固定数量的节点按滚动位置原地复用，模拟 vue-virtual-scroller 的回收行为
+    const render = () => {{
+        wrapper.style.height = (items.length * ITEM_H) + 'px';
+        const first = Math.max(0, Math.floor((window.scrollY || 0) / ITEM_H) - 2);
+        for (let k = 0; k < POOL; k++) {{
+            const i = first + k;
+            const view = pool[k];
+            if (i >= items.length) {{ view.style.display = 'none'; continue; }}
+            view.style.display = '';
+            view.style.transform = `translateY(${{i * ITEM_H}}px)`;
+            const el = view.firstElementChild;
+            if (el.getAttribute('data-index') === String(i)) continue;
+            el.setAttribute('data-index', String(i));
+            el.setAttribute('data-virtual-index', String(i));
+            el.innerHTML = itemHtml(items[i]);
+        }}
+    }};
+    const loadMore = async () => {{
+        if (loading || !hasMore) return;
+        loading = true;
+        try {{
+            page += 1;
+            const params = new URLSearchParams({{uid, page: String(page), feature: '0'}});
+            if (sinceId) params.set('since_id', sinceId);
+            const resp = await fetch(`/ajax/statuses/mymblog?${{params}}`);
+            const payload = await resp.json();
+            items.push(...(payload.data.list || []));
+            sinceId = payload.data.since_id || '';
+            hasMore = !!sinceId;
+            render();
+        }} finally {{
+            loading = false;
+        }}
+    }};
+    window.addEventListener('scroll', () => {{
+        render();
+        if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 800) loadMore();
+    }});
+    loadMore();
+}})();
+</script>
+</body></html>"""
+
+
+def weibo_detail_html(uid: str, index: int, now: datetime) -> str:
+    s = weibo_status(uid, index, now)
+    pics = "".join(f'<img src="{info["largest"]["url"]}">' for info in s["pic_infos"].values())
+    created = _weibo_time(index, now)
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>夹具微博详情</title></head>
+<body>
+<div id="app"><main>
+<article class="woo-panel-main Detail_feed_3iffy">
+  <header class="woo-box-flex">
+    <a class="detail_userName_xO0Aa" usercard="name={s['user']['screen_name']}" href="/u/{uid}"><span>{s['user']['screen_name']}</span></a>
+    <a class="head-info_time_6sFQg detail_time_1bAob" href="/{uid}/{s['mblogid']}">{created:%y-%m-%d %H:%M}</a>
+  </header>
+  <div class="wbpro-feed-content"><div class="detail_wbtext_4CRf9">{s['text_raw']}</div></div>
+  <div class="picture picture-box_row_30Iwo">{pics}</div>
+  <footer><div class="woo-box-flex toolbar_main_3Mxwo">
+    <div class="woo-box-item-flex toolbar_item_1ky_D"><span class="toolbar_num_JXZul">{s['reposts_count']}</span></div>
+    <div class="woo-box-item-flex toolbar_item_1ky_D"><span class="toolbar_num_JXZul">{s['comments_count']}</span></div>
+    <div class="woo-box-item-flex toolbar_item_1ky_D"><span class="woo-like-count">{s['attitudes_count']}</span></div>
+  </div></footer>
+</article>
+</main></div>
+</body></html>"""
+
+
+# ---------------------------------------------------------------------------
+# HTTP 服务
+# ---------------------------------------------------------------------------
+
+class FixtureServer:
+    """在后台线程运行的夹具服务器；hits 按请求类型统计往返次数。"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, latency_ms: float = 0):
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.hits: Counter = Counter()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_hits(self):
+        with self._lock:
+            self.hits.clear()
+
+    def snapshot_hits(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.hits)
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.hits[kind] += 1
+
+    def route(self, path: str, query: Dict[str, List[str]]) -> Tuple[str, int, str, bytes]:
+        """返回 (请求类型, 状态码, Content-Type, 响应体)。"""
+        now = datetime.now()
+
+        def q(name: str, default: str = "") -> str:
+            return (query.get(name) or [default])[0]
+
+        def as_json(kind: str, data) -> Tuple[str, int, str, bytes]:
+            return kind, 200, "application/json; charset=utf-8", json.dumps(data, ensure_ascii=False).encode()
+
+        def as_html(kind: str, html: Optional[str]) -> Tuple[str, int, str, bytes]:
+            if html is None:
+                return kind, 404, "text/plain; charset=utf-8", b"not found"
+            return kind, 200, "text/html; charset=utf-8", html.encode()
+
+        if path.startswith("/fixture-img/"):
+            return "image", 200, "image/gif", _PIXEL_GIF
+        if path == "/api/sns/web/v1/user_posted":
+            return as_json("xhs_user_posted", xhs_user_posted_json(q("user_id"), q("cursor", "0"), int(q("num", "30") or 30)))
+        m = re.fullmatch(r"/user/profile/([A-Za-z0-9]+)/([A-Za-z0-9]+)", path)
+        if m:
+            return as_html("xhs_note", xhs_note_html(m.group(2), now))
+        m = re.fullmatch(r"/user/profile/([A-Za-z0-9]+)/?", path)
+        if m:
+            return as_html("xhs_profile", xhs_profile_html(m.group(1)))
+        m = re.fullmatch(r"/(?:explore|discovery/item)/([A-Za-z0-9]+)", path)
+        if m:
+            return as_html("xhs_note", xhs_note_html(m.group(1), now))
+        if path == "/ajax/statuses/mymblog":
+            try:
+                page = int(q("page", "1") or 1)
+            except ValueError:
+                page = 1
+            return as_json("weibo_timeline", weibo_timeline_json(q("uid"), page, now))
+        if path in ("/ajax/statuses/show", "/ajax/statuses/longtext"):
+            parsed = _weibo_parse_mblogid(q("id"))
+            kind = "weibo_show" if path.endswith("show") else "weibo_longtext"
+            if not parsed:
+                return as_json(kind, {"ok": 0})
+            uid, index = parsed
+            status = weibo_status(uid, index, now)
+            if kind == "weibo_show":
+                return as_json(kind, status)
+            return as_json(kind, {"ok": 1, "data": {"longTextContent": status["text_raw"] + "\n这里是展开后的全文。"}})
+        m = re.fullmatch(r"/(?:u/|profile/)?(\d{5,})/?", path)
+        if m:
+            return as_html("weibo_profile", weibo_profile_html(m.group(1)))
+        m = re.fullmatch(r"/(\d{5,})/([A-Za-z0-9]+)", path)
+        if m:
+            parsed = _weibo_parse_mblogid(m.group(2))
+            return as_html("weibo_detail", weibo_detail_html(parsed[0], parsed[1], now) if parsed else None)
+        if path == "/favicon.ico":
+            return "other", 204, "image/x-icon", b""
+        return "other", 404, "text/plain; charset=utf-8", b"not found"
+
+    def _make_handler(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == "/__stats":
+                    body = json.dumps(server.snapshot_hits()).encode()
+                    kind, status, ctype = None, 200, "application/json"
+                elif parsed.path == "/__reset":
+                    server.reset_hits()
+                    kind, status, ctype, body = None, 200, "application/json", b"{}"
+                else:
+                    kind, status, ctype, body = server.route(parsed.path, parse_qs(parsed.query))
+                if kind:
+                    server._count(kind)
+                if server.latency_ms and kind:
+                    time.sleep(server.latency_ms / 1000)
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return _Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="小红书/微博离线夹具服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="每个请求附加的延迟")
+    args = parser.parse_args()
+    server = FixtureServer(args.host, args.port, latency_ms=args.latency_ms)
+    print(f"夹具服务器已启动: {server.base_url}")
+    print(f"  小红书主页示例: {server.base_url}{xhs_profile_path(100)}")
+    print(f"  微博主页示例:   {server.base_url}/u/{weibo_uid(100)}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -165,12 +165,77 @@ match TASK_TYPE:
 # ===============================================================================
 FEISHU_APP_ID = os.environ.get("FEISHU_APP_ID", "cli_a82f83f6eed3501c")
 FEISHU_APP_SECRET = os.environ.get("FEISHU_APP_SECRET", "oyWom5iYRryFnfUbee3SnfSN6hgwtW1e")
+# 开放平台接口地址；压测时可指向本地替身 benchmarks/feishu_stub_server.py（如 http://127.0.0.1:8766/open-apis）
+FEISHU_BASE_URL = os.environ.get("FEISHU_BASE_URL", "https://open.feishu.cn/open-apis")
+# 进程内共享的 tenant_access_token 与表字段类型缓存（feishu_cache.py），持久化到该文件供下次运行复用；设为空字符串只在内存中缓存
+# 文件中保存 token 明文，注意不要提交到仓库
+FEISHU_CACHE_PATH = os.environ.get("FEISHU_CACHE_PATH", "feishu_cache.json")
+# 表字段类型缓存有效期（秒）；写入报字段不存在/字段值转换失败时立即失效
+FEISHU_SCHEMA_CACHE_TTL_SECONDS = float(os.environ.get("FEISHU_SCHEMA_CACHE_TTL_SECONDS", "21600") or "21600")
+# token 过期前多少秒由后台任务提前刷新（飞书在剩余不足 30 分钟时才会签发新 token）；0 关闭主动刷新
+FEISHU_TOKEN_REFRESH_MARGIN_SECONDS = float(os.environ.get("FEISHU_TOKEN_REFRESH_MARGIN_SECONDS", "600") or "600")
 
 # 飞书接口请求重试/超时（毫秒），可按需覆盖环境变量
 FEISHU_REQUEST_TIMEOUT_MS = int(os.environ.get("FEISHU_REQUEST_TIMEOUT_MS", "60000") or "60000")
 FEISHU_REQUEST_MAX_RETRIES = int(os.environ.get("FEISHU_REQUEST_MAX_RETRIES", "3") or "3")
 FEISHU_REQUEST_RETRY_BACKOFF_SECONDS = int(os.environ.get("FEISHU_REQUEST_RETRY_BACKOFF_SECONDS", "2") or "2")
 
+# 批量写入：每个 sink 的缓冲条数阈值（不超过 batch_create 上限 500）与最长等待秒数，先到先写
+FEISHU_BATCH_SIZE = int(os.environ.get("FEISHU_BATCH_SIZE", "50") or "50")
+FEISHU_BATCH_FLUSH_INTERVAL_SECONDS = float(os.environ.get("FEISHU_BATCH_FLUSH_INTERVAL_SECONDS", "30") or "30")
+
+# 去重方式："local" 使用本地 SQLite 索引（每个任务开始前从飞书增量同步，写入成功后登记）；"remote" 每个账号都查询飞书
+FEISHU_DEDUP_MODE = os.environ.get("FEISHU_DEDUP_MODE", "local")
+FEISHU_DEDUP_INDEX_PATH = os.environ.get("FEISHU_DEDUP_INDEX_PATH", "feishu_dedup_index.sqlite3")
+# 表中没有“最后更新时间”字段时无法增量同步，按该周期（小时）做一次仅含 note_id 列的全量同步
+FEISHU_DEDUP_FULL_SYNC_HOURS = float(os.environ.get("FEISHU_DEDUP_FULL_SYNC_HOURS", "24") or "24")
+
+# 增量水位线：按 (表, 账号) 记录上次处理到的最新内容，列表抓取到达水位线即停止，只处理其上方的新内容
+# 设为 0/false 关闭（每次从头列出，依赖去重）；单个任务可在 params.incremental=False 中关闭
+WATERMARK_ENABLED = os.environ.get("WATERMARK_ENABLED", "true").lower() in ("1", "true", "yes")
+WATERMARK_PATH = os.environ.get("WATERMARK_PATH", "crawl_watermarks.sqlite3")
+# 每个账号记录的最新内容 id 条数：最新一条被作者删除后仍能用其余 id 命中水位线
+WATERMARK_KEEP_IDS = int(os.environ.get("WATERMARK_KEEP_IDS", "5") or "5")
+
+# 运行日志：逐行记录各任务/账号/内容的进度（列表、详情、写入），中断后可用 python main.py --resume 续跑
+RUN_JOURNAL_ENABLED = os.environ.get("RUN_JOURNAL_ENABLED", "true").lower() in ("1", "true", "yes")
+RUN_JOURNAL_PATH = os.environ.get("RUN_JOURNAL_PATH", "run_journal.jsonl")
+
+# 发件箱（outbox.py）：抓取结果先追加到本地 SQLite，由后台协程按 FEISHU_BATCH_SIZE / FEISHU_BATCH_FLUSH_INTERVAL_SECONDS 批量写入飞书，
+# 飞书变慢或报错不阻塞抓取，写入失败的记录不丢失；关闭后直接写入飞书（写入失败即丢弃）
+OUTBOX_ENABLED = os.environ.get("OUTBOX_ENABLED", "true").lower() in ("1", "true", "yes")
+OUTBOX_PATH = os.environ.get("OUTBOX_PATH", "feishu_outbox.sqlite3")
+# 后台协程检查到期记录的间隔（秒）
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.environ.get("OUTBOX_POLL_INTERVAL_SECONDS", "2") or "2")
+# 单条记录最多尝试写入次数，超过后移入死信表（python outbox.py dead 查看，python outbox.py requeue 放回）
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "5") or "5")
+# 失败重试退避：首次等待秒数，之后每次翻倍，不超过上限
+OUTBOX_RETRY_BACKOFF_SECONDS = float(os.environ.get("OUTBOX_RETRY_BACKOFF_SECONDS", "30") or "30")
+OUTBOX_RETRY_MAX_BACKOFF_SECONDS = float(os.environ.get("OUTBOX_RETRY_MAX_BACKOFF_SECONDS", "1800") or "1800")
+# 任务结束时等待本任务提交记录首次写入结果的最长秒数，超时的记录留在发件箱，下次运行或 python outbox.py flush 时写入
+OUTBOX_CLOSE_TIMEOUT_SECONDS = float(os.environ.get("OUTBOX_CLOSE_TIMEOUT_SECONDS", "300") or "300")
+
+# 图片转存（image_mirror.py）：批量写入前把图片下载并上传到飞书（bitable_image），写入字段映射中 image_attachments 对应的附件列，
+# 避免 CDN 链接过期后图片失效；字段映射中没有 image_attachments 的 sink 不转存。相同内容的图片按 sha256 只上传一次
+IMAGE_MIRROR_ENABLED = os.environ.get("IMAGE_MIRROR_ENABLED", "false").lower() in ("1", "true", "yes")
+IMAGE_MIRROR_CACHE_PATH = os.environ.get("IMAGE_MIRROR_CACHE_PATH", "feishu_image_tokens.sqlite3")
+# 每个 sink 同时下载/上传的图片数，以及本次运行累计下载字节上限（0 不限制），超出后只写图片链接
+# 单个 sink 可在 FEISHU_SINKS 中用 "image_mirror": {"concurrency": 2, "max_bytes": ...} 覆盖
+IMAGE_MIRROR_CONCURRENCY = int(os.environ.get("IMAGE_MIRROR_CONCURRENCY", "4") or "4")
+IMAGE_MIRROR_MAX_BYTES_PER_RUN = int(os.environ.get("IMAGE_MIRROR_MAX_BYTES_PER_RUN", str(500 * 1024 * 1024)) or "0")
+# 单张图片上限（飞书 upload_all 限制 20MB）
+IMAGE_MIRROR_MAX_IMAGE_BYTES = int(os.environ.get("IMAGE_MIRROR_MAX_IMAGE_BYTES", str(20 * 1024 * 1024)) or str(20 * 1024 * 1024))
+# 图床防盗链：按域名附带 Referer
+IMAGE_MIRROR_REFERERS = {
+    "xhscdn.com": "https://www.xiaohongshu.com/",
+    "sinaimg.cn": "https://weibo.com/",
+}
+
+# 各阶段耗时指标（导航、选择器等待、列表、去重、详情、飞书写入、主动等待、限速等待），运行结束时导出
+# Prometheus textfile（可放到 node_exporter 的 textfile 目录）与 JSON；留空则不导出对应格式
+METRICS_PROM_PATH = os.environ.get("METRICS_PROM_PATH", "metrics/fetch_process.prom")
+METRICS_JSON_PATH = os.environ.get("METRICS_JSON_PATH", "metrics/fetch_process.json")
+
 
 # ===============================================================================
 # 飞书多维表格配置
@@ -186,9 +251,82 @@ FEISHU_BASE_APP_TOKEN = os.environ.get("FEISHU_BASE_APP_TOKEN", curFeishuAppToke
 # 要爬取的小红书用户主页URL列表，可以配置多个
 XHS_TARGET_URLS = curXhsTargets
 
+# 主页列表引擎："network" 监听主页自身的 JSON 数据构建列表（默认）；"dom" 逐个解析卡片节点
+# network 引擎拿不到数据时会自动回退到 dom 引擎；单个任务可在 params.list_engine 中覆盖
+XHS_LIST_ENGINE = os.environ.get("XHS_LIST_ENGINE", "network")
+
+# 主页滚动上限：列表引擎收集够所需数量的新笔记或列表不再增长时即停止，此值只防止异常情况下无限滚动
+XHS_MAX_SCROLLS = int(os.environ.get("XHS_MAX_SCROLLS", "20") or "20")
+
+# 笔记详情引擎："state" 一次性读取页面的 __INITIAL_STATE__ / feed 接口数据（默认）；"dom" 按选择器逐项解析
+# state 引擎取不到数据时会自动回退到 dom 引擎；单个任务可在 params.detail_engine 中覆盖
+XHS_DETAIL_ENGINE = os.environ.get("XHS_DETAIL_ENGINE", "state")
+
 # 要爬取的微博主页URL列表，可以配置多个
 WEIBO_TARGET_URLS = curWbTargets
 
+# 微博列表引擎："api" 使用登录态 Cookie 直接请求时间线 JSON 接口按游标翻页（默认）；"dom" 滚动主页逐屏收集
+# api 引擎无法识别 uid 或接口不可用时会自动回退到 dom 引擎；单个任务可在 params.list_engine 中覆盖
+WEIBO_LIST_ENGINE = os.environ.get("WEIBO_LIST_ENGINE", "api")
+
+# 微博详情引擎："api" 请求状态 JSON（长文再请求 longtext 展开），不渲染页面（默认）；"dom" 逐条打开详情页解析
+# api 引擎失败时会自动回退到 dom 引擎；单个任务可在 params.detail_engine 中覆盖
+WEIBO_DETAIL_ENGINE = os.environ.get("WEIBO_DETAIL_ENGINE", "api")
+
+# 请求拦截档位（routing.py）："off" 不拦截；"default" 拦截视频/字体/埋点（默认）；"lean" 额外拦截图片本体
+# 启用拦截后 Playwright 会关闭该页面的 HTTP 缓存；单个任务可在 params.routing_profile 中覆盖
+XHS_ROUTING_PROFILE = os.environ.get("XHS_ROUTING_PROFILE", "default")
+WEIBO_ROUTING_PROFILE = os.environ.get("WEIBO_ROUTING_PROFILE", "default")
+# 视为埋点/统计上报的域名（含子域名），common 对所有平台生效
+ROUTING_TRACKER_HOSTS = {
+    "common": ["google-analytics.com", "googletagmanager.com", "hm.baidu.com", "cnzz.com", "umeng.com"],
+    "xhs": ["apm-fe.xiaohongshu.com", "t2.xiaohongshu.com", "spider-tracker.xiaohongshu.com"],
+    "weibo": ["beacon.sina.com.cn", "sbeacon.sina.com.cn", "log.mix.sina.com.cn"],
+}
+
+# 账号级并发：同一任务内同时处理的账号数（每个账号使用独立的浏览器上下文），单个任务可在 params.account_concurrency 中覆盖
+ACCOUNT_CONCURRENCY = int(os.environ.get("ACCOUNT_CONCURRENCY", "3") or "3")
+# 任务级并发：同时执行的任务数（不同任务使用各自的上下文与 sink，共享同一个浏览器）
+TASK_CONCURRENCY = int(os.environ.get("TASK_CONCURRENCY", "2") or "2")
+# 账号内流水线（pipeline.py：预过滤 → 详情抓取 → 校验/写入）相邻阶段之间最多缓存的条数，下游处理不过来时上游等待
+# 详情阶段并发见环境变量 XHS_DETAIL_CONCURRENCY / WEIBO_DETAIL_CONCURRENCY / WECHAT_DETAIL_CONCURRENCY，单个任务可在 params.detail_concurrency 中覆盖
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "8") or "8")
+# 按目标域名限速（rate_limiter.py）：令牌桶，rate 为每秒请求数，burst 为可积累的突发数，jitter_ms 为每次取令牌后的随机延迟
+# 页面导航、滚动翻页、站点接口、飞书接口都会先取令牌；收到限流/风控信号时自动降速，之后逐步恢复到配置速率
+RATE_LIMITS = {
+    "xiaohongshu.com": {
+        "rate": float(os.environ.get("XHS_RATE_PER_SEC", "0.5") or "0.5"),
+        "burst": 2,
+        "jitter_ms": [300, 1200],
+    },
+    "weibo.com": {
+        "rate": float(os.environ.get("WEIBO_RATE_PER_SEC", "1") or "1"),
+        "burst": 3,
+        "jitter_ms": [200, 800],
+    },
+    # 飞书写入与抓取站点的礼貌等待相互独立，只受开放平台频率限制约束
+    "open.feishu.cn": {
+        "rate": float(os.environ.get("FEISHU_RATE_PER_SEC", "10") or "10"),
+        "burst": 10,
+        "jitter_ms": [0, 0],
+    },
+}
+
+# 浏览器上下文池：账号之间复用上下文（保留 HTTP/脚本缓存），导航达到上限或命中风控页时回收并沿用 cookie
+CONTEXT_POOL_MAX_IDLE = int(os.environ.get("CONTEXT_POOL_MAX_IDLE", "3") or "3")
+CONTEXT_POOL_MAX_NAVIGATIONS = int(os.environ.get("CONTEXT_POOL_MAX_NAVIGATIONS", "60") or "60")
+# 页面导航到包含以下片段的 URL 时视为触发风控/掉登录，归还后回收该上下文；只用具体的登录/验证域名和路径，
+# 避免把正文链接等含 login 字样的普通页面误判为掉登录
+CONTEXT_POOL_ANTIBOT_URL_MARKERS = {
+    "xhs": ["/website-login/captcha", "/website-login/error", "captcha"],
+    "weibo": ["passport.weibo.com", "login.sina.com.cn", "security.weibo.com", "weibo.com/newlogin"],
+}
+# 按站点限制同时在途的列表/详情抓取数，跨账号、跨任务全局生效
+DOMAIN_MAX_INFLIGHT = {
+    "xiaohongshu.com": int(os.environ.get("XHS_MAX_INFLIGHT", "3") or "3"),
+    "weibo.com": int(os.environ.get("WEIBO_MAX_INFLIGHT", "4") or "4"),
+}
+
 # Playwright 会话状态文件路径，用于保存登录状态
 XHS_AUTH_STATE_PATH = "auth_state.json"
 # 微博登录态文件，运行 weibo_login_helper.py 生成
@@ -216,6 +354,7 @@ FEISHU_FIELD_MAPPING_XHS = {
     "collections_count": "收藏数",# 收藏数 (数字)
     "comments_count": "评论数",   # 评论数 (数字)
     "shares_count": "转发数",     # 转发数 (数字)
+    # "image_attachments": "图片附件",  # 转存后的图片 (附件)，需开启 IMAGE_MIRROR_ENABLED
 }
 
 FEISHU_FIELD_MAPPING_WB = {
@@ -228,6 +367,7 @@ FEISHU_FIELD_MAPPING_WB = {
     "likes_count": "点赞数",      # 点赞数 (数字)
     "comments_count": "评论数",   # 评论数 (数字)
     "shares_count": "转发数",     # 转发数 (数字)
+    # "image_attachments": "图片附件",  # 转存后的图片 (附件)，需开启 IMAGE_MIRROR_ENABLED
 }
 
 # ===============================================================================
@@ -258,7 +398,7 @@ FEISHU_SINKS = {
 # 任务声明（后续扩展其它渠道时在此添加）
 # type: 任务类型；目前仅支持 "xhs_user_notes"
 # sink: 使用的 FEISHU_SINKS 键名，用于写入对应表格
-# params: 渠道参数；xhs_user_notes 支持 user_urls、per_account_limit、scrolls
+# params: 渠道参数；xhs_user_notes 支持 user_urls、per_account_limit、scrolls、account_concurrency
 # ===============================================================================
 TASKS = [
     {
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+import config
+
+
+class _PooledContext:
+    """池内上下文及其使用统计。"""
+
+    def __init__(self, context: BrowserContext):
+        self.context = context
+        self.navigations = 0
+        self.uses = 0
+        self.flagged_reason: Optional[str] = None
+        self.created_at = time.time()
+
+
+class BrowserContextPool:
+    """
+    可复用的浏览器上下文池，账号之间复用同一个上下文，保留 HTTP 缓存与脚本缓存。
+
+    - acquire() 取出空闲上下文（先做健康检查），没有可用上下文时新建；
+    - release() 关闭残留页面后放回池中；导航次数达到 max_navigations、命中风控/登录页，
+      或调用方标记为不健康时回收：关闭旧上下文，并把其 storage_state（cookie/localStorage）带到下一个新上下文；
+    - 池本身不限制并发数量，并发由调用方的信号量控制，空闲上下文最多保留 max_idle 个。
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        context_kwargs: Dict,
+        *,
+        name: str = "default",
+        max_idle: Optional[int] = None,
+        max_navigations: Optional[int] = None,
+        antibot_url_markers: Iterable[str] = (),
+    ):
+        self.browser = browser
+        self.context_kwargs = dict(context_kwargs)
+        self.name = name
+        self.max_idle = max(0, int(max_idle if max_idle is not None else getattr(config, "CONTEXT_POOL_MAX_IDLE", 3)))
+        self.max_navigations = max(
+            1, int(max_navigations if max_navigations is not None else getattr(config, "CONTEXT_POOL_MAX_NAVIGATIONS", 60))
+        )
+        self.antibot_url_markers = tuple(m.lower() for m in antibot_url_markers if m)
+        # 最近一次回收时保存的会话状态，新建上下文时优先使用，避免重新读取磁盘上的旧登录文件
+        self._storage_state: Optional[Dict] = None
+        self._idle: List[_PooledContext] = []
+        self._leased: Dict[int, _PooledContext] = {}
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+
+    def _watch_page(self, entry: _PooledContext, page: Page):
+        def _on_navigated(frame):
+            try:
+                if frame != page.main_frame:
+                    return
+            except Exception:
+                return
+            entry.navigations += 1
+            url = (frame.url or "").lower()
+            if entry.flagged_reason is None:
+                for marker in self.antibot_url_markers:
+                    if marker in url:
+                        entry.flagged_reason = f"命中风控/登录页 {frame.url}"
+                        break
+
+        page.on("framenavigated", _on_navigated)
+
+    async def _new_entry(self) -> _PooledContext:
+        kwargs = dict(self.context_kwargs)
+        if self._storage_state is not None:
+            kwargs["storage_state"] = self._storage_state
+        context = await self.browser.new_context(**kwargs)
+        entry = _PooledContext(context)
+        context.on("page", lambda page: self._watch_page(entry, page))
+        self.created += 1
+        return entry
+
+    async def _is_healthy(self, entry: _PooledContext) -> bool:
+        if entry.flagged_reason or entry.navigations >= self.max_navigations:
+            return False
+        try:
+            if not self.browser.is_connected():
+                return False
+            await entry.context.cookies()
+            return True
+        except Exception:
+            return False
+
+    async def _save_state(self, entry: _PooledContext):
+        try:
+            self._storage_state = await entry.context.storage_state()
+        except Exception:
+            pass
+
+    async def _discard(self, entry: _PooledContext, reason: str):
+        # 被风控的上下文同样保留 cookie：登录态仍然有效，换一个干净的上下文即可
+        await self._save_state(entry)
+        self.recycled += 1
+        print(
+            f"[上下文池:{self.name}] 回收上下文（{reason}，已导航 {entry.navigations} 次，使用 {entry.uses} 次）"
+        )
+        try:
+            await entry.context.close()
+        except Exception:
+            pass
+
+    async def acquire(self) -> BrowserContext:
+        if self._closed:
+            raise RuntimeError(f"上下文池 {self.name} 已关闭")
+        while True:
+            async with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                entry = await self._new_entry()
+                break
+            if await self._is_healthy(entry):
+                self.reused += 1
+                break
+            await self._discard(entry, entry.flagged_reason or "健康检查未通过")
+        entry.uses += 1
+        self._leased[id(entry.context)] = entry
+        return entry.context
+
+    async def release(self, context: BrowserContext, *, healthy: bool = True):
+        entry = self._leased.pop(id(context), None)
+        if entry is None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+            return
+        # 关闭账号遗留的页面，上下文本身（缓存、cookie）保留
+        for page in list(context.pages):
+            try:
+                await page.close()
+            except Exception:
+                pass
+        if not healthy and entry.flagged_reason is None:
+            entry.flagged_reason = "调用方标记异常"
+        if self._closed or entry.flagged_reason or entry.navigations >= self.max_navigations:
+            reason = "池已关闭" if self._closed else (entry.flagged_reason or f"导航达到 {self.max_navigations} 次")
+            await self._discard(entry, reason)
+            return
+        # 放回池中的上下文仍持有最新 cookie，不必每次归还都导出 storage_state，回收时再保存
+        async with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(entry)
+                return
+        await self._discard(entry, "空闲上下文已满")
+
+    async def close(self):
+        self._closed = True
+        async with self._lock:
+            entries = list(self._idle) + list(self._leased.values())
+            self._idle.clear()
+            self._leased.clear()
+        for entry in entries:
+            try:
+                await entry.context.close()
+            except Exception:
+                pass
+        if self.created:
+            print(
+                f"[上下文池:{self.name}] 新建 {self.created} 个，复用 {self.reused} 次，回收 {self.recycled} 个"
+            )
@@ -0,0 +1,144 @@
+import sqlite3
+import time
+from typing import Iterable, List, Optional
+
+import config
+
+
+class DedupIndex:
+    """
+    本地 note_id 去重索引（SQLite），按 (app_token, table_id, note_id) 记录各 sink 已写入的内容。
+
+    - 每次写入成功后调用 add() 记录；
+    - 每个任务开始前调用 sync() 从飞书拉取增量：表中存在“最后更新时间”字段时只拉取上次同步后修改过的记录，
+      否则按 FEISHU_DEDUP_FULL_SYNC_HOURS 周期做一次仅含 note_id 列的全量同步；
+    - 去重时用 contains_many() 做本地集合查询，不再逐账号请求 records/search。
+    """
+
+    # 按修改时间增量同步时向前多取的重叠窗口（ExactDate 过滤按天比较）
+    SYNC_OVERLAP_MS = 24 * 3600 * 1000
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or getattr(config, "FEISHU_DEDUP_INDEX_PATH", "feishu_dedup_index.sqlite3")
+        self.full_sync_interval_sec = float(getattr(config, "FEISHU_DEDUP_FULL_SYNC_HOURS", 24) or 24) * 3600
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS notes (
+                app_token TEXT NOT NULL,
+                table_id TEXT NOT NULL,
+                note_id TEXT NOT NULL COLLATE NOCASE,
+                modified_ms INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (app_token, table_id, note_id)
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                app_token TEXT NOT NULL,
+                table_id TEXT NOT NULL,
+                last_sync_ms INTEGER NOT NULL DEFAULT 0,
+                last_full_sync_ms INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (app_token, table_id)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+    def add(self, app_token: str, table_id: str, note_id: str, modified_ms: Optional[int] = None):
+        self.add_many(app_token, table_id, [note_id], modified_ms=modified_ms)
+
+    def add_many(self, app_token: str, table_id: str, note_ids: Iterable[str], modified_ms: Optional[int] = None):
+        ts = int(modified_ms if modified_ms is not None else time.time() * 1000)
+        rows = [(app_token, table_id, str(nid).strip(), ts) for nid in note_ids if nid is not None and str(nid).strip()]
+        if not rows:
+            return
+        self._conn.executemany(
+            "INSERT INTO notes (app_token, table_id, note_id, modified_ms) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (app_token, table_id, note_id) DO UPDATE SET modified_ms = MAX(modified_ms, excluded.modified_ms)",
+            rows,
+        )
+        self._conn.commit()
+
+    def contains_many(self, app_token: str, table_id: str, note_ids: Iterable[str]) -> set[str]:
+        """返回 note_ids 中已存在于索引的那些（保持调用方传入的原始写法，大小写不敏感）。"""
+        wanted = {}
+        for nid in note_ids:
+            if nid is None:
+                continue
+            nid_str = str(nid).strip()
+            if nid_str:
+                wanted.setdefault(nid_str.lower(), []).append(nid_str)
+        if not wanted:
+            return set()
+        keys = list(wanted.keys())
+        found: set[str] = set()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            cur = self._conn.execute(
+                f"SELECT note_id FROM notes WHERE app_token = ? AND table_id = ? AND note_id IN ({placeholders})",
+                [app_token, table_id, *chunk],
+            )
+            for (stored,) in cur.fetchall():
+                found.update(wanted.get(str(stored).lower(), []))
+        return found
+
+    def count(self, app_token: str, table_id: str) -> int:
+        cur = self._conn.execute(
+            "SELECT COUNT(*) FROM notes WHERE app_token = ? AND table_id = ?", (app_token, table_id)
+        )
+        return int(cur.fetchone()[0])
+
+    def _get_sync_state(self, app_token: str, table_id: str) -> Optional[tuple]:
+        cur = self._conn.execute(
+            "SELECT last_sync_ms, last_full_sync_ms FROM sync_state WHERE app_token = ? AND table_id = ?",
+            (app_token, table_id),
+        )
+        return cur.fetchone()
+
+    def _set_sync_state(self, app_token: str, table_id: str, last_sync_ms: int, last_full_sync_ms: int):
+        self._conn.execute(
+            "INSERT INTO sync_state (app_token, table_id, last_sync_ms, last_full_sync_ms) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (app_token, table_id) DO UPDATE SET "
+            "last_sync_ms = excluded.last_sync_ms, last_full_sync_ms = excluded.last_full_sync_ms",
+            (app_token, table_id, last_sync_ms, last_full_sync_ms),
+        )
+        self._conn.commit()
+
+    async def sync(self, client) -> int:
+        """从飞书同步该 client 指向表格的 note_id，返回本次拉取的记录数。"""
+        app_token, table_id = client.base_app_token, client.table_id
+        state = self._get_sync_state(app_token, table_id)
+        started_ms = int(time.time() * 1000)
+        modified_field = await client.get_modified_time_field()
+
+        if state and modified_field:
+            last_sync_ms, last_full_sync_ms = state
+            since_ms = max(0, int(last_sync_ms) - self.SYNC_OVERLAP_MS)
+            rows: List[tuple] = await client.list_note_ids(modified_since_ms=since_ms, modified_field=modified_field)
+            mode = "增量"
+        elif state and started_ms - int(state[1]) < self.full_sync_interval_sec * 1000:
+            print(
+                f"[去重索引] {app_token}/{table_id} 无“最后更新时间”字段，距上次全量同步未满 "
+                f"{self.full_sync_interval_sec / 3600:.0f} 小时，使用本地索引（{self.count(app_token, table_id)} 条）"
+            )
+            return 0
+        else:
+            rows = await client.list_note_ids()
+            last_full_sync_ms = started_ms
+            mode = "全量"
+
+        for nid, modified_ms in rows:
+            self._conn.execute(
+                "INSERT INTO notes (app_token, table_id, note_id, modified_ms) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (app_token, table_id, note_id) DO UPDATE SET modified_ms = MAX(modified_ms, excluded.modified_ms)",
+                (app_token, table_id, nid, int(modified_ms or started_ms)),
+            )
+        self._conn.commit()
+        self._set_sync_state(app_token, table_id, started_ms, int(last_full_sync_ms))
+        print(f"[去重索引] {app_token}/{table_id} {mode}同步 {len(rows)} 条，本地共 {self.count(app_token, table_id)} 条")
+        return len(rows)
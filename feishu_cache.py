@@ -0,0 +1,208 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import config
+
+# 飞书接口返回的 token 无效/过期错误码
+TOKEN_INVALID_CODES = {99991661, 99991663, 99991668}
+# 写入时与表结构相关的错误：字段不存在、各类字段值转换失败（1254060～1254069）
+SCHEMA_ERROR_CODES = {1254045} | set(range(1254060, 1254070))
+
+# 缓存中的 token 剩余有效期不足该秒数时视为已过期，不再使用
+_TOKEN_MIN_REMAINING_SEC = 60
+
+
+class FeishuCache:
+    """
+    进程内共享的飞书凭证与表结构缓存（所有 FeishuClient 实例共用），可持久化到本地 JSON。
+
+    - tenant_access_token 按 app_id 缓存，过期前 FEISHU_TOKEN_REFRESH_MARGIN_SECONDS 秒由后台任务主动刷新；
+    - 字段类型按 (app_token, table_id) 缓存 FEISHU_SCHEMA_CACHE_TTL_SECONDS 秒，写入报字段类错误时失效；
+    - 同一 key 的并发请求只会触发一次接口调用，其余等待结果；
+    - 每条缓存记录来源的接口地址（FEISHU_BASE_URL），指向本地替身时取得的 token/字段不会被线上请求复用。
+
+    持久化文件保存 token 明文，FEISHU_CACHE_PATH 为空时只在内存中缓存。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = getattr(config, "FEISHU_CACHE_PATH", "feishu_cache.json") if path is None else path
+        self.schema_ttl_sec = float(getattr(config, "FEISHU_SCHEMA_CACHE_TTL_SECONDS", 6 * 3600) or 0)
+        self.refresh_margin_sec = float(getattr(config, "FEISHU_TOKEN_REFRESH_MARGIN_SECONDS", 600) or 0)
+        # {app_id: {"token": str, "expires_at": float, "endpoint": str}}
+        self._tokens: Dict[str, Dict[str, Any]] = {}
+        # {"app_token/table_id": {"types": {...}, "fetched_at": float, "endpoint": str}}
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refreshers: Dict[str, asyncio.Task] = {}
+        self._load()
+
+    # ---- 持久化 ----
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[飞书缓存] 读取 {self.path} 失败，忽略: {e}")
+            return
+        now = time.time()
+        for app_id, entry in (data.get("tokens") or {}).items():
+            if isinstance(entry, dict) and entry.get("token") and float(entry.get("expires_at") or 0) > now:
+                self._tokens[str(app_id)] = {
+                    "token": str(entry["token"]),
+                    "expires_at": float(entry["expires_at"]),
+                    "endpoint": str(entry.get("endpoint") or ""),
+                }
+        for key, entry in (data.get("schemas") or {}).items():
+            if isinstance(entry, dict) and isinstance(entry.get("types"), dict) and entry["types"]:
+                self._schemas[str(key)] = {
+                    "types": entry["types"],
+                    "fetched_at": float(entry.get("fetched_at") or 0),
+                    "endpoint": str(entry.get("endpoint") or ""),
+                }
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"tokens": self._tokens, "schemas": self._schemas}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[飞书缓存] 写入 {self.path} 失败: {e}")
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    # ---- tenant_access_token ----
+    def _valid_token(self, app_id: str, endpoint: str) -> Optional[str]:
+        entry = self._tokens.get(app_id)
+        if not entry or entry.get("endpoint") != endpoint:
+            return None
+        if time.time() >= float(entry["expires_at"]) - _TOKEN_MIN_REMAINING_SEC:
+            return None
+        return entry["token"]
+
+    async def get_token(self, app_id: str, fetch: Callable[[], Awaitable[Tuple[str, int]]], *, endpoint: str = "") -> str:
+        """返回 app_id 的 token；缓存缺失或将要过期时调用 fetch() -> (token, expire_seconds) 获取。"""
+        token = self._valid_token(app_id, endpoint)
+        if token is None:
+            async with self._lock(f"token:{app_id}"):
+                token = self._valid_token(app_id, endpoint)
+                if token is None:
+                    token = await self._refresh_token(app_id, fetch, endpoint)
+        self._schedule_refresh(app_id, fetch, endpoint)
+        return token
+
+    async def _refresh_token(self, app_id: str, fetch: Callable[[], Awaitable[Tuple[str, int]]], endpoint: str) -> str:
+        token, expire_sec = await fetch()
+        self._tokens[app_id] = {"token": token, "expires_at": time.time() + max(0, int(expire_sec)), "endpoint": endpoint}
+        self._save()
+        return token
+
+    def _schedule_refresh(self, app_id: str, fetch: Callable[[], Awaitable[Tuple[str, int]]], endpoint: str):
+        task = self._refreshers.get(app_id)
+        if self.refresh_margin_sec <= 0 or (task is not None and not task.done()):
+            return
+        self._refreshers[app_id] = asyncio.create_task(self._refresh_loop(app_id, fetch, endpoint))
+
+    async def _refresh_loop(self, app_id: str, fetch: Callable[[], Awaitable[Tuple[str, int]]], endpoint: str):
+        """在 token 过期前 refresh_margin_sec 秒主动刷新，避免写入途中临时换 token。"""
+        failures = 0
+        while True:
+            entry = self._tokens.get(app_id) or {}
+            delay = float(entry.get("expires_at") or 0) - self.refresh_margin_sec - time.time()
+            try:
+                await asyncio.sleep(max(1.0, delay) if failures == 0 else min(60.0 * failures, 300.0))
+            except asyncio.CancelledError:
+                return
+            try:
+                async with self._lock(f"token:{app_id}"):
+                    entry = self._tokens.get(app_id) or {}
+                    if (entry.get("endpoint") != endpoint
+                            or float(entry.get("expires_at") or 0) - time.time() <= self.refresh_margin_sec):
+                        await self._refresh_token(app_id, fetch, endpoint)
+                        print(f"[飞书缓存] 已提前刷新 app_id={app_id} 的 tenant_access_token")
+                failures = 0
+            except asyncio.CancelledError:
+                return
+            except Exception as e:
+                failures += 1
+                print(f"[飞书缓存] 提前刷新 tenant_access_token 失败（第 {failures} 次）: {e}")
+
+    def invalidate_token(self, app_id: str):
+        if self._tokens.pop(app_id, None) is not None:
+            self._save()
+
+    # ---- 字段类型 ----
+    @staticmethod
+    def _schema_key(app_token: str, table_id: str) -> str:
+        return f"{app_token}/{table_id}"
+
+    def _valid_schema(self, key: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        entry = self._schemas.get(key)
+        if not entry or entry.get("endpoint") != endpoint:
+            return None
+        if self.schema_ttl_sec > 0 and time.time() - float(entry["fetched_at"]) > self.schema_ttl_sec:
+            return None
+        return entry["types"]
+
+    async def get_schema(self, app_token: str, table_id: str,
+                         fetch: Callable[[], Awaitable[Dict[str, Any]]], *, endpoint: str = "") -> Dict[str, Any]:
+        """返回表的 {字段名: 类型}；缓存缺失或超过 TTL 时调用 fetch() 获取（空结果不缓存）。"""
+        key = self._schema_key(app_token, table_id)
+        types = self._valid_schema(key, endpoint)
+        if types is not None:
+            return types
+        async with self._lock(f"schema:{key}"):
+            types = self._valid_schema(key, endpoint)
+            if types is not None:
+                return types
+            types = await fetch()
+            if types:
+                self._schemas[key] = {"types": types, "fetched_at": time.time(), "endpoint": endpoint}
+                self._save()
+            return types
+
+    def invalidate_schema(self, app_token: str, table_id: str):
+        if self._schemas.pop(self._schema_key(app_token, table_id), None) is not None:
+            self._save()
+
+    async def close(self):
+        """停止后台刷新任务（在关闭网络上下文之前调用）。"""
+        tasks = [t for t in self._refreshers.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._refreshers.clear()
+        self._locks.clear()
+
+
+_feishu_cache: Optional[FeishuCache] = None
+
+
+def get_feishu_cache() -> FeishuCache:
+    """进程内共享的飞书缓存，跨任务、跨 FeishuClient 实例生效。"""
+    global _feishu_cache
+    if _feishu_cache is None:
+        _feishu_cache = FeishuCache()
+    return _feishu_cache
+
+
+def reset_feishu_cache(path: Optional[str] = None) -> FeishuCache:
+    """重建进程内缓存（如基准测试传入 "" 只用内存、不读写本地文件），返回新的实例。"""
+    global _feishu_cache
+    _feishu_cache = FeishuCache(path)
+    return _feishu_cache
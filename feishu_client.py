@@ -1,13 +1,24 @@
+import re as _re
 import time
 import asyncio
 import json as _json
 import config
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 from urllib.parse import quote
 from playwright.async_api import APIRequestContext, Error as PlaywrightError
 
+from rate_limiter import get_rate_limiter
+from feishu_cache import SCHEMA_ERROR_CODES, TOKEN_INVALID_CODES, get_feishu_cache
+import metrics
+
 class FeishuClient:
     BASE_URL = "https://open.feishu.cn/open-apis"
+    # records/batch_create 单次请求的记录上限
+    BATCH_CREATE_LIMIT = 500
+    # 字段类型：最后更新时间
+    MODIFIED_TIME_FIELD_TYPE = 1002
+    # 开放平台频率限制错误码
+    RATE_LIMIT_CODE = 99991400
 
     def __init__(self, request_context: APIRequestContext, *,
                  app_token: Optional[str] = None,
@@ -15,6 +26,7 @@ class FeishuClient:
                  field_mapping: Optional[Dict[str, Any]] = None):
         self.app_id = config.FEISHU_APP_ID
         self.app_secret = config.FEISHU_APP_SECRET
+        self.BASE_URL = (getattr(config, "FEISHU_BASE_URL", "") or self.BASE_URL).rstrip("/")
         # 允许按任务覆盖 app_token、table_id、字段映射
         self.base_app_token = app_token or config.FEISHU_BASE_APP_TOKEN
         default_table_id = getattr(config, "FEISHU_BASE_TABLE_ID", None)
@@ -36,15 +48,26 @@ class FeishuClient:
     async def _get_field_types(self) -> Dict[str, Any]:
         """获取并缓存表字段的类型映射: {显示名称: 类型}
         说明：类型返回原始值（可能是字符串或数字枚举），上层自行做兼容处理。
+        同一张表的字段类型在进程内所有实例间共享（见 feishu_cache.py）。
         """
         if self._field_types_cache:
             return self._field_types_cache
+        types = await get_feishu_cache().get_schema(
+            self.base_app_token, self.table_id, self._fetch_field_types, endpoint=self.BASE_URL
+        )
+        if types:
+            self._field_types_cache = types
+        return types
+
+    async def _fetch_field_types(self) -> Dict[str, Any]:
+        """分页请求 fields 接口，返回 {显示名称: 类型}；失败时返回已取到的部分（可能为空）。"""
         headers = await self._get_auth_headers()
         url = f"{self.BASE_URL}/bitable/v1/apps/{self.base_app_token}/tables/{self.table_id}/fields?page_size=100"
         page_token = None
         types: Dict[str, Any] = {}
         while True:
             u = url if not page_token else (url + f"&page_token={page_token}")
+            await get_rate_limiter().acquire(u)
             resp = await self.request_context.get(u, headers=headers, timeout=self.request_timeout_ms)
             try:
                 data = await resp.json()
@@ -52,6 +75,7 @@ class FeishuClient:
                 data = {}
             if not resp.ok or data.get('code') != 0:
                 # 静默失败：使用默认策略
+                self._invalidate_on_error(data)
                 break
             items = (data.get('data') or {}).get('items') or (data.get('data') or {}).get('records') or []
             for it in items:
@@ -66,10 +90,23 @@ class FeishuClient:
                     break
             else:
                 break
-        if types:
-            self._field_types_cache = types
         return types
 
+    def invalidate_field_types(self):
+        """表结构可能已变化（写入报字段类错误），丢弃本实例与共享缓存中的字段类型。"""
+        self._field_types_cache = {}
+        get_feishu_cache().invalidate_schema(self.base_app_token, self.table_id)
+
+    def _invalidate_on_error(self, data: Any):
+        """按错误码使相关缓存失效：字段类错误丢弃字段类型，token 失效丢弃 token，下次调用重新获取。"""
+        code = data.get('code') if isinstance(data, dict) else None
+        if code in SCHEMA_ERROR_CODES:
+            self.invalidate_field_types()
+        elif code in TOKEN_INVALID_CODES:
+            self._tenant_access_token = ""
+            self._token_expiry_time = 0
+            get_feishu_cache().invalidate_token(self.app_id)
+
     @staticmethod
     def _normalize_field_type(raw: Any) -> str:
         """将飞书返回的字段类型归一化为: text|number|url|attachment|date|unknown"""
@@ -119,10 +156,17 @@ class FeishuClient:
         return 0
 
     async def _get_tenant_access_token(self) -> str:
-        """获取或刷新 tenant_access_token"""
+        """获取或刷新 tenant_access_token（同一 app_id 在进程内共享，过期前由后台任务提前刷新）"""
         if self._tenant_access_token and time.time() < self._token_expiry_time:
             return self._tenant_access_token
-
+        token = await get_feishu_cache().get_token(self.app_id, self._fetch_tenant_access_token, endpoint=self.BASE_URL)
+        self._tenant_access_token = token
+        # 实例只短暂持有，之后回到共享缓存取值，以便拿到后台刷新后的 token
+        self._token_expiry_time = time.time() + 60
+        return token
+
+    async def _fetch_tenant_access_token(self) -> tuple:
+        """请求开放平台获取 tenant_access_token，返回 (token, 有效秒数)。"""
         url = f"{self.BASE_URL}/auth/v3/tenant_access_token/internal"
         payload = {"app_id": self.app_id, "app_secret": self.app_secret}
         response = await self._post_with_retry(
@@ -133,9 +177,7 @@ class FeishuClient:
         data = await response.json()
 
         if data.get("code") == 0:
-            self._tenant_access_token = data["tenant_access_token"]
-            self._token_expiry_time = time.time() + data["expire"] - 60
-            return self._tenant_access_token
+            return data["tenant_access_token"], int(data["expire"])
         else:
             raise Exception(f"获取 tenant_access_token 失败: {data.get('msg')}")
 
@@ -145,11 +187,15 @@ class FeishuClient:
         return {"Authorization": f"Bearer {token}"}
 
     async def _post_with_retry(self, url: str, *, headers: Optional[Dict[str, str]] = None,
-                               timeout_ms: Optional[int] = None, purpose: str = "POST", **kwargs):
-        """对飞书 POST 请求增加超时和重试保护。"""
+                               timeout_ms: Optional[int] = None, purpose: str = "POST",
+                               retry_errors: bool = True, **kwargs):
+        """对飞书 POST 请求增加超时和重试保护。
+        retry_errors=False 用于非幂等写入：超时/异常时服务端可能已经处理，只尝试一次直接抛出，避免重复写入；
+        频率限制的响应说明请求被拒绝，仍按退避重试。"""
         max_attempts = max(1, self.request_max_retries)
         timeout_val = timeout_ms if timeout_ms is not None else self.request_timeout_ms
         last_error: Exception | None = None
+        limiter = get_rate_limiter()
 
         for attempt in range(1, max_attempts + 1):
             try:
@@ -157,22 +203,36 @@ class FeishuClient:
                 request_kwargs["timeout"] = timeout_val if timeout_val is not None else self.request_timeout_ms
                 if headers is not None:
                     request_kwargs["headers"] = headers
-                return await self.request_context.post(url, **request_kwargs)
+                await limiter.acquire(url)
+                response = await self.request_context.post(url, **request_kwargs)
+                if await self._is_rate_limited(response):
+                    limiter.penalize(url, purpose)
+                    if attempt < max_attempts:
+                        delay = min(self.request_retry_backoff_sec * attempt, 10)
+                        print(f"[FeishuClient] {purpose} 触发频率限制，{delay}s后重试 ({attempt}/{max_attempts})")
+                        with metrics.timed("sleep"):
+                            await asyncio.sleep(delay)
+                        continue
+                else:
+                    limiter.reward(url)
+                return response
             except PlaywrightError as e:
                 last_error = e
                 is_timeout = "ETIMEDOUT" in str(e) or "Timeout" in str(e)
-                if is_timeout and attempt < max_attempts:
+                if is_timeout and retry_errors and attempt < max_attempts:
                     delay = min(self.request_retry_backoff_sec * attempt, 10)
                     print(f"[FeishuClient] {purpose} 超时，{delay}s后重试 ({attempt}/{max_attempts})")
-                    await asyncio.sleep(delay)
+                    with metrics.timed("sleep"):
+                        await asyncio.sleep(delay)
                     continue
                 raise
             except Exception as e:
                 last_error = e
-                if attempt < max_attempts:
+                if retry_errors and attempt < max_attempts:
                     delay = min(self.request_retry_backoff_sec * attempt, 10)
                     print(f"[FeishuClient] {purpose} 异常，{delay}s后重试 ({attempt}/{max_attempts}): {e}")
-                    await asyncio.sleep(delay)
+                    with metrics.timed("sleep"):
+                        await asyncio.sleep(delay)
                     continue
                 raise
 
@@ -180,14 +240,36 @@ class FeishuClient:
             raise last_error
         raise Exception(f"{purpose} 请求失败，未知错误")
 
-    async def _download_image(self, url: str) -> bytes:
-        """下载图片并返回二进制内容"""
-        response = await self.request_context.get(url, timeout=self.request_timeout_ms)
+    async def _is_rate_limited(self, response) -> bool:
+        """HTTP 429 或返回频率限制错误码时视为被限流（响应体已缓存，调用方仍可再次读取）。"""
+        if response.status == 429:
+            return True
+        if response.status not in (200, 400):
+            return False
+        try:
+            data = await response.json()
+        except Exception:
+            return False
+        return isinstance(data, dict) and data.get("code") == self.RATE_LIMIT_CODE
+
+    async def _download_image(self, url: str, *, headers: Optional[Dict[str, str]] = None,
+                              max_bytes: Optional[int] = None) -> bytes:
+        """下载图片并返回二进制内容；max_bytes 限制单张大小（按 Content-Length 预判，再按实际长度校验）"""
+        await get_rate_limiter().acquire(url)
+        response = await self.request_context.get(url, headers=headers, timeout=self.request_timeout_ms)
         if not response.ok:
             raise Exception(f"下载图片失败: {url}")
-        return await response.body()
-
-    async def _upload_image(self, image_bytes: bytes) -> str:
+        if max_bytes:
+            declared = self._to_number((response.headers or {}).get("content-length") or 0)
+            if declared > max_bytes:
+                raise Exception(f"图片过大（{declared} 字节）: {url}")
+        body = await response.body()
+        if max_bytes and len(body) > max_bytes:
+            raise Exception(f"图片过大（{len(body)} 字节）: {url}")
+        return body
+
+    async def _upload_image(self, image_bytes: bytes, *, file_name: str = "image.jpg",
+                            mime_type: str = "image/jpeg") -> str:
         """上传图片到飞书云空间，返回 file_token"""
         url = f"{self.BASE_URL}/drive/v1/medias/upload_all"
         headers = await self._get_auth_headers()
@@ -196,7 +278,7 @@ class FeishuClient:
             url,
             headers=headers,
             multipart={
-                "file": {"name": "image.jpg", "mimeType": "image/jpeg", "buffer": image_bytes},
+                "file": {"name": file_name, "mimeType": mime_type, "buffer": image_bytes},
                 "parent_type": "bitable_image",
                 "parent_node": self.base_app_token,
                 "size": str(len(image_bytes)),
@@ -209,6 +291,79 @@ class FeishuClient:
         else:
             raise Exception(f"上传图片失败: {data.get('msg')}")
 
+    @staticmethod
+    def _extract_field_texts(value: Any) -> List[str]:
+        """从 records 接口返回的单元格值中提取文本（兼容文本段数组、超链接对象与纯值）。"""
+        extracted: List[str] = []
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    cand = item.get("text") or item.get("link") or item.get("value")
+                else:
+                    cand = item
+                if cand is None:
+                    continue
+                cand_str = str(cand).strip()
+                if cand_str:
+                    extracted.append(cand_str)
+        elif isinstance(value, dict):
+            cand = value.get("text") or value.get("link") or value.get("value")
+            if cand is not None:
+                cand_str = str(cand).strip()
+                if cand_str:
+                    extracted.append(cand_str)
+        elif value is not None:
+            cand_str = str(value).strip()
+            if cand_str:
+                extracted.append(cand_str)
+        return extracted
+
+    async def get_modified_time_field(self) -> Optional[str]:
+        """返回表中“最后更新时间”类型（1002）字段的名称，用于按修改时间增量同步；不存在时返回 None。"""
+        field_types = await self._get_field_types()
+        for name, ftype in (field_types or {}).items():
+            if ftype == self.MODIFIED_TIME_FIELD_TYPE or str(ftype).lower() in ("1002", "modifiedtime", "modified_time"):
+                return name
+        return None
+
+    async def list_note_ids(self, *, modified_since_ms: Optional[int] = None,
+                            modified_field: Optional[str] = None) -> List[tuple]:
+        """分页列出表中全部 note_id（仅请求 note_id 列），返回 [(note_id, last_modified_time_ms)]。
+        传入 modified_since_ms 与 modified_field 时只返回该时间之后修改过的记录。"""
+        field_name = self.field_mapping.get("note_id")
+        if not field_name:
+            raise Exception("字段映射中缺少 note_id -> 飞书字段的配置。")
+        search_url = f"{self.BASE_URL}/bitable/v1/apps/{self.base_app_token}/tables/{self.table_id}/records/search"
+        payload: Dict[str, Any] = {"field_names": [field_name], "automatic_fields": True}
+        if modified_since_ms is not None and modified_field:
+            payload["filter"] = {
+                "conjunction": "and",
+                "conditions": [{
+                    "field_name": modified_field,
+                    "operator": "isGreater",
+                    "value": ["ExactDate", str(int(modified_since_ms))],
+                }],
+            }
+        rows: List[tuple] = []
+        page_token = None
+        while True:
+            url = f"{search_url}?page_size=500"
+            if page_token:
+                url += f"&page_token={quote(page_token)}"
+            response, data = await self._post_json(url, payload, purpose="同步记录ID")
+            if not response.ok or data.get("code") != 0:
+                raise Exception(f"同步飞书记录失败: {data.get('msg') or response.status}")
+            body = data.get("data") or {}
+            for record in body.get("items") or body.get("records") or []:
+                fields = record.get("fields") or {}
+                modified_ms = record.get("last_modified_time") or record.get("created_time") or 0
+                for nid in self._extract_field_texts(fields.get(field_name)):
+                    rows.append((nid, int(modified_ms or 0)))
+            if body.get("has_more") and body.get("page_token"):
+                page_token = body.get("page_token")
+                continue
+            return rows
+
     async def check_note_exists(self, note_id: str) -> bool:
         """检查指定 note_id 的笔记是否已存在于多维表格中"""
         filter_param = f'''CurrentValue.[{self.field_mapping["note_id"]}]="{note_id}"'''
@@ -218,6 +373,7 @@ class FeishuClient:
         print(f"[FeishuClient] 查询去重: app_token={self.base_app_token} table_id={self.table_id} note_id={note_id}")
         
         headers = await self._get_auth_headers()
+        await get_rate_limiter().acquire(url)
         response = await self.request_context.get(url, headers=headers, timeout=self.request_timeout_ms)
         data = await response.json()
 
@@ -293,34 +449,12 @@ class FeishuClient:
                 except Exception:
                     data = {}
                 if not resp.ok or data.get("code") != 0:
+                    self._invalidate_on_error(data)
                     break
                 records = (data.get("data") or {}).get("items") or (data.get("data") or {}).get("records") or []
                 for record in records:
                     fields = record.get("fields") or {}
-                    value = fields.get(field_name)
-                    extracted: List[str] = []
-                    if isinstance(value, list):
-                        for item in value:
-                            if isinstance(item, dict):
-                                cand = item.get("text") or item.get("link") or item.get("value")
-                            else:
-                                cand = item
-                            if cand is None:
-                                continue
-                            cand_str = str(cand).strip()
-                            if cand_str:
-                                extracted.append(cand_str)
-                    elif isinstance(value, dict):
-                        cand = value.get("text") or value.get("link") or value.get("value")
-                        if cand is not None:
-                            cand_str = str(cand).strip()
-                            if cand_str:
-                                extracted.append(cand_str)
-                    elif value is not None:
-                        cand_str = str(value).strip()
-                        if cand_str:
-                            extracted.append(cand_str)
-                    for cand_str in extracted:
+                    for cand_str in self._extract_field_texts(fields.get(field_name)):
                         existing_ids.add(cand_str)
                 has_more = (data.get("data") or {}).get("has_more")
                 if has_more:
@@ -331,12 +465,8 @@ class FeishuClient:
                     break
         return existing_ids
 
-    async def add_note(self, note_data: Dict[str, Any]):
-        """向多维表格中添加一条新的笔记记录"""
-        # 移除飞书相关日志输出
-
-        # 根据实际表字段类型进行写入，若获取失败则按文本/URL的默认策略
-        field_types = await self._get_field_types()
+    def _build_fields(self, note_data: Dict[str, Any], field_types: Dict[str, Any]) -> Dict[str, Any]:
+        """按字段映射与表字段类型把笔记数据转换为 bitable 的 fields 结构。"""
         fields = {}
         for key, field_name in self.field_mapping.items():
             ftype_norm = self._normalize_field_type(field_types.get(field_name)) if field_types else 'unknown'
@@ -352,6 +482,12 @@ class FeishuClient:
                         fields[field_name] = ""
                 except Exception:
                     fields[field_name] = ""
+            elif key == "image_attachments":
+                # 图片转存（image_mirror.py）得到的附件 [{"file_token": ...}]；未转存时不写该字段
+                attachments = note_data.get("image_attachments")
+                if isinstance(attachments, list) and attachments:
+                    fields[field_name] = [{"file_token": a["file_token"]} for a in attachments
+                                          if isinstance(a, dict) and a.get("file_token")]
             elif key == "post_url":
                 # 按 URL 超链接对象写入（link+text）。你的表此列为超链接类型。
                 try:
@@ -370,85 +506,57 @@ class FeishuClient:
                         fields[field_name] = str(value)
                 except Exception:
                     fields[field_name] = ""
-
-        url = f"{self.BASE_URL}/bitable/v1/apps/{self.base_app_token}/tables/{self.table_id}/records"
-        headers = await self._get_auth_headers()
-        # 明确指定 JSON 提交，避免被当作表单编码
-        headers = {**headers, "Content-Type": "application/json; charset=utf-8"}
-        payload = {"fields": fields}
-        # 移除飞书请求详情打印
-
-        # 移除飞书请求/响应打印函数
-        def _print_req(*args, **kwargs):
-            return
-        def _print_resp(*args, **kwargs):
-            return
-
-        attempt = 1
-        while True:
-            payload_str = _json.dumps(payload, ensure_ascii=False)
-            _print_req(url, headers, payload, attempt)
-            response = await self._post_with_retry(
-                url,
-                headers=headers,
-                data=payload_str,
-                timeout_ms=self.request_timeout_ms,
-                purpose="写入记录"
-            )
-            resp_text = ""
+        return fields
+
+    def _coerce_failed_field(self, fields: Dict[str, Any], note_data: Dict[str, Any], data: Any) -> bool:
+        """根据写入失败的响应修正报错字段：URL 字段转超链接对象，其余转数字。
+        返回 True 表示已修正、值得重试。"""
+        msg = (data.get('msg') if isinstance(data, dict) else "") or ""
+        err = (data.get('error') if isinstance(data, dict) else {}) or {}
+        err_msg = err.get('message', '') if isinstance(err, dict) else ''
+        code = data.get('code') if isinstance(data, dict) else None
+        m = _re.search(r"fields\.(.*?)'", err_msg or msg)
+        if not m:
+            return False
+        bad_field_display_name = m.group(1)
+        # 找到映射 key
+        bad_key = None
+        for k, v in self.field_mapping.items():
+            if v == bad_field_display_name:
+                bad_key = k
+                break
+        # URL 字段对象化重试
+        if code == 1254068 or 'URLFieldConvFail' in (msg or ''):
             try:
-                resp_text = await response.text()
+                link = (note_data.get('post_url') or '').strip()
+                text_val = (note_data.get('title') or link)
+                fields[bad_field_display_name] = {"link": link, "text": text_val}
+                return True
             except Exception:
-                resp_text = ""
-            _print_resp(response, resp_text)
+                pass
+        if bad_key and bad_key in note_data:
+            # 转数字后重试
             try:
-                data = _json.loads(resp_text) if resp_text else {}
+                fields[bad_field_display_name] = self._to_number(note_data[bad_key])
+                return True
             except Exception:
-                data = {}
-
-            if response.ok and isinstance(data, dict) and data.get('code') == 0:
-                break
-
-            # 若为数字字段格式错误，自动将报错字段转换为数字后重试（最多2次）
-            msg = (data.get('msg') if isinstance(data, dict) else "") or ""
-            err = (data.get('error') if isinstance(data, dict) else {}) or {}
-            err_msg = err.get('message', '') if isinstance(err, dict) else ''
-            code = data.get('code') if isinstance(data, dict) else None
-            import re as _re
-            m = _re.search(r"fields\.(.*?)'", err_msg or msg)
-            if attempt <= 2 and m:
-                bad_field_display_name = m.group(1)
-                # 找到映射 key
-                bad_key = None
-                for k, v in self.field_mapping.items():
-                    if v == bad_field_display_name:
-                        bad_key = k
-                        break
-                # URL 字段对象化重试
-                if code == 1254068 or 'URLFieldConvFail' in (msg or ''):
-                    try:
-                        link = (note_data.get('post_url') or '').strip()
-                        text_val = (note_data.get('title') or link)
-                        payload['fields'][bad_field_display_name] = {"link": link, "text": text_val}
-                        attempt += 1
-                        continue
-                    except Exception:
-                        pass
-                if bad_key and bad_key in note_data:
-                    # 转数字后重试
-                    try:
-                        num_val = self._to_number(note_data[bad_key])
-                        payload['fields'][bad_field_display_name] = num_val
-                        attempt += 1
-                        continue
-                    except Exception:
-                        pass
-
-            # 其它错误，抛出
-            error_message = (data.get('msg') if isinstance(data, dict) else None) or '未知错误'
-            raise Exception(f"添加飞书记录失败: {error_message}")
+                pass
+        return False
 
-        # 解析响应 JSON
+    async def _post_json(self, url: str, payload: Dict[str, Any], *, purpose: str,
+                         retry_errors: bool = True):
+        """提交 JSON 并解析响应，返回 (response, data)。retry_errors 含义同 _post_with_retry。"""
+        headers = await self._get_auth_headers()
+        # 明确指定 JSON 提交，避免被当作表单编码
+        headers = {**headers, "Content-Type": "application/json; charset=utf-8"}
+        response = await self._post_with_retry(
+            url,
+            headers=headers,
+            data=_json.dumps(payload, ensure_ascii=False),
+            timeout_ms=self.request_timeout_ms,
+            purpose=purpose,
+            retry_errors=retry_errors
+        )
         resp_text = ""
         try:
             resp_text = await response.text()
@@ -458,8 +566,212 @@ class FeishuClient:
             data = _json.loads(resp_text) if resp_text else {}
         except Exception:
             data = {}
+        self._invalidate_on_error(data)
+        return response, data
 
-        if (not response.ok) or data.get('code') != 0:
+    async def _create_record(self, fields: Dict[str, Any], note_data: Dict[str, Any]) -> Dict[str, Any]:
+        """写入单条记录；数字/URL 字段格式错误时修正后重试（最多2次）。返回飞书记录对象。"""
+        url = f"{self.BASE_URL}/bitable/v1/apps/{self.base_app_token}/tables/{self.table_id}/records"
+        payload = {"fields": fields}
+        attempt = 1
+        while True:
+            response, data = await self._post_json(url, payload, purpose="写入记录", retry_errors=False)
+            if response.ok and isinstance(data, dict) and data.get('code') == 0:
+                return (data.get('data') or {}).get('record') or {}
+            if attempt <= 2 and self._coerce_failed_field(payload['fields'], note_data, data):
+                attempt += 1
+                continue
+            # 其它错误，抛出
             error_message = (data.get('msg') if isinstance(data, dict) else None) or '未知错误'
             raise Exception(f"添加飞书记录失败: {error_message}")
-        # 成功不打印日志
+
+    async def add_note(self, note_data: Dict[str, Any]):
+        """向多维表格中添加一条新的笔记记录"""
+        # 根据实际表字段类型进行写入，若获取失败则按文本/URL的默认策略
+        field_types = await self._get_field_types()
+        fields = self._build_fields(note_data, field_types)
+        await self._create_record(fields, note_data)
+
+    async def add_notes_batch(self, notes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量写入多条笔记（records/batch_create，每次最多 BATCH_CREATE_LIMIT 条）。
+        返回与输入顺序一致的结果列表：{"note_id", "ok", "record_id", "error"}。
+        整批返回字段相关错误码（SCHEMA_ERROR_CODES）时先按报错字段修正后重试，仍失败则逐条写入以定位具体失败的记录；
+        其它错误码（频率限制、权限、token 失效等）对每条记录都一样，整批标记失败，不逐条重试；
+        批量写入只请求一次：请求异常（超时、连接断开）或响应不带错误码时服务端可能已写入，同样整批标记失败，
+        不重发也不逐条补写，交由发件箱/去重后重试。"""
+        if not notes:
+            return []
+        field_types = await self._get_field_types()
+        url = f"{self.BASE_URL}/bitable/v1/apps/{self.base_app_token}/tables/{self.table_id}/records/batch_create"
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(notes), self.BATCH_CREATE_LIMIT):
+            chunk = notes[start:start + self.BATCH_CREATE_LIMIT]
+            records = [{"fields": self._build_fields(n, field_types)} for n in chunk]
+            created: Optional[List[Dict[str, Any]]] = None
+            error_message = ""
+            transport_error = False
+            schema_error = False
+            attempt = 1
+            while True:
+                try:
+                    response, data = await self._post_json(url, {"records": records}, purpose="批量写入记录",
+                                                           retry_errors=False)
+                except Exception as e:
+                    error_message = str(e)
+                    transport_error = True
+                    break
+                if response.ok and isinstance(data, dict) and data.get('code') == 0:
+                    created = (data.get('data') or {}).get('records') or []
+                    break
+                if not (isinstance(data, dict) and data.get('code')):
+                    # 没有业务错误码（如网关 5xx）同样无法确定服务端是否已写入
+                    error_message = f"HTTP {response.status}，响应无错误码"
+                    transport_error = True
+                    break
+                error_message = data.get('msg') or '未知错误'
+                schema_error = data.get('code') in SCHEMA_ERROR_CODES
+                if not schema_error:
+                    break
+                # 字段类型不匹配对整批生效：逐条修正同一字段后整批重试
+                if attempt <= 2:
+                    fixed = False
+                    for rec, note in zip(records, chunk):
+                        fixed = self._coerce_failed_field(rec["fields"], note, data) or fixed
+                    if fixed:
+                        attempt += 1
+                        continue
+                break
+
+            if created is not None:
+                for idx, note in enumerate(chunk):
+                    record = created[idx] if idx < len(created) and isinstance(created[idx], dict) else {}
+                    results.append({
+                        "note_id": note.get("note_id"),
+                        "ok": True,
+                        "record_id": record.get("record_id"),
+                        "error": None,
+                    })
+                continue
+
+            if transport_error:
+                print(f"[FeishuClient] 批量写入 {len(chunk)} 条请求异常（{error_message}），结果未知，整批标记失败以免重复写入")
+                results.extend(
+                    {"note_id": note.get("note_id"), "ok": False, "record_id": None, "error": error_message}
+                    for note in chunk
+                )
+                continue
+
+            if not schema_error:
+                print(f"[FeishuClient] 批量写入 {len(chunk)} 条失败（{error_message}），整批标记失败")
+                results.extend(
+                    {"note_id": note.get("note_id"), "ok": False, "record_id": None, "error": error_message}
+                    for note in chunk
+                )
+                continue
+
+            print(f"[FeishuClient] 批量写入 {len(chunk)} 条失败（{error_message}），改为逐条写入定位失败记录")
+            for rec, note in zip(records, chunk):
+                try:
+                    record = await self._create_record(rec["fields"], note)
+                    results.append({
+                        "note_id": note.get("note_id"),
+                        "ok": True,
+                        "record_id": record.get("record_id"),
+                        "error": None,
+                    })
+                except Exception as e:
+                    results.append({
+                        "note_id": note.get("note_id"),
+                        "ok": False,
+                        "record_id": None,
+                        "error": str(e),
+                    })
+        return results
+
+
+class FeishuBatchWriter:
+    """按 sink 缓冲待写入的笔记，达到条数阈值或等待超过时间阈值时通过 add_notes_batch 批量写入。
+    每条记录可附带回调 on_result(result)，在真正写入（成功或失败）后被调用。
+    传入 image_mirror 时，写入前先把整批笔记的图片并发转存为附件（见 image_mirror.py）。"""
+
+    def __init__(self, client: FeishuClient, *,
+                 batch_size: Optional[int] = None,
+                 flush_interval_sec: Optional[float] = None,
+                 name: str = "",
+                 image_mirror=None):
+        self.client = client
+        self.name = name
+        self.image_mirror = image_mirror
+        size = batch_size or int(getattr(config, "FEISHU_BATCH_SIZE", 50) or 50)
+        self.batch_size = max(1, min(FeishuClient.BATCH_CREATE_LIMIT, int(size)))
+        interval = flush_interval_sec
+        if interval is None:
+            interval = float(getattr(config, "FEISHU_BATCH_FLUSH_INTERVAL_SECONDS", 30) or 30)
+        self.flush_interval_sec = max(0.0, float(interval))
+        self._buffer: List[tuple] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self.written = 0
+        self.failed = 0
+
+    async def add(self, note_data: Dict[str, Any], on_result: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self._buffer.append((note_data, on_result))
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_after_interval())
+
+    async def _flush_after_interval(self):
+        try:
+            await asyncio.sleep(self.flush_interval_sec)
+        except asyncio.CancelledError:
+            return
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"[FeishuBatchWriter] sink={self.name} 定时写入失败: {e}")
+
+    async def flush(self) -> List[Dict[str, Any]]:
+        """立即写入当前缓冲区中的全部记录。"""
+        timer = self._timer
+        if timer is not None and timer is not asyncio.current_task() and not timer.done():
+            timer.cancel()
+        self._timer = None
+        async with self._lock:
+            if not self._buffer:
+                return []
+            pending, self._buffer = self._buffer, []
+            notes = [n for n, _ in pending]
+            if self.image_mirror is not None:
+                try:
+                    with metrics.timed("image_mirror", platform="feishu", account=self.name):
+                        await self.image_mirror.attach_all(notes)
+                except Exception as e:
+                    # 转存失败不影响写入，图片链接仍写入文本字段
+                    print(f"[图片转存] sink={self.name} 转存失败: {e}")
+            try:
+                # 刷新可能发生在任意账号的协程中，写入耗时统一记在 sink 名下
+                with metrics.timed("feishu_write", platform="feishu", account=self.name):
+                    results = await self.client.add_notes_batch(notes)
+            except Exception as e:
+                results = [
+                    {"note_id": n.get("note_id"), "ok": False, "record_id": None, "error": str(e)}
+                    for n in notes
+                ]
+            ok_count = 0
+            for (_, callback), result in zip(pending, results):
+                if result.get("ok"):
+                    ok_count += 1
+                if callback is not None:
+                    try:
+                        callback(result)
+                    except Exception as e:
+                        print(f"[FeishuBatchWriter] 回调异常: {e}")
+            self.written += ok_count
+            self.failed += len(results) - ok_count
+            print(f"[FeishuBatchWriter] sink={self.name} 批量写入 {len(results)} 条：成功 {ok_count}，失败 {len(results) - ok_count}")
+            return results
+
+    async def close(self):
+        """写入剩余缓冲并停止定时器。"""
+        await self.flush()
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import config
+
+
+def _sniff_image_type(data: bytes) -> tuple:
+    """按文件头判断图片格式，返回 (扩展名, MIME)；无法识别时按 jpeg 处理。"""
+    if data[:3] == b"\xff\xd8\xff":
+        return "jpg", "image/jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png", "image/png"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif", "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp", "image/webp"
+    return "jpg", "image/jpeg"
+
+
+class ImageTokenCache:
+    """
+    图片内容哈希 -> 飞书 file_token 的本地缓存（SQLite），按 app_token 区分（素材挂在多维表格下）。
+    同一张图片（不同 CDN 地址、重复转发）只上传一次。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or getattr(config, "IMAGE_MIRROR_CACHE_PATH", "feishu_image_tokens.sqlite3")
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS image_tokens (
+                app_token TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                file_token TEXT NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0,
+                created_ms INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (app_token, sha256)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+    def get(self, app_token: str, sha256: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT file_token FROM image_tokens WHERE app_token = ? AND sha256 = ?", (app_token, sha256)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, app_token: str, sha256: str, file_token: str, size: int = 0):
+        self._conn.execute(
+            "INSERT INTO image_tokens (app_token, sha256, file_token, size, created_ms) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (app_token, sha256) DO UPDATE SET file_token = excluded.file_token, "
+            "size = excluded.size, created_ms = excluded.created_ms",
+            (app_token, sha256, file_token, int(size), int(time.time() * 1000)),
+        )
+        self._conn.commit()
+
+
+class ImageMirror:
+    """
+    把笔记图片转存到飞书（bitable_image），写入字段映射中的 image_attachments 附件字段，避免 CDN 链接过期后图片失效。
+
+    - 每个 sink 一个实例：下载与上传共用 concurrency 个并发名额，本次运行累计下载超过 max_bytes 后不再转存（仍写入图片链接）；
+    - 下载复用飞书客户端的 APIRequestContext（连接池），按 IMAGE_MIRROR_REFERERS 附带图床要求的 Referer；
+    - 按内容 sha256 去重：命中 ImageTokenCache 或同批次正在上传的相同图片时不再上传。
+    """
+
+    def __init__(self, client, *, name: str = "", cache: Optional[ImageTokenCache] = None,
+                 concurrency: Optional[int] = None, max_bytes: Optional[int] = None,
+                 max_image_bytes: Optional[int] = None):
+        self.client = client
+        self.name = name
+        self.cache = cache
+        conc = concurrency or int(getattr(config, "IMAGE_MIRROR_CONCURRENCY", 4) or 4)
+        self._sem = asyncio.Semaphore(max(1, int(conc)))
+        budget = max_bytes if max_bytes is not None else getattr(config, "IMAGE_MIRROR_MAX_BYTES_PER_RUN", 0)
+        self.max_bytes = max(0, int(budget or 0))
+        per_image = max_image_bytes or getattr(config, "IMAGE_MIRROR_MAX_IMAGE_BYTES", 20 * 1024 * 1024)
+        self.max_image_bytes = max(1, int(per_image))
+        self.referers: Dict[str, str] = dict(getattr(config, "IMAGE_MIRROR_REFERERS", {}) or {})
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._budget_warned = False
+        self.stats = {"downloaded": 0, "bytes": 0, "uploaded": 0, "cache_hits": 0, "failed": 0, "skipped_budget": 0}
+
+    @classmethod
+    def for_sink(cls, client, sink_key: str, sink_conf: Dict[str, Any],
+                 cache: Optional[ImageTokenCache] = None) -> "ImageMirror":
+        """按 sink 配置中的 image_mirror（concurrency / max_bytes / max_image_bytes）覆盖全局默认值。"""
+        overrides = sink_conf.get("image_mirror") or {}
+        return cls(
+            client,
+            name=sink_key,
+            cache=cache,
+            concurrency=overrides.get("concurrency"),
+            max_bytes=overrides.get("max_bytes"),
+            max_image_bytes=overrides.get("max_image_bytes"),
+        )
+
+    def budget_exhausted(self) -> bool:
+        return bool(self.max_bytes) and self.stats["bytes"] >= self.max_bytes
+
+    def _headers_for(self, url: str) -> Optional[Dict[str, str]]:
+        host = (urlparse(url).hostname or "").lower()
+        for domain, referer in self.referers.items():
+            if host == domain or host.endswith("." + domain):
+                return {"Referer": referer}
+        return None
+
+    async def _upload_once(self, digest: str, data: bytes) -> str:
+        app_token = self.client.base_app_token
+        if self.cache is not None:
+            token = self.cache.get(app_token, digest)
+            if token:
+                self.stats["cache_hits"] += 1
+                return token
+        ext, mime = _sniff_image_type(data)
+        token = await self.client._upload_image(data, file_name=f"{digest[:16]}.{ext}", mime_type=mime)
+        self.stats["uploaded"] += 1
+        if self.cache is not None:
+            self.cache.put(app_token, digest, token, len(data))
+        return token
+
+    async def _mirror_one(self, url: str) -> Optional[str]:
+        async with self._sem:
+            if self.budget_exhausted():
+                self.stats["skipped_budget"] += 1
+                if not self._budget_warned:
+                    self._budget_warned = True
+                    print(f"[图片转存] sink={self.name} 已达本次下载上限 {self.max_bytes / 1024 / 1024:.1f}MB，后续只写入图片链接")
+                return None
+            try:
+                data = await self.client._download_image(url, headers=self._headers_for(url), max_bytes=self.max_image_bytes)
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"[图片转存] sink={self.name} 下载失败 {url}: {e}")
+                return None
+            self.stats["downloaded"] += 1
+            self.stats["bytes"] += len(data)
+            digest = hashlib.sha256(data).hexdigest()
+            # 同一张图片正在被其它协程上传时等待其结果
+            pending = self._inflight.get(digest)
+            if pending is not None:
+                self.stats["cache_hits"] += 1
+                return await asyncio.shield(pending)
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[digest] = future
+            try:
+                token = await self._upload_once(digest, data)
+                future.set_result(token)
+                return token
+            except Exception as e:
+                self.stats["failed"] += 1
+                future.set_result(None)
+                print(f"[图片转存] sink={self.name} 上传失败 {url}: {e}")
+                return None
+            finally:
+                self._inflight.pop(digest, None)
+
+    async def mirror(self, urls: Iterable[str]) -> List[Dict[str, str]]:
+        """转存一组图片，返回按原顺序排列的附件值 [{"file_token": ...}]（失败/跳过的图片不包含在内）。"""
+        valid = [u for u in urls if isinstance(u, str) and u.startswith(("http://", "https://"))]
+        if not valid:
+            return []
+        tokens = await asyncio.gather(*(self._mirror_one(u) for u in valid))
+        return [{"file_token": t} for t in tokens if t]
+
+    async def attach_all(self, notes: List[Dict[str, Any]]):
+        """为一批笔记并发转存图片，结果写入各自的 image_attachments；已有附件的笔记（如续跑复用的详情）跳过。"""
+        pending = [n for n in notes if n.get("images") and not n.get("image_attachments")]
+        if not pending:
+            return
+
+        async def _one(note):
+            images = note.get("images")
+            attachments = await self.mirror(images if isinstance(images, list) else [images])
+            if attachments:
+                note["image_attachments"] = attachments
+
+        await asyncio.gather(*(_one(n) for n in pending))
+
+    def format_stats(self) -> str:
+        s = self.stats
+        if not (s["downloaded"] or s["failed"] or s["skipped_budget"]):
+            return ""
+        return (
+            f"[图片转存] sink={self.name}: 下载 {s['downloaded']} 张 {s['bytes'] / 1024 / 1024:.1f}MB，"
+            f"上传 {s['uploaded']} 张，内容去重 {s['cache_hits']} 张，失败 {s['failed']} 张，超出预算跳过 {s['skipped_budget']} 张"
+        )
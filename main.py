@@ -1,133 +1,71 @@
+import argparse
 import asyncio
+import functools
 import os
-import random
-import re
-from datetime import datetime, timedelta
+import signal
+from contextlib import asynccontextmanager
 from typing import List, Dict
 from playwright.async_api import async_playwright, APIRequestContext
 
 import config
 from xhs_scraper import XhsScraper
-from feishu_client import FeishuClient
+from feishu_client import FeishuClient, FeishuBatchWriter
+from feishu_cache import get_feishu_cache
+from dedup_index import DedupIndex
+from image_mirror import ImageMirror, ImageTokenCache
+from outbox import Outbox, OutboxFlusher
+from pipeline import Pipeline, Stage, StopPipeline
+import watermark
+from watermark import WatermarkStore
+from run_journal import RunJournal
+from context_pool import BrowserContextPool
+from routing import format_routing_stats
+from rate_limiter import get_rate_limiter
+import time_parser
+import metrics
 from scrapers.wechat.scraper import WeChatArticleScraper
 from scrapers.weibo.scraper import WeiboHomeScraper
 
 CONTENT_VALID_WINDOW_DAYS = int(getattr(config, "WITHIN_LAST_DAYS", 10) or 10)
 
+# 任务类型 -> 目标站点，用于按站点限制并发（见 config.DOMAIN_MAX_INFLIGHT）
+TASK_TYPE_DOMAINS = {
+    'xhs_user_notes': 'xiaohongshu.com',
+    'xhs_home': 'xiaohongshu.com',
+    'weibo_home': 'weibo.com',
+}
+
+# 任务类型 -> 指标中的平台标签
+TASK_TYPE_PLATFORMS = {
+    'xhs_user_notes': 'xhs',
+    'xhs_home': 'xhs',
+    'weibo_home': 'weibo',
+    'wechat_articles': 'wechat',
+}
+
 
 def _format_age_days(age_days):
     return "未知" if age_days is None else f"{age_days:.2f}"
 
 
-def _is_within_last_days(post_time: str, window_days: int, *, return_age: bool = False):
-    """判断给定的发布日期是否在最近 window_days 天内。"""
-    if not post_time:
-        return (False, None) if return_age else False
-    text = str(post_time).strip()
-    if not text:
+def _is_within_last_days(post_time: str, window_days: int, *, return_age: bool = False, post_timestamp=None):
+    """判断发布时间是否在最近 window_days 天内；优先使用抓取时已解析好的 post_timestamp，缺失时再解析 post_time 文本。"""
+    if post_timestamp is None:
+        post_timestamp = time_parser.to_timestamp(time_parser.parse_post_time(post_time))
+    if post_timestamp is None:
         return (False, None) if return_age else False
-
-    now = datetime.now()
-
-    def _wrap(result: bool, dt=None, age_days=None):
-        if return_age:
-            if age_days is None and dt is not None:
-                age_days = (now - dt).total_seconds() / 86400
-            return result, age_days
-        return result
-
-    relative_match = re.match(r"^\s*(\d+)\s*(秒钟?|分钟|小时)前\s*$", text)
-    if relative_match:
-        n = int(relative_match.group(1))
-        unit = relative_match.group(2)
-        if "秒" in unit:
-            delta = timedelta(seconds=n)
-        elif "小时" in unit:
-            delta = timedelta(hours=n)
-        else:
-            delta = timedelta(minutes=n)
-        return _wrap(True, now - delta)
-
-    # 情况1：相对时间（分钟/小时内）视为近30天
-    if any(keyword in text for keyword in ("刚刚", "秒前", "分钟前", "小时内", "小时前")):
-        return _wrap(True, now)
-
-    # 情况2：昨天/今天/前天 -> 视为近30天
-    if any(keyword in text for keyword in ("昨天", "今日", "今天", "前天")):
-        if "前天" in text:
-            dt = now - timedelta(days=2)
-        elif "昨天" in text:
-            dt = now - timedelta(days=1)
-        else:
-            dt = now
-        return _wrap(True, dt)
-
-    # 情况3：匹配 mm-dd 或 mm-dd HH:mm
-    mmdd_match = re.match(
-        r"^\s*(\d{1,2})[-/.月](\d{1,2})(?:\s+(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?\s*$",
-        text,
-    )
-    if mmdd_match:
-        month = int(mmdd_match.group(1))
-        day = int(mmdd_match.group(2))
-        hour = int(mmdd_match.group(3) or 0)
-        minute = int(mmdd_match.group(4) or 0)
-        second = int(mmdd_match.group(5) or 0)
-        year = now.year
-        try:
-            dt = datetime(year, month, day, hour, minute, second)
-        except ValueError:
-            return _wrap(False)
-        # 处理跨年：如果日期在未来太多，视作上一年
-        if dt > now + timedelta(days=1):
-            try:
-                dt = dt.replace(year=year - 1)
-            except ValueError:
-                return _wrap(False)
-        if dt > now:
-            return _wrap(True, dt)
-        return _wrap(dt >= now - timedelta(days=window_days), dt)
-
-    # 情况4：匹配 yyyy-mm-dd 或 yyyy-mm-dd HH:mm
-    ymd_match = re.match(
-        r"^\s*(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})(?:\s+(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?\s*$",
-        text,
-    )
-    if ymd_match:
-        year = int(ymd_match.group(1))
-        month = int(ymd_match.group(2))
-        day = int(ymd_match.group(3))
-        hour = int(ymd_match.group(4) or 0)
-        minute = int(ymd_match.group(5) or 0)
-        second = int(ymd_match.group(6) or 0)
-        try:
-            dt = datetime(year, month, day, hour, minute, second)
-        except ValueError:
-            return _wrap(False)
-        if dt > now:
-            return _wrap(True, dt)
-        return _wrap(dt >= now - timedelta(days=window_days), dt)
-
-    # 情况5：尝试标准格式解析
-    parse_formats = ["%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S"]
-    for fmt in parse_formats:
-        try:
-            parsed = datetime.strptime(text, fmt)
-            if parsed > now:
-                return _wrap(True, parsed)
-            return _wrap(parsed >= now - timedelta(days=window_days), parsed)
-        except ValueError:
-            continue
-
-    return _wrap(False)
+    age = time_parser.age_days(post_timestamp)
+    # 未来时间（时钟偏差）视为最新
+    result = age <= window_days
+    return (result, age) if return_age else result
 
 
 def _is_within_last_month(post_time: str) -> bool:
     """保留兼容函数，使用统一配置的内容有效期窗口。"""
     return _is_within_last_days(post_time, CONTENT_VALID_WINDOW_DAYS)
 
-async def main():
-    """主函数，编排整个爬取和写入流程"""
+async def main(resume: bool = False):
+    """主函数，编排整个爬取和写入流程；resume=True 时从运行日志记录的进度继续"""
     print("====== 开始执行抓取任务 ======")
 
     async with async_playwright() as p:
@@ -207,39 +145,108 @@ async def main():
             )
 
         context = await browser.new_context(**context_kwargs)
-        weibo_context = await browser.new_context(**weibo_context_kwargs) if has_weibo_tasks else context
-        
-        scraper = XhsScraper(context)
+
+        scraper = XhsScraper(context, routing_profile=getattr(config, 'XHS_ROUTING_PROFILE', None))
         wechat_scraper = WeChatArticleScraper(context)
-        weibo_scraper = WeiboHomeScraper(weibo_context)
 
-        async def fetch_xhs_user_notes(user_url: str, max_notes: int, scrolls: int) -> List[Dict]:
-            temp_context = await browser.new_context(**xhs_context_kwargs)
-            temp_scraper = XhsScraper(temp_context)
-            try:
-                return await temp_scraper.scrape_user_notes(user_url, max_notes=max_notes, scrolls=scrolls)
-            finally:
-                await temp_scraper.close()
-                await temp_context.close()
+        # 账号使用的上下文从池中借出，账号之间复用，避免每个账号重新创建上下文、重新加载登录文件
+        antibot_markers = getattr(config, 'CONTEXT_POOL_ANTIBOT_URL_MARKERS', {}) or {}
+        xhs_context_pool = BrowserContextPool(
+            browser, xhs_context_kwargs, name="xhs", antibot_url_markers=antibot_markers.get("xhs", ())
+        )
+        weibo_context_pool = BrowserContextPool(
+            browser, weibo_context_kwargs, name="weibo", antibot_url_markers=antibot_markers.get("weibo", ())
+        )
 
+        # 按站点限制同时在途的页面/接口操作数（跨账号、跨任务全局生效），保持对目标站点的礼貌
+        domain_limits = getattr(config, 'DOMAIN_MAX_INFLIGHT', {}) or {}
+        domain_semaphores = {domain: asyncio.Semaphore(max(1, int(n))) for domain, n in domain_limits.items()}
+
+        @asynccontextmanager
+        async def domain_slot(task_type: str):
+            sem = domain_semaphores.get(TASK_TYPE_DOMAINS.get(task_type, ""))
+            if sem is None:
+                yield
+                return
+            async with sem:
+                yield
+
+        run_journal = None
+        run_completed = False
         try:
             summary_counts = {}
-            xhs_login_checked = False
-            for task in tasks:
+            task_writers: List = []
+            dedup_index = None
+            if getattr(config, "FEISHU_DEDUP_MODE", "local") == "local":
+                try:
+                    dedup_index = DedupIndex()
+                except Exception as e:
+                    print(f"[去重索引] 打开本地索引失败，改为查询飞书去重: {e}")
+            watermark_store = None
+            if getattr(config, "WATERMARK_ENABLED", True):
+                try:
+                    watermark_store = WatermarkStore()
+                except Exception as e:
+                    print(f"[水位线] 打开水位线存储失败，本次从头列出各账号: {e}")
+            if getattr(config, "RUN_JOURNAL_ENABLED", True):
+                try:
+                    run_journal = RunJournal(resume=resume)
+                except Exception as e:
+                    print(f"[运行日志] 打开运行日志失败，本次不记录进度: {e}")
+            elif resume:
+                print("[运行日志] RUN_JOURNAL_ENABLED 已关闭，无法续跑，本次从头开始。")
+            # 图片转存：按 sink 共享并发名额与下载预算，多个任务写同一个 sink 时共用
+            image_token_cache = None
+            image_mirrors: Dict[str, ImageMirror] = {}
+            if getattr(config, "IMAGE_MIRROR_ENABLED", False):
+                try:
+                    image_token_cache = ImageTokenCache()
+                except Exception as e:
+                    print(f"[图片转存] 打开图片缓存失败，本次不做内容去重: {e}")
+            # 发件箱：抓取结果先落盘，由后台协程批量写入飞书，飞书变慢或报错不阻塞抓取；启动时先写入上次遗留的记录
+            outbox_flusher = None
+            if getattr(config, "OUTBOX_ENABLED", True):
+                try:
+                    outbox_flusher = OutboxFlusher(Outbox(), request_context, dedup_index=dedup_index)
+                    outbox_flusher.start()
+                except Exception as e:
+                    print(f"[发件箱] 打开发件箱失败，本次直接写入飞书: {e}")
+
+            # cron 等发送 SIGTERM 时先落盘运行日志，再取消主任务，finally 中写入缓冲里剩余的记录
+            main_task = asyncio.current_task()
+
+            def _on_sigterm():
+                print("收到 SIGTERM，保存运行日志并停止，之后可使用 --resume 继续。")
+                if run_journal is not None:
+                    run_journal.flush()
+                main_task.cancel()
+
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, _on_sigterm)
+            except (NotImplementedError, RuntimeError):
+                # Windows 事件循环不支持信号处理
+                pass
+            # 任务并发执行前统一检查一次小红书登录状态
+            if any(task.get('type') in xhs_task_types for task in tasks):
+                try:
+                    if not await scraper.check_login_status():
+                        print("错误：小红书登录状态已失效。")
+                        print("请重新运行 python login_helper.py 更新会话文件。")
+                        return
+                except Exception as e:
+                    print(f"检查小红书登录状态时出错: {e}")
+                    return
+
+            async def run_task(task: Dict, task_key: str) -> Dict[str, int]:
+                """执行单个任务，返回该任务内各账号的写入条数。task_key 用于在运行日志中标识任务。"""
+                task_summary: Dict[str, int] = {}
                 t_type = task.get('type')
                 if t_type not in supported_types:
                     print(f"跳过不支持的任务类型: {t_type}")
-                    continue
-                if t_type in xhs_task_types and not xhs_login_checked:
-                    try:
-                        if not await scraper.check_login_status():
-                            print("错误：小红书登录状态已失效。")
-                            print("请重新运行 python login_helper.py 更新会话文件。")
-                            return
-                        xhs_login_checked = True
-                    except Exception as e:
-                        print(f"检查小红书登录状态时出错: {e}")
-                        return
+                    return task_summary
+                if run_journal is not None and run_journal.task_done(task_key):
+                    print(f"[运行日志] 任务 {task_key} 已在上次运行中完成，跳过。")
+                    return task_summary
 
                 sink_key = task.get('sink') or 'xhs_default'
                 sink_conf = config.FEISHU_SINKS.get(sink_key, {})
@@ -253,12 +260,49 @@ async def main():
                     )
                 except Exception as e:
                     print(f"初始化飞书客户端失败: {e}")
-                    continue
+                    return task_summary
+                image_mirror = None
+                if getattr(config, "IMAGE_MIRROR_ENABLED", False) and "image_attachments" in feishu_for_task.field_mapping:
+                    image_mirror = image_mirrors.get(sink_key)
+                    if image_mirror is None:
+                        image_mirror = image_mirrors[sink_key] = ImageMirror.for_sink(
+                            feishu_for_task, sink_key, sink_conf, cache=image_token_cache
+                        )
+                # 写入先进入缓冲（启用发件箱时先落盘到发件箱），按条数/时间阈值通过 batch_create 批量提交
+                if outbox_flusher is not None:
+                    outbox_flusher.add_sink(sink_key, feishu_for_task, image_mirror=image_mirror)
+                    writer = outbox_flusher.writer(sink_key, task=task_key)
+                else:
+                    writer = FeishuBatchWriter(feishu_for_task, name=sink_key, image_mirror=image_mirror)
+                task_writers.append(writer)
+
+                # 本地去重索引：任务开始前做一次增量同步，失败时该任务回退为逐账号查询飞书
+                task_index_ready = False
+                if dedup_index is not None:
+                    try:
+                        await dedup_index.sync(feishu_for_task)
+                        task_index_ready = True
+                    except Exception as e:
+                        print(f"[去重索引] sink={sink_key} 同步失败，改为查询飞书去重: {e}")
 
                 params = task.get('params', {})
                 urls = params.get('urls') or params.get('user_urls') or []
                 per_account_limit = int(params.get('per_account_limit') or 10)
                 scrolls = int(params.get('scrolls') or 1)
+                # 小红书主页按目标数量滚动，scrolls 与 XHS_MAX_SCROLLS 中较大者作为滚动上限
+                xhs_scroll_cap = max(scrolls, int(getattr(config, 'XHS_MAX_SCROLLS', 20) or 1))
+                xhs_list_engine = params.get('list_engine') or getattr(config, 'XHS_LIST_ENGINE', 'network')
+                xhs_detail_engine = params.get('detail_engine') or getattr(config, 'XHS_DETAIL_ENGINE', 'state')
+                weibo_list_engine = params.get('list_engine') or getattr(config, 'WEIBO_LIST_ENGINE', 'api')
+                weibo_detail_engine = params.get('detail_engine') or getattr(config, 'WEIBO_DETAIL_ENGINE', 'api')
+                xhs_routing_profile = params.get('routing_profile') or getattr(config, 'XHS_ROUTING_PROFILE', 'default')
+                weibo_routing_profile = params.get('routing_profile') or getattr(config, 'WEIBO_ROUTING_PROFILE', 'default')
+                # 增量水位线：单个任务可通过 params.incremental=False 关闭，每次从头列出
+                use_watermark = watermark_store is not None and params.get('incremental', True) is not False
+                # 处理完整的账号待推进的水位线；任务结束、批量写入全部完成后再落盘
+                pending_watermarks: Dict[str, Dict] = {}
+                write_failed_accounts: set = set()
+                completed_accounts: List[str] = []
 
                 if t_type in ('xhs_user_notes', 'xhs_home'):
                     note_id_key = 'note_id'
@@ -267,35 +311,83 @@ async def main():
                 else:
                     note_id_key = 'note_id'
 
-                for user_url in urls:
-                    print(f"\n--- 开始处理用户: {user_url} ---")
+                async def handle_account(user_url: str, account_scraper):
+                    account_watermark = (
+                        watermark_store.get(feishu_for_task.base_app_token, feishu_for_task.table_id, user_url)
+                        if use_watermark else None
+                    )
+                    # 续跑时复用上次运行记录的列表结果，不再打开主页
+                    resumed_notes = run_journal.listed_notes(task_key, user_url) if run_journal is not None else None
                     try:
-                        if t_type in ('xhs_user_notes', 'xhs_home'):
+                        if resumed_notes is not None:
+                            notes = resumed_notes
+                            print(f"[运行日志] 复用上次运行的列表结果 {len(notes)} 条，跳过主页抓取。")
+                        elif t_type in ('xhs_user_notes', 'xhs_home'):
                             candidate_limit = max(per_account_limit, min(40, per_account_limit * 2))
-                            notes = await fetch_xhs_user_notes(
-                                user_url,
-                                max_notes=candidate_limit,
-                                scrolls=scrolls,
+                            # 本地索引可用时传入查询函数：只按列出的 id 查索引，收集够 candidate_limit 条新笔记即停止滚动
+                            known_ids = (
+                                functools.partial(
+                                    dedup_index.contains_many, feishu_for_task.base_app_token, feishu_for_task.table_id
+                                )
+                                if task_index_ready else None
                             )
+                            async with domain_slot(t_type):
+                                with metrics.timed("list"):
+                                    notes = await account_scraper.scrape_user_notes(
+                                        user_url,
+                                        max_notes=candidate_limit,
+                                        scrolls=xhs_scroll_cap,
+                                        engine=xhs_list_engine,
+                                        known_ids=known_ids,
+                                        stop_at=account_watermark,
+                                    )
                         elif t_type == 'wechat_articles':
                             # wechat_articles：这里 user_url 代表公众号ID或主页URL
-                            notes = await wechat_scraper.scrape_account_articles(user_url, max_articles=max(40, per_account_limit * 4))
+                            with metrics.timed("list"):
+                                notes = await wechat_scraper.scrape_account_articles(user_url, max_articles=max(40, per_account_limit * 4))
                         else:
-                            notes = await weibo_scraper.scrape_home_posts(
-                                user_url,
-                                max_posts=max(40, per_account_limit * 4),
-                                scrolls=scrolls,
-                            )
+                            async with domain_slot(t_type):
+                                with metrics.timed("list"):
+                                    notes = await account_scraper.scrape_home_posts(
+                                        user_url,
+                                        max_posts=max(40, per_account_limit * 4),
+                                        scrolls=scrolls,
+                                        engine=weibo_list_engine,
+                                        stop_at=account_watermark,
+                                    )
+                        if run_journal is not None and resumed_notes is None:
+                            run_journal.record("listed", task=task_key, account=user_url, notes=notes or [])
                         if not notes:
                             print("未在该用户主页发现任何可用条目，或爬取失败。")
-                            summary_counts[user_url] = 0
-                            continue
+                            task_summary.setdefault(user_url, 0)
+                            return
                     except Exception as e:
                         print(f"爬取用户 {user_url} 列表时出错: {e}")
-                        summary_counts[user_url] = 0
-                        if t_type in xhs_task_types:
-                            await scraper.reset_home_page()
-                        continue
+                        task_summary.setdefault(user_url, 0)
+                        return
+
+                    # 水位线及其之后的内容上次已处理过，只保留其上方的新内容（置顶内容不参与判定，保留给去重处理）
+                    watermark_pos = watermark.find_position(notes, account_watermark, id_key=note_id_key)
+                    if watermark_pos is not None:
+                        print(f"[水位线] {user_url} 第 {watermark_pos + 1} 条到达上次水位线，忽略其后的 {len(notes) - watermark_pos} 条")
+                        notes = notes[:watermark_pos]
+                    newest_listed = watermark.newest_entries(notes, id_key=note_id_key) if use_watermark else []
+
+                    def stage_watermark(complete: bool):
+                        if not newest_listed:
+                            return
+                        if not complete:
+                            print(f"[水位线] {user_url} 本次未处理完全部新内容，保留原水位线")
+                            return
+                        pending_watermarks[user_url] = {
+                            "note_ids": [str(n.get(note_id_key) or n.get('note_id')).strip() for n in newest_listed],
+                            "post_timestamp": newest_listed[0].get('post_timestamp'),
+                        }
+
+                    if not notes:
+                        print(f"[水位线] {user_url} 没有新内容")
+                        task_summary.setdefault(user_url, 0)
+                        return
 
                     # 批量查询已存在的 note_id，避免逐条请求
                     try:
@@ -307,12 +399,29 @@ async def main():
                             raw_id_str = str(raw_id).strip()
                             if raw_id_str:
                                 note_ids_for_check.append(raw_id_str)
-                        existing_note_ids = await feishu_for_task.check_notes_exist_batch(note_ids_for_check)
-                        print(f"[批量去重] sink={sink_key} -> 待查 {len(note_ids_for_check)} 条, 已存在 {len(existing_note_ids)} 条")
+                        with metrics.timed("dedup"):
+                            if task_index_ready:
+                                existing_note_ids = dedup_index.contains_many(
+                                    feishu_for_task.base_app_token, feishu_for_task.table_id, note_ids_for_check
+                                )
+                                dedup_source = "本地索引"
+                            else:
+                                existing_note_ids = await feishu_for_task.check_notes_exist_batch(note_ids_for_check)
+                                dedup_source = "飞书查询"
+                        print(f"[批量去重] sink={sink_key} ({dedup_source}) -> 待查 {len(note_ids_for_check)} 条, 已存在 {len(existing_note_ids)} 条")
                     except Exception as e:
                         print(f"[批量去重失败] sink={sink_key} 错误: {e}")
                         existing_note_ids = set()
                     existing_note_ids_normalized = {str(s).strip().lower() for s in existing_note_ids if isinstance(s, str)}
+                    # 已在发件箱中等待写入的内容（上次运行写入失败或未来得及写入）不再重新抓详情
+                    queued_note_ids = set()
+                    if outbox_flusher is not None:
+                        try:
+                            queued_note_ids = {
+                                s.lower() for s in outbox_flusher.outbox.contains_many(sink_key, note_ids_for_check)
+                            }
+                        except Exception as e:
+                            print(f"[发件箱] sink={sink_key} 查询待写入记录失败: {e}")
 
                     existed_count = 0
                     filtered_notes = []
@@ -327,24 +436,50 @@ async def main():
                             existed_count += 1
                             print(f"[已存在-批] 跳过 id={note_id_val_str}")
                             continue
+                        if note_id_val_lower in queued_note_ids:
+                            existed_count += 1
+                            print(f"[已存在-发件箱] 跳过 id={note_id_val_str}")
+                            continue
+                        if run_journal is not None and run_journal.is_written(task_key, note_id_val_str):
+                            existed_count += 1
+                            print(f"[已存在-运行日志] 跳过 id={note_id_val_str}")
+                            continue
                         if note_info.get('is_video') and t_type not in ('weibo_home',):
                             print(f"[跳过] 视频内容 id={note_id_val_str}")
                             continue
                         filtered_notes.append(note_info)
 
                     if not filtered_notes:
-                        summary_counts[user_url] = 0
+                        stage_watermark(True)
+                        task_summary.setdefault(user_url, 0)
                         print(f"[批量去重] sink={sink_key} -> 无需处理新内容，结束账号 {user_url}")
-                        continue
+                        return
 
                     total_candidates = len(notes) if notes else 0
                     successful_note_ids: list[str] = []
                     consecutive_expired = 0  # 仅用于小红书任务，追踪连续过期数量
+                    detail_failures = 0
                     is_xhs_task = t_type in ('xhs_user_notes', 'xhs_home')
 
+                    task_summary.setdefault(user_url, 0)
+
+                    def on_write_result(result, _user_url=user_url, _sink_key=sink_key, _client=feishu_for_task):
+                        # 批量写入完成后回调：成功计入汇总并登记到本地去重索引，失败打印具体原因
+                        if result.get("ok"):
+                            task_summary[_user_url] = task_summary.get(_user_url, 0) + 1
+                            if dedup_index is not None and result.get("note_id"):
+                                dedup_index.add(_client.base_app_token, _client.table_id, str(result["note_id"]))
+                            if run_journal is not None and result.get("note_id"):
+                                run_journal.record("written", task=task_key, account=_user_url, note_id=str(result["note_id"]))
+                            print(f"[写入成功] sink={_sink_key} id={result.get('note_id')}")
+                        else:
+                            write_failed_accounts.add(_user_url)
+                            print(f"[写入失败] sink={_sink_key} id={result.get('note_id')} 原因={result.get('error')}")
+
                     async def attempt_write(note_info_inner, note_details_inner, note_id_val_str_inner):
-                        nonlocal consecutive_expired
+                        nonlocal consecutive_expired, detail_failures
                         if not note_details_inner:
+                            detail_failures += 1
                             print(f"[未写入] id={note_id_val_str_inner} 原因=详情抓取失败")
                             return False, False
                         ctt = note_details_inner.get("content")
@@ -365,7 +500,8 @@ async def main():
                         if is_xhs_task:
                             post_time_str = note_details_inner.get("post_time")
                             is_recent, age_days = _is_within_last_days(
-                                post_time_str, CONTENT_VALID_WINDOW_DAYS, return_age=True
+                                post_time_str, CONTENT_VALID_WINDOW_DAYS, return_age=True,
+                                post_timestamp=note_details_inner.get("post_timestamp"),
                             )
                             is_expired = not is_recent
                             if is_expired:
@@ -376,7 +512,8 @@ async def main():
                         elif t_type == 'weibo_home':
                             post_time_str = note_details_inner.get("post_time")
                             is_recent, age_days = _is_within_last_days(
-                                post_time_str, CONTENT_VALID_WINDOW_DAYS, return_age=True
+                                post_time_str, CONTENT_VALID_WINDOW_DAYS, return_age=True,
+                                post_timestamp=note_details_inner.get("post_timestamp"),
                             )
                             is_expired = not is_recent
                             if is_expired:
@@ -398,137 +535,260 @@ async def main():
                             if is_xhs_task and consecutive_expired:
                                 consecutive_expired = 0
 
-                        await feishu_for_task.add_note(note_details_inner)
-                        print(f"[写入成功] sink={sink_key} id={note_id_val_str_inner}")
+                        await writer.add(note_details_inner, on_result=on_write_result)
+                        print(f"[已提交写入] sink={sink_key} id={note_id_val_str_inner}")
                         existing_note_ids.add(note_id_val_str_inner)
                         existing_note_ids_normalized.add(note_id_val_str_inner.lower())
                         successful_note_ids.append(note_id_val_str_inner)
-                        await asyncio.sleep(random.randint(5, 10))
                         return True, False
 
+                    def cached_details(note_id_str):
+                        if run_journal is None:
+                            return None
+                        cached = run_journal.cached_details(task_key, user_url, note_id_str)
+                        if cached is not None:
+                            print(f"[运行日志] 复用上次运行已抓取的详情 id={note_id_str}")
+                        return cached
+
+                    def record_details(note_id_str, details):
+                        if run_journal is not None and details:
+                            run_journal.record("detail", task=task_key, account=user_url, note_id=note_id_str, details=details)
+
+                    def summary_expired(note_info_inner, note_id_val_str_inner) -> bool:
+                        # 微博列表项自带发布时间，过期的直接跳过，不必抓详情
+                        if t_type != 'weibo_home':
+                            return False
+                        summary_post_time = note_info_inner.get('post_time')
+                        summary_timestamp = note_info_inner.get('post_timestamp')
+                        if not summary_post_time and summary_timestamp is None:
+                            return False
+                        is_recent, age_days = _is_within_last_days(
+                            summary_post_time, CONTENT_VALID_WINDOW_DAYS, return_age=True,
+                            post_timestamp=summary_timestamp,
+                        )
+                        if not is_recent:
+                            print(
+                                f"[过期] 跳过 id={note_id_val_str_inner} post_time={summary_post_time} "
+                                f"age_days={_format_age_days(age_days)} window={CONTENT_VALID_WINDOW_DAYS}"
+                            )
+                        return not is_recent
+
+                    # 详情阶段并发：各平台默认值可用环境变量覆盖，单个任务可在 params.detail_concurrency 中覆盖
                     if is_xhs_task:
-                        detail_concurrency = int(os.environ.get("XHS_DETAIL_CONCURRENCY", "2") or "2")
-                        if detail_concurrency < 1:
-                            detail_concurrency = 1
-                        detail_concurrency = min(detail_concurrency, per_account_limit)
-                        detail_page_pool: list = []
-                        page_queue: asyncio.Queue = asyncio.Queue()
-                        for _ in range(detail_concurrency):
-                            page = await scraper.create_prepared_page()
+                        default_detail_concurrency = os.environ.get("XHS_DETAIL_CONCURRENCY", "2")
+                    elif t_type == 'weibo_home':
+                        default_detail_concurrency = os.environ.get("WEIBO_DETAIL_CONCURRENCY", "3")
+                    else:
+                        # 公众号抓取器共用一个页面，默认逐条抓详情（仍与校验/写入阶段重叠）
+                        default_detail_concurrency = os.environ.get("WECHAT_DETAIL_CONCURRENCY", "1")
+                    detail_concurrency = int(params.get('detail_concurrency') or default_detail_concurrency or 1)
+                    detail_concurrency = max(1, min(detail_concurrency, per_account_limit))
+                    # 详情页池：固定数量的页面在各条内容之间复用；微博 api 引擎不渲染页面，只有回退到 dom 时才自行开页
+                    needs_pages = is_xhs_task or (t_type == 'weibo_home' and weibo_detail_engine != 'api')
+                    detail_page_pool: list = []
+                    page_queue: asyncio.Queue = asyncio.Queue()
+                    for _ in range(detail_concurrency):
+                        page = await account_scraper.create_prepared_page() if needs_pages else None
+                        if page is not None:
                             detail_page_pool.append(page)
-                            await page_queue.put(page)
-                        pending_tasks = []
-                        note_index = 0
-                        stop_due_to_expired = False
-
-                        async def run_detail_fetch(note_payload):
-                            detail_page = await page_queue.get()
-                            try:
-                                return await scraper.scrape_note_details(note_payload, page=detail_page)
-                            finally:
-                                await page_queue.put(detail_page)
-
-                        while (note_index < len(filtered_notes) or pending_tasks) and len(successful_note_ids) < per_account_limit:
-                            while (
-                                note_index < len(filtered_notes)
-                                and len(pending_tasks) < detail_concurrency
-                                and len(successful_note_ids) + len(pending_tasks) < per_account_limit
-                            ):
-                                note_info = filtered_notes[note_index]
-                                note_index += 1
-                                note_id_val = note_info.get(note_id_key) or note_info.get('note_id')
-                                note_id_val_str = str(note_id_val).strip() if note_id_val is not None else ""
-                                if not note_id_val_str:
-                                    continue
-                                print(f"[需要抓详情] id={note_id_val_str}")
-                                pending_tasks.append(
-                                    (note_info, note_id_val_str, asyncio.create_task(run_detail_fetch(note_info)))
-                                )
+                        await page_queue.put(page)
 
-                            if not pending_tasks:
-                                break
+                    async def fetch_details(note_payload, detail_page):
+                        if is_xhs_task:
+                            return await account_scraper.scrape_note_details(
+                                note_payload, page=detail_page, engine=xhs_detail_engine
+                            )
+                        if t_type == 'weibo_home':
+                            return await account_scraper.scrape_post_details(
+                                note_payload, page=detail_page, engine=weibo_detail_engine
+                            )
+                        return await wechat_scraper.scrape_article_details(note_payload)
 
-                            note_info_cur, note_id_str_cur, task = pending_tasks.pop(0)
-                            note_details = None
-                            try:
-                                note_details = await task
-                            except asyncio.CancelledError:
-                                print(f"[取消] id={note_id_str_cur} 详情任务已取消")
-                                continue
-                            except Exception as e:
-                                print(f"[未写入] id={note_id_str_cur} 原因=详情抓取异常 {e}")
-                            _, should_stop = await attempt_write(note_info_cur, note_details, note_id_str_cur)
-                            if should_stop:
-                                stop_due_to_expired = True
-                                break
-
-                        # 结束循环后取消剩余任务，避免页面泄漏
-                        for _, __, task in pending_tasks:
-                            task.cancel()
-                            try:
-                                await task
-                            except asyncio.CancelledError:
-                                pass
-                            except Exception:
-                                pass
+                    # 流水线：预过滤 → 详情抓取（detail_concurrency 条并行）→ 按列表顺序校验并提交写入
+                    async def stage_prefilter(note_info):
+                        note_id_val = note_info.get(note_id_key) or note_info.get('note_id')
+                        note_id_val_str = str(note_id_val).strip() if note_id_val is not None else ""
+                        if not note_id_val_str:
+                            return None
+                        if summary_expired(note_info, note_id_val_str):
+                            return None
+                        print(f"[需要抓详情] id={note_id_val_str}")
+                        return note_info, note_id_val_str
+
+                    async def stage_detail(item):
+                        note_info, note_id_str = item
+                        details = cached_details(note_id_str)
+                        if details is not None:
+                            return note_info, note_id_str, details
+                        detail_page = await page_queue.get()
+                        try:
+                            async with domain_slot(t_type):
+                                with metrics.timed("detail"):
+                                    details = await fetch_details(note_info, detail_page)
+                        except Exception as e:
+                            print(f"[未写入] id={note_id_str} 原因=详情抓取异常 {e}")
+                            return note_info, note_id_str, None
+                        finally:
+                            await page_queue.put(detail_page)
+                        record_details(note_id_str, details)
+                        return note_info, note_id_str, details
+
+                    async def stage_write(item):
+                        note_info, note_id_str, details = item
+                        written, should_stop = await attempt_write(note_info, details, note_id_str)
+                        if should_stop:
+                            raise StopPipeline()
+                        return True if written else None
+
+                    detail_pipeline = Pipeline(
+                        [
+                            Stage("prefilter", stage_prefilter),
+                            Stage("detail", stage_detail, concurrency=detail_concurrency),
+                            Stage("write", stage_write, ordered=True),
+                        ],
+                        limit=per_account_limit,
+                        name=user_url,
+                    )
+                    try:
+                        await detail_pipeline.run(filtered_notes)
+                    finally:
+                        # 结束后关闭详情页，避免页面泄漏
                         for page in detail_page_pool:
                             try:
                                 if not page.is_closed():
                                     await page.close()
                             except Exception:
                                 pass
-                        if stop_due_to_expired:
-                            # 清理后直接结束本账号
-                            pass
-                    else:
-                        for note_info in filtered_notes:
-                            if len(successful_note_ids) >= per_account_limit:
-                                break
-                            try:
-                                note_id_val = note_info.get(note_id_key) or note_info.get('note_id')
-                                note_id_val_str = str(note_id_val).strip() if note_id_val is not None else ""
-                                if not note_id_val_str:
-                                    continue
-                                print(f"[需要抓详情] id={note_id_val_str}")
-
-                                if t_type == 'weibo_home':
-                                    summary_post_time = note_info.get('post_time')
-                                    if summary_post_time:
-                                        is_recent, age_days = _is_within_last_days(
-                                            summary_post_time, CONTENT_VALID_WINDOW_DAYS, return_age=True
-                                        )
-                                        if not is_recent:
-                                            print(
-                                                f"[过期] 跳过 id={note_id_val_str} post_time={summary_post_time} "
-                                                f"age_days={_format_age_days(age_days)} window={CONTENT_VALID_WINDOW_DAYS}"
-                                            )
-                                            continue
-                                if t_type == 'wechat_articles':
-                                    note_details = await wechat_scraper.scrape_article_details(note_info)
-                                else:
-                                    note_details = await weibo_scraper.scrape_post_details(note_info)
-                                _, should_stop = await attempt_write(note_info, note_details, note_id_val_str)
-                                if should_stop:
-                                    break
-                            except Exception as e:
-                                print(f"[未写入] id={note_info.get('note_id')} 原因=异常 {e}")
+                    # 阶段内未预料的异常（如提交写入失败）与详情失败一样，不推进水位线
+                    detail_failures += detail_pipeline.errors
+                    # 因 per_account_limit 提前结束时还有新内容未处理，水位线不能越过它们
+                    truncated = not detail_pipeline.stopped and not detail_pipeline.exhausted
 
+                    stage_watermark(not truncated and not detail_failures)
                     sent_count = len(successful_note_ids)
-                    print(f"--- 用户 {user_url} 处理完毕，本次已发送 {sent_count}/{per_account_limit} 条 ---")
-                    print(f"=== 小结: 候选 {total_candidates} 条 | 已存在 {existed_count} 条 | 新写入 {sent_count} 条 ===")
-                    summary_counts[user_url] = sent_count
+                    print(f"--- 用户 {user_url} 处理完毕，本次已提交 {sent_count}/{per_account_limit} 条 ---")
+                    print(f"=== 小结: 候选 {total_candidates} 条 | 已存在 {existed_count} 条 | 新提交 {sent_count} 条 ===")
+
+                async def run_account(user_url: str):
+                    if run_journal is not None and run_journal.account_done(task_key, user_url):
+                        print(f"[运行日志] 账号 {user_url} 已在上次运行中完成，跳过。")
+                        completed_accounts.append(user_url)
+                        return
+                    # 同时处理的账号各自持有一个上下文；处理完归还到池中供后续账号复用
+                    async with account_slots:
+                        print(f"\n--- 开始处理用户: {user_url} ---")
+                        pool = xhs_context_pool if t_type in xhs_task_types else weibo_context_pool
+                        account_context = None
+                        account_scraper = None
+                        healthy = True
+                        try:
+                            # 公众号任务使用共享的 wechat_scraper，不占用上下文
+                            if t_type in xhs_task_types or t_type == 'weibo_home':
+                                account_context = await pool.acquire()
+                            if t_type in xhs_task_types:
+                                account_scraper = XhsScraper(account_context, routing_profile=xhs_routing_profile)
+                            elif t_type == 'weibo_home':
+                                account_scraper = WeiboHomeScraper(account_context, routing_profile=weibo_routing_profile)
+                            # 账号内的页面、接口与详情任务的耗时都记在该平台/账号标签下
+                            with metrics.labels(platform=TASK_TYPE_PLATFORMS.get(t_type, t_type or ""), account=user_url):
+                                await handle_account(user_url, account_scraper)
+                            completed_accounts.append(user_url)
+                        except Exception as e:
+                            print(f"处理用户 {user_url} 时出错: {e}")
+                            # 未被捕获的异常可能来自上下文本身（崩溃、被风控），归还时回收
+                            healthy = False
+                        finally:
+                            if account_scraper is not None:
+                                await account_scraper.close()
+                            if account_context is not None:
+                                await pool.release(account_context, healthy=healthy)
+
+                # 账号级并发：同一任务内最多 account_concurrency 个账号同时处理
+                account_concurrency = max(1, int(
+                    params.get('account_concurrency') or getattr(config, 'ACCOUNT_CONCURRENCY', 3) or 1
+                ))
+                account_slots = asyncio.Semaphore(account_concurrency)
+                for user_url in urls:
+                    task_summary.setdefault(user_url, 0)
+                await asyncio.gather(*(run_account(user_url) for user_url in urls))
+
+                # 任务结束时写入剩余缓冲
+                await writer.close()
+                for account, mark in pending_watermarks.items():
+                    if account in write_failed_accounts:
+                        print(f"[水位线] {account} 有写入失败的内容，保留原水位线")
+                        continue
+                    watermark_store.advance(
+                        feishu_for_task.base_app_token, feishu_for_task.table_id, account,
+                        mark["note_ids"], mark["post_timestamp"],
+                    )
+                    print(f"[水位线] {account} 推进到 id={mark['note_ids'][0]}")
+                # 写入已全部落盘后再记录完成，续跑时跳过；写入失败的账号续跑时会重新提交
+                if run_journal is not None:
+                    for account in completed_accounts:
+                        if account not in write_failed_accounts and not run_journal.account_done(task_key, account):
+                            run_journal.record("account_done", task=task_key, account=account)
+                    if all(run_journal.account_done(task_key, u) or (u in completed_accounts and u not in write_failed_accounts)
+                           for u in urls):
+                        run_journal.record("task_done", task=task_key)
+                return task_summary
+
+            # 任务级并发：不同任务（如小红书与微博）使用各自的上下文与 sink，可同时执行，
+            # 共享同一个 browser 与 request_context；各任务内部的账号并发由 account_concurrency 控制
+            task_concurrency = max(1, int(getattr(config, 'TASK_CONCURRENCY', 2) or 1))
+            task_slots = asyncio.Semaphore(task_concurrency)
+
+            async def run_task_with_slot(task: Dict, task_idx: int) -> Dict[str, int]:
+                async with task_slots:
+                    return await run_task(task, f"{task_idx}:{task.get('type')}:{task.get('sink') or ''}")
+
+            task_results = await asyncio.gather(
+                *(run_task_with_slot(task, idx) for idx, task in enumerate(tasks)), return_exceptions=True
+            )
+            run_completed = not any(isinstance(r, BaseException) for r in task_results)
+            for task, result in zip(tasks, task_results):
+                if isinstance(result, BaseException):
+                    print(f"任务 type={task.get('type')} sink={task.get('sink')} 执行出错: {result}")
+                    continue
+                for u, c in result.items():
+                    summary_counts[u] = summary_counts.get(u, 0) + c
 
         finally:
+            # 先写入各任务缓冲中剩余的记录，再关闭网络上下文
+            for writer in task_writers:
+                try:
+                    await writer.close()
+                except Exception as e:
+                    print(f"[批量写入] sink={writer.name} 写入剩余记录失败: {e}")
+            if outbox_flusher is not None:
+                try:
+                    await outbox_flusher.close()
+                    print(outbox_flusher.format_stats())
+                except Exception as e:
+                    print(f"[发件箱] 写入剩余记录失败，记录保留在发件箱: {e}")
+                outbox_flusher.outbox.close()
+            for mirror in image_mirrors.values():
+                mirror_summary = mirror.format_stats()
+                if mirror_summary:
+                    print(mirror_summary)
+            if image_token_cache is not None:
+                image_token_cache.close()
+            if dedup_index is not None:
+                dedup_index.close()
+            if watermark_store is not None:
+                watermark_store.close()
+            if run_journal is not None:
+                run_journal.close(completed=run_completed)
+            # 中断的运行同样导出已记录的指标
+            metrics.export()
             # 确保所有资源被关闭
+            await xhs_context_pool.close()
+            await weibo_context_pool.close()
             await scraper.close()
             await wechat_scraper.close()
-            await weibo_scraper.close()
-            if has_weibo_tasks and weibo_context:
-                try:
-                    await weibo_context.close()
-                except Exception:
-                    pass
             await browser.close()
+            # 后台刷新 token 的任务依赖网络上下文，先停止
+            await get_feishu_cache().close()
             await request_context.dispose()
     
     # 汇总输出各账号发送条数
@@ -542,6 +802,15 @@ async def main():
             print(f"总计发送 {total_sent} 条")
     except Exception:
         pass
+    routing_summary = format_routing_stats()
+    if routing_summary:
+        print(routing_summary)
+    limiter_summary = get_rate_limiter().format_stats()
+    if limiter_summary:
+        print(limiter_summary)
+    phase_summary = metrics.format_phase_summary()
+    if phase_summary:
+        print(phase_summary)
     print("\n====== 所有任务执行完毕 ======")
 
 if __name__ == "__main__":
@@ -550,4 +819,10 @@ if __name__ == "__main__":
        config.FEISHU_BASE_APP_TOKEN == "在此处填入你的多维表格App Token":
         print("错误：请先在 config.py 文件中填写您的飞书应用和多维表格配置信息！")
     else:
-        asyncio.run(main())
+        parser = argparse.ArgumentParser(description="抓取小红书/微博/公众号内容并写入飞书多维表格")
+        parser.add_argument("--resume", action="store_true", help="从上次中断的运行日志（RUN_JOURNAL_PATH）继续")
+        args = parser.parse_args()
+        try:
+            asyncio.run(main(resume=args.resume))
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            print("运行已中断，可使用 python main.py --resume 从中断处继续。")
@@ -0,0 +1,170 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+
+# 各阶段耗时的直方图分桶（秒）
+BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 当前协程的标签：asyncio.create_task 会复制上下文，账号内派生的详情任务自动继承
+_platform: ContextVar[str] = ContextVar("metrics_platform", default="")
+_account: ContextVar[str] = ContextVar("metrics_account", default="")
+
+
+class _Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+# {(phase, platform, account): _Histogram}
+_SERIES: Dict[Tuple[str, str, str], _Histogram] = {}
+_started_at = time.time()
+
+
+@contextmanager
+def labels(*, platform: Optional[str] = None, account: Optional[str] = None):
+    """在代码块内设置平台/账号标签（协程安全）。"""
+    tokens = []
+    if platform is not None:
+        tokens.append((_platform, _platform.set(platform)))
+    if account is not None:
+        tokens.append((_account, _account.set(account)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def observe(phase: str, seconds: float, *, platform: Optional[str] = None, account: Optional[str] = None):
+    key = (
+        phase,
+        platform if platform is not None else _platform.get(),
+        account if account is not None else _account.get(),
+    )
+    hist = _SERIES.get(key)
+    if hist is None:
+        hist = _SERIES[key] = _Histogram()
+    hist.observe(max(0.0, float(seconds)))
+
+
+@contextmanager
+def timed(phase: str, *, platform: Optional[str] = None, account: Optional[str] = None):
+    """记录代码块耗时（块内抛出异常时同样记录），可直接包住 await 语句。"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(phase, time.perf_counter() - started, platform=platform, account=account)
+
+
+def reset():
+    """清空已记录的指标（基准测试在各场景之间调用）。"""
+    global _started_at
+    _SERIES.clear()
+    _started_at = time.time()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def to_prometheus() -> str:
+    name = "fetch_phase_duration_seconds"
+    lines = [
+        f"# HELP {name} Duration of scraping/writing phases per platform and account.",
+        f"# TYPE {name} histogram",
+    ]
+    for (phase, platform, account), hist in sorted(_SERIES.items()):
+        base = f'phase="{_escape(phase)}",platform="{_escape(platform)}",account="{_escape(account)}"'
+        for bound, count in zip(BUCKETS, hist.buckets):
+            lines.append(f'{name}_bucket{{{base},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{base},le="+Inf"}} {hist.count}')
+        lines.append(f"{name}_sum{{{base}}} {hist.total:.6f}")
+        lines.append(f"{name}_count{{{base}}} {hist.count}")
+    lines.append("# HELP fetch_run_duration_seconds Wall clock duration of the run.")
+    lines.append("# TYPE fetch_run_duration_seconds gauge")
+    lines.append(f"fetch_run_duration_seconds {time.time() - _started_at:.3f}")
+    return "\n".join(lines) + "\n"
+
+
+def to_dict() -> Dict:
+    series: List[Dict] = []
+    for (phase, platform, account), hist in sorted(_SERIES.items()):
+        series.append({
+            "phase": phase,
+            "platform": platform,
+            "account": account,
+            "count": hist.count,
+            "sum_sec": round(hist.total, 6),
+            "avg_sec": round(hist.total / hist.count, 6) if hist.count else 0,
+            "max_sec": round(hist.max, 6),
+            "buckets": {str(b): c for b, c in zip(BUCKETS, hist.buckets)},
+        })
+    return {
+        "started_at": int(_started_at),
+        "duration_sec": round(time.time() - _started_at, 3),
+        "series": series,
+    }
+
+
+def _write_atomic(path: str, text: str):
+    # textfile collector 可能随时读取，先写临时文件再替换
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def export(prom_path: Optional[str] = None, json_path: Optional[str] = None):
+    """导出 Prometheus textfile 与 JSON；路径为空字符串时跳过对应格式。"""
+    prom_path = getattr(config, "METRICS_PROM_PATH", "") if prom_path is None else prom_path
+    json_path = getattr(config, "METRICS_JSON_PATH", "") if json_path is None else json_path
+    if not _SERIES:
+        return
+    if prom_path:
+        try:
+            _write_atomic(prom_path, to_prometheus())
+        except Exception as e:
+            print(f"[指标] 写入 {prom_path} 失败: {e}")
+    if json_path:
+        try:
+            _write_atomic(json_path, json.dumps(to_dict(), ensure_ascii=False, indent=2))
+        except Exception as e:
+            print(f"[指标] 写入 {json_path} 失败: {e}")
+
+
+def format_phase_summary() -> str:
+    """按阶段汇总（不区分账号）的耗时摘要，按总耗时降序。"""
+    by_phase: Dict[Tuple[str, str], List[float]] = {}
+    for (phase, platform, _account_label), hist in _SERIES.items():
+        agg = by_phase.setdefault((phase, platform), [0, 0.0, 0.0])
+        agg[0] += hist.count
+        agg[1] += hist.total
+        agg[2] = max(agg[2], hist.max)
+    lines = []
+    for (phase, platform), (count, total, max_sec) in sorted(by_phase.items(), key=lambda kv: -kv[1][1]):
+        avg = total / count if count else 0
+        lines.append(
+            f"[耗时] {platform or '-'}/{phase}: {count} 次，合计 {total:.1f}s，平均 {avg:.2f}s，最长 {max_sec:.2f}s"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,505 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import config
+from feishu_client import FeishuClient, FeishuBatchWriter
+
+
+class Outbox:
+    """
+    本地持久化发件箱（SQLite），抓取到的记录先追加到这里，再由 OutboxFlusher 按 sink 批量写入飞书。
+
+    - outbox：待写入的记录，(sink, note_id) 唯一，重复追加（续跑、重复抓取）只保留一条；
+    - dead_letter：重试 OUTBOX_MAX_ATTEMPTS 次仍失败的记录，可用 python outbox.py requeue 重新放回发件箱；
+    - WAL + synchronous=NORMAL：每次追加只写 WAL、不逐条 fsync，检查点时批量落盘；进程被杀不丢已提交的记录。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or getattr(config, "OUTBOX_PATH", "feishu_outbox.sqlite3")
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sink TEXT NOT NULL,
+                note_id TEXT NOT NULL COLLATE NOCASE,
+                task TEXT NOT NULL DEFAULT '',
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_ms INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT NOT NULL DEFAULT '',
+                created_ms INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (sink, note_id)
+            );
+            CREATE INDEX IF NOT EXISTS outbox_due ON outbox (sink, next_attempt_ms);
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                id INTEGER PRIMARY KEY,
+                sink TEXT NOT NULL,
+                note_id TEXT NOT NULL COLLATE NOCASE,
+                task TEXT NOT NULL DEFAULT '',
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT NOT NULL DEFAULT '',
+                created_ms INTEGER NOT NULL DEFAULT 0,
+                failed_ms INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+    def append(self, sink: str, note_id: str, payload: Dict[str, Any], *, task: str = "") -> Tuple[int, bool]:
+        """追加一条记录，返回 (id, 是否新插入)；同一 sink 下 note_id 已在发件箱中时返回已有记录的 id 与 False。"""
+        note_id = str(note_id or "").strip() or f"_{uuid.uuid4().hex}"
+        cur = self._conn.execute(
+            "INSERT INTO outbox (sink, note_id, task, payload, created_ms) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (sink, note_id) DO NOTHING",
+            (sink, note_id, task, json.dumps(payload, ensure_ascii=False, default=str), int(time.time() * 1000)),
+        )
+        self._conn.commit()
+        if cur.rowcount:
+            return int(cur.lastrowid), True
+        row = self._conn.execute("SELECT id FROM outbox WHERE sink = ? AND note_id = ?", (sink, note_id)).fetchone()
+        return int(row[0]), False
+
+    def due_sinks(self, now_ms: int) -> Dict[str, Tuple[int, int]]:
+        """返回有到期记录的 sink：{sink: (到期条数, 最早可写入时间 ms)}。"""
+        rows = self._conn.execute(
+            "SELECT sink, COUNT(*), MIN(MAX(created_ms, next_attempt_ms)) FROM outbox "
+            "WHERE next_attempt_ms <= ? GROUP BY sink",
+            (now_ms,),
+        ).fetchall()
+        return {r[0]: (int(r[1]), int(r[2] or 0)) for r in rows}
+
+    def due(self, sink: str, limit: int, now_ms: int) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT id, note_id, task, payload, attempts FROM outbox "
+            "WHERE sink = ? AND next_attempt_ms <= ? ORDER BY id LIMIT ?",
+            (sink, now_ms, int(limit)),
+        ).fetchall()
+        result = []
+        for row_id, note_id, task, payload, attempts in rows:
+            try:
+                note = json.loads(payload)
+            except ValueError:
+                note = {}
+            result.append({"id": row_id, "note_id": note_id, "task": task, "note": note, "attempts": attempts})
+        return result
+
+    def ack(self, row_ids: List[int]):
+        if not row_ids:
+            return
+        self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(int(i),) for i in row_ids])
+        self._conn.commit()
+
+    def retry_later(self, row_id: int, error: str, next_attempt_ms: int):
+        self._conn.execute(
+            "UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt_ms = ? WHERE id = ?",
+            (str(error or ""), int(next_attempt_ms), int(row_id)),
+        )
+        self._conn.commit()
+
+    def move_to_dead_letter(self, row_id: int, error: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dead_letter (id, sink, note_id, task, payload, attempts, last_error, created_ms, failed_ms) "
+            "SELECT id, sink, note_id, task, payload, attempts + 1, ?, created_ms, ? FROM outbox WHERE id = ?",
+            (str(error or ""), int(time.time() * 1000), int(row_id)),
+        )
+        self._conn.execute("DELETE FROM outbox WHERE id = ?", (int(row_id),))
+        self._conn.commit()
+
+    def contains_many(self, sink: str, note_ids: List[str]) -> set[str]:
+        """返回 note_ids 中仍在发件箱里等待写入的那些（大小写不敏感），用于去重时跳过，不再重复抓详情。"""
+        wanted = [str(n).strip() for n in note_ids if n is not None and str(n).strip()]
+        found: set[str] = set()
+        for start in range(0, len(wanted), 500):
+            chunk = wanted[start:start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = self._conn.execute(
+                f"SELECT note_id FROM outbox WHERE sink = ? AND note_id IN ({placeholders})", (sink, *chunk)
+            ).fetchall()
+            found.update(r[0].lower() for r in rows)
+        return {n for n in wanted if n.lower() in found}
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """各 sink 的待写入/死信条数：{sink: {"pending": n, "dead": m}}。"""
+        result: Dict[str, Dict[str, int]] = {}
+        for sink, n in self._conn.execute("SELECT sink, COUNT(*) FROM outbox GROUP BY sink"):
+            result.setdefault(sink, {"pending": 0, "dead": 0})["pending"] = int(n)
+        for sink, n in self._conn.execute("SELECT sink, COUNT(*) FROM dead_letter GROUP BY sink"):
+            result.setdefault(sink, {"pending": 0, "dead": 0})["dead"] = int(n)
+        return result
+
+    def dead_letters(self, sink: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        sql = "SELECT id, sink, note_id, attempts, last_error, failed_ms FROM dead_letter"
+        args: tuple = ()
+        if sink:
+            sql += " WHERE sink = ?"
+            args = (sink,)
+        sql += " ORDER BY failed_ms DESC LIMIT ?"
+        rows = self._conn.execute(sql, (*args, int(limit))).fetchall()
+        keys = ("id", "sink", "note_id", "attempts", "last_error", "failed_ms")
+        return [dict(zip(keys, r)) for r in rows]
+
+    def requeue_dead(self, sink: Optional[str] = None) -> int:
+        """把死信放回发件箱（重试次数清零），返回放回的条数。"""
+        # INSERT ... SELECT 带 ON CONFLICT 时 SELECT 必须有 WHERE（SQLite 语法歧义）
+        where, args = ("WHERE sink = ?", (sink,)) if sink else ("WHERE 1", ())
+        cur = self._conn.execute(
+            "INSERT INTO outbox (sink, note_id, task, payload, created_ms) "
+            f"SELECT sink, note_id, task, payload, ? FROM dead_letter {where} "
+            "ON CONFLICT (sink, note_id) DO NOTHING",
+            (int(time.time() * 1000), *args),
+        )
+        moved = cur.rowcount
+        self._conn.execute(f"DELETE FROM dead_letter {where}", args)
+        self._conn.commit()
+        return max(0, int(moved))
+
+
+class OutboxFlusher:
+    """
+    后台把发件箱中的记录按 sink 写入飞书：到期记录达到 batch_size 条、最早一条等待超过 flush_interval_sec，
+    或有写入器请求立即写入时，取出一批交给 FeishuBatchWriter（含图片转存与指标）写入。
+
+    - 成功的记录从发件箱删除并登记到去重索引；失败的按指数退避重试，超过 max_attempts 次移入死信表；
+    - 写入前先查去重索引，上次运行已写入但未来得及删除（进程被杀）的记录直接删除，不重复写入；
+    - 抓取流程只负责追加，飞书变慢或报错不会阻塞浏览器侧的抓取。
+    """
+
+    def __init__(self, outbox: Outbox, request_context=None, *,
+                 dedup_index=None,
+                 batch_size: Optional[int] = None,
+                 flush_interval_sec: Optional[float] = None,
+                 poll_interval_sec: Optional[float] = None,
+                 max_attempts: Optional[int] = None,
+                 retry_backoff_sec: Optional[float] = None,
+                 retry_max_backoff_sec: Optional[float] = None):
+        self.outbox = outbox
+        self.request_context = request_context
+        self.dedup_index = dedup_index
+        size = batch_size or int(getattr(config, "FEISHU_BATCH_SIZE", 50) or 50)
+        self.batch_size = max(1, min(FeishuClient.BATCH_CREATE_LIMIT, int(size)))
+        interval = flush_interval_sec
+        if interval is None:
+            interval = float(getattr(config, "FEISHU_BATCH_FLUSH_INTERVAL_SECONDS", 30) or 30)
+        self.flush_interval_sec = max(0.0, float(interval))
+        self.poll_interval_sec = max(0.1, float(
+            poll_interval_sec or getattr(config, "OUTBOX_POLL_INTERVAL_SECONDS", 2) or 2
+        ))
+        self.max_attempts = max(1, int(max_attempts or getattr(config, "OUTBOX_MAX_ATTEMPTS", 5) or 5))
+        self.retry_backoff_sec = float(retry_backoff_sec or getattr(config, "OUTBOX_RETRY_BACKOFF_SECONDS", 30) or 30)
+        self.retry_max_backoff_sec = float(
+            retry_max_backoff_sec or getattr(config, "OUTBOX_RETRY_MAX_BACKOFF_SECONDS", 1800) or 1800
+        )
+        self._writers: Dict[str, FeishuBatchWriter] = {}
+        self._unknown_sinks: set = set()
+        # 本次运行提交的记录在首次写入有结果后回调（见 OutboxSinkWriter）
+        self._callbacks: Dict[int, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._force: set = set()
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.stats = {"written": 0, "retried": 0, "dead": 0, "skipped_existing": 0}
+
+    def add_sink(self, sink_key: str, client: FeishuClient, image_mirror=None):
+        """登记 sink 使用的飞书客户端（及图片转存）；未登记的 sink（上次运行遗留的记录）按 FEISHU_SINKS 自动创建客户端。"""
+        writer = self._writers.get(sink_key)
+        if writer is None:
+            self._writers[sink_key] = FeishuBatchWriter(
+                client, batch_size=self.batch_size, name=sink_key, image_mirror=image_mirror
+            )
+        elif writer.image_mirror is None:
+            # 遗留记录先按默认客户端写入过时，补上任务开始后才创建的图片转存
+            writer.image_mirror = image_mirror
+
+    def writer(self, sink_key: str, *, task: str = "") -> "OutboxSinkWriter":
+        return OutboxSinkWriter(self, sink_key, task=task)
+
+    def _writer_for(self, sink_key: str) -> Optional[FeishuBatchWriter]:
+        writer = self._writers.get(sink_key)
+        if writer is not None or sink_key in self._unknown_sinks:
+            return writer
+        sink_conf = (getattr(config, "FEISHU_SINKS", {}) or {}).get(sink_key)
+        if sink_conf is None or self.request_context is None:
+            self._unknown_sinks.add(sink_key)
+            print(f"[发件箱] sink={sink_key} 不在 FEISHU_SINKS 中，其记录保留在发件箱")
+            return None
+        client = FeishuClient(
+            self.request_context,
+            app_token=sink_conf.get('app_token'),
+            table_id=sink_conf.get('table_id'),
+            field_mapping=sink_conf.get('field_mapping'),
+        )
+        self.add_sink(sink_key, client)
+        return self._writers[sink_key]
+
+    def submit(self, sink_key: str, note: Dict[str, Any], *, task: str = "",
+               on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        note_id = note.get("note_id") or note.get("article_id")
+        row_id, inserted = self.outbox.append(sink_key, str(note_id or ""), note, task=task)
+        if on_result is not None:
+            if inserted:
+                self._callbacks.setdefault(row_id, []).append(on_result)
+            else:
+                # 已有同一条记录（可能正在退避中，或由其它任务提交）：不等它下次写入，立即按“保留在发件箱”通知，
+                # 避免 OutboxSinkWriter.close 等待长达 OUTBOX_RETRY_MAX_BACKOFF_SECONDS
+                try:
+                    on_result({"note_id": note_id, "ok": False, "record_id": None, "error": "已在发件箱中等待写入"})
+                except Exception as e:
+                    print(f"[发件箱] 回调异常: {e}")
+        self._wake.set()
+        return row_id
+
+    def request_flush(self, sink_key: Optional[str] = None):
+        """不等批量阈值，尽快写入该 sink（None 表示全部）当前到期的记录。"""
+        self._force.add(sink_key)
+        self._wake.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                written = await self.flush_due()
+            except Exception as e:
+                print(f"[发件箱] 写入出错: {e}")
+                written = 0
+            if written:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval_sec)
+            except asyncio.TimeoutError:
+                pass
+
+    def _backoff_ms(self, attempts: int) -> int:
+        delay = min(self.retry_max_backoff_sec, self.retry_backoff_sec * (2 ** max(0, attempts)))
+        return int(delay * 1000)
+
+    async def flush_due(self, *, force: bool = False, sinks: Optional[set] = None) -> int:
+        """写入各 sink（sinks 为 None 时全部）已满足条件的到期记录，返回本轮处理的条数。"""
+        async with self._lock:
+            now_ms = int(time.time() * 1000)
+            forced, self._force = self._force, set()
+            force_all = force or None in forced or self._closing
+            ready = []
+            for sink, (count, ready_since_ms) in self.outbox.due_sinks(now_ms).items():
+                if sinks is not None and sink not in sinks:
+                    continue
+                if (force_all or sink in forced or count >= self.batch_size
+                        or now_ms - ready_since_ms >= self.flush_interval_sec * 1000):
+                    ready.append(sink)
+            if not ready:
+                return 0
+            counts = await asyncio.gather(*(self._flush_sink(sink, now_ms) for sink in ready))
+            return sum(counts)
+
+    async def _flush_sink(self, sink_key: str, now_ms: int) -> int:
+        writer = self._writer_for(sink_key)
+        if writer is None:
+            return 0
+        rows = self.outbox.due(sink_key, self.batch_size, now_ms)
+        if not rows:
+            return 0
+        try:
+            return await self._write_rows(sink_key, writer, rows)
+        except Exception as e:
+            # 如 SQLite 被 python outbox.py flush 锁住、去重索引出错：记录仍留在发件箱，下一轮再写；
+            # 尚未通知的回调按失败通知，避免 OutboxSinkWriter.close 一直等待。返回 0 让后台循环按间隔重试而不是空转
+            print(f"[发件箱] sink={sink_key} 写入 {len(rows)} 条出错，记录保留在发件箱: {e}")
+            for r in rows:
+                self._notify(r["id"], {"note_id": r["note_id"], "ok": False, "record_id": None,
+                                       "error": f"写入出错，已保留在发件箱: {e}"})
+            return 0
+
+    async def _write_rows(self, sink_key: str, writer: FeishuBatchWriter, rows: List[Dict[str, Any]]) -> int:
+        client = writer.client
+        if self.dedup_index is not None:
+            existing = self.dedup_index.contains_many(
+                client.base_app_token, client.table_id, [r["note_id"] for r in rows]
+            )
+            existing_lower = {str(n).lower() for n in existing}
+            done = [r for r in rows if str(r["note_id"]).lower() in existing_lower]
+            if done:
+                self.outbox.ack([r["id"] for r in done])
+                self.stats["skipped_existing"] += len(done)
+                for r in done:
+                    self._notify(r["id"], {"note_id": r["note_id"], "ok": True, "record_id": None, "error": None})
+                rows = [r for r in rows if str(r["note_id"]).lower() not in existing_lower]
+            if not rows:
+                return len(done)
+
+        acked: List[int] = []
+
+        def on_result(result, _row):
+            if result.get("ok"):
+                acked.append(_row["id"])
+                if self.dedup_index is not None and result.get("note_id"):
+                    self.dedup_index.add(client.base_app_token, client.table_id, str(result["note_id"]))
+            else:
+                error = result.get("error") or "未知错误"
+                if _row["attempts"] + 1 >= self.max_attempts:
+                    self.outbox.move_to_dead_letter(_row["id"], error)
+                    self.stats["dead"] += 1
+                    print(f"[发件箱] sink={sink_key} id={_row['note_id']} 已重试 {_row['attempts'] + 1} 次仍失败，移入死信: {error}")
+                else:
+                    self.outbox.retry_later(_row["id"], error, int(time.time() * 1000) + self._backoff_ms(_row["attempts"]))
+                    self.stats["retried"] += 1
+            self._notify(_row["id"], result)
+
+        for row in rows:
+            await writer.add(row["note"], on_result=lambda result, _row=row: on_result(result, _row))
+        await writer.flush()
+        self.outbox.ack(acked)
+        self.stats["written"] += len(acked)
+        return len(rows)
+
+    def _notify(self, row_id: int, result: Dict[str, Any]):
+        for callback in self._callbacks.pop(row_id, []):
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"[发件箱] 回调异常: {e}")
+
+    async def close(self):
+        """停止后台循环并写入所有到期记录；仍在退避中的记录留在发件箱，下次运行或 python outbox.py flush 时写入。"""
+        self._closing = True
+        self._wake.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception:
+                pass
+            self._task = None
+        while await self.flush_due(force=True):
+            pass
+        # 本次未能写入的记录：回调按失败通知，避免等待方一直挂起
+        for row_id in list(self._callbacks):
+            self._notify(row_id, {"note_id": None, "ok": False, "record_id": None, "error": "已保留在发件箱，稍后重试"})
+
+    def format_stats(self) -> str:
+        s = self.stats
+        counts = self.outbox.counts().values()
+        pending = sum(c["pending"] for c in counts)
+        dead = sum(c["dead"] for c in counts)
+        return (
+            f"[发件箱] 本次写入 {s['written']} 条，已存在跳过 {s['skipped_existing']} 条，"
+            f"重试 {s['retried']} 次，移入死信 {s['dead']} 条；剩余待写入 {pending} 条，死信共 {dead} 条"
+        )
+
+
+class OutboxSinkWriter:
+    """与 FeishuBatchWriter 相同的 add / close 接口：add 只把记录追加到发件箱，立即返回，由 OutboxFlusher 后台写入。
+    close 请求立即写入并等待本写入器提交的记录有首次写入结果（失败的记录仍留在发件箱重试），
+    最多等待 OUTBOX_CLOSE_TIMEOUT_SECONDS 秒，超时仍无结果的记录按“已保留在发件箱”通知。"""
+
+    def __init__(self, flusher: OutboxFlusher, sink_key: str, *, task: str = ""):
+        self.flusher = flusher
+        self.name = sink_key
+        self.task = task
+        self._done: Dict[int, asyncio.Future] = {}
+        self.close_timeout_sec = max(1.0, float(getattr(config, "OUTBOX_CLOSE_TIMEOUT_SECONDS", 300) or 300))
+
+    async def add(self, note_data: Dict[str, Any], on_result: Optional[Callable[[Dict[str, Any]], None]] = None):
+        future = asyncio.get_running_loop().create_future()
+
+        def _callback(result, _future=future):
+            if on_result is not None:
+                on_result(result)
+            if not _future.done():
+                _future.set_result(result)
+
+        row_id = self.flusher.submit(self.name, note_data, task=self.task, on_result=_callback)
+        self._done[row_id] = future
+
+    async def close(self):
+        pending = [f for f in self._done.values() if not f.done()]
+        if pending:
+            self.flusher.request_flush(self.name)
+            await asyncio.wait(pending, timeout=self.close_timeout_sec)
+            timed_out = [row_id for row_id, f in self._done.items() if not f.done()]
+            if timed_out:
+                print(f"[发件箱] sink={self.name} 等待写入超时（{self.close_timeout_sec:.0f}s），{len(timed_out)} 条保留在发件箱稍后写入")
+                for row_id in timed_out:
+                    self.flusher._notify(row_id, {"note_id": None, "ok": False, "record_id": None,
+                                                  "error": "已保留在发件箱，稍后重试"})
+        self._done.clear()
+
+
+async def _flush_cli(sink: Optional[str]):
+    from playwright.async_api import async_playwright
+    from dedup_index import DedupIndex
+    from feishu_cache import get_feishu_cache
+
+    outbox = Outbox()
+    dedup_index = None
+    if getattr(config, "FEISHU_DEDUP_MODE", "local") == "local":
+        try:
+            dedup_index = DedupIndex()
+        except Exception as e:
+            print(f"[去重索引] 打开本地索引失败，写入前不做本地去重: {e}")
+    async with async_playwright() as p:
+        request_context = await p.request.new_context()
+        flusher = OutboxFlusher(outbox, request_context, dedup_index=dedup_index)
+        try:
+            while await flusher.flush_due(force=True, sinks={sink} if sink else None):
+                pass
+            print(flusher.format_stats())
+        finally:
+            await get_feishu_cache().close()
+            await request_context.dispose()
+            if dedup_index is not None:
+                dedup_index.close()
+            outbox.close()
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="飞书写入发件箱：查看状态、立即写入、查看/重放死信")
+    parser.add_argument("command", choices=["status", "flush", "dead", "requeue"],
+                        help="status 各 sink 待写入/死信条数；flush 立即写入到期记录；dead 列出死信；requeue 把死信放回发件箱")
+    parser.add_argument("--sink", default=None, help="只处理指定 sink")
+    parser.add_argument("--limit", type=int, default=50, help="dead 命令最多列出的条数")
+    args = parser.parse_args()
+
+    if args.command == "flush":
+        asyncio.run(_flush_cli(args.sink))
+        return
+    outbox = Outbox()
+    try:
+        if args.command == "status":
+            counts = outbox.counts()
+            if not counts:
+                print(f"[发件箱] {outbox.path} 为空")
+            for sink, c in sorted(counts.items()):
+                if args.sink and sink != args.sink:
+                    continue
+                print(f"sink={sink}: 待写入 {c['pending']} 条，死信 {c['dead']} 条")
+        elif args.command == "dead":
+            for row in outbox.dead_letters(args.sink, args.limit):
+                failed_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["failed_ms"] / 1000))
+                print(f"sink={row['sink']} id={row['note_id']} 重试 {row['attempts']} 次 {failed_at} 原因={row['last_error']}")
+        elif args.command == "requeue":
+            moved = outbox.requeue_dead(args.sink)
+            print(f"[发件箱] 已把 {moved} 条死信放回发件箱，下次运行或 python outbox.py flush 时写入")
+    finally:
+        outbox.close()
+
+
+if __name__ == "__main__":
+    _main()
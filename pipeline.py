@@ -0,0 +1,154 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import config
+
+
+class StopPipeline(Exception):
+    """阶段函数抛出后流水线立即停止：不再接收新条目，取消所有在途条目（如小红书连续过期时结束账号）。"""
+
+
+# 被前面阶段丢弃的条目在有序阶段前仍需占位，保证后续条目按顺序放行
+_DROPPED = object()
+
+
+class Stage:
+    """
+    流水线中的一个阶段：fn(item) 返回交给下一阶段的值，返回 None 表示丢弃该条目。
+    - concurrency：同时处理的条目数；
+    - ordered：按条目进入流水线的顺序处理（并发固定为 1），用于需要保持列表顺序的校验/写入。
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Awaitable[Any]], *,
+                 concurrency: int = 1, ordered: bool = False):
+        self.name = name
+        self.fn = fn
+        self.ordered = ordered
+        self.concurrency = 1 if ordered else max(1, int(concurrency or 1))
+
+
+class Pipeline:
+    """
+    由有界 asyncio.Queue 串联的多阶段流水线（如 预过滤 → 详情抓取 → 校验/写入），各阶段按各自的并发数同时运行，
+    上一阶段的结果立即交给下一阶段，不必等整批完成。
+
+    - 背压：阶段之间的队列最多缓存 queue_size 条，下游处理不过来时上游自动等待；
+    - limit：最终阶段接受（返回非 None）的条目达到 limit 后停止；已接受 + 在途条目不超过 limit，
+      避免为注定用不上的条目抓详情；
+    - 运行结束后：accepted 为最终接受条数，exhausted 表示输入已全部进入流水线，stopped 表示被 StopPipeline 终止。
+    """
+
+    def __init__(self, stages: List[Stage], *, limit: Optional[int] = None,
+                 queue_size: Optional[int] = None, name: str = ""):
+        if not stages:
+            raise ValueError("Pipeline 至少需要一个阶段")
+        self.stages = stages
+        self.limit = limit
+        size = queue_size or int(getattr(config, "PIPELINE_QUEUE_SIZE", 8) or 8)
+        self.queue_size = max(1, int(size))
+        self.name = name
+        self.accepted = 0
+        self.exhausted = False
+        self.stopped = False
+        self.dropped: Dict[str, int] = {s.name: 0 for s in stages}
+        self.errors = 0
+        self._in_flight = 0
+        self._feed_done = False
+        self._done = asyncio.Event()
+        self._cond = asyncio.Condition()
+        self._queues: List[asyncio.Queue] = []
+        # 有序阶段的重排缓冲：{阶段下标: {序号: 条目}}，以及各有序阶段下一个应放行的序号
+        self._reorder: Dict[int, Dict[int, Any]] = {}
+        self._next_seq: Dict[int, int] = {}
+        # 某阶段之后是否还有有序阶段：没有时被丢弃的条目可以直接结束，不必占位
+        self._ordered_after = [any(s.ordered for s in stages[i + 1:]) for i in range(len(stages))]
+
+    async def run(self, items: Iterable[Any]) -> "Pipeline":
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        workers = []
+        for idx, stage in enumerate(self.stages):
+            if stage.ordered:
+                self._reorder[idx] = {}
+                self._next_seq[idx] = 0
+            workers.extend(asyncio.create_task(self._worker(idx)) for _ in range(stage.concurrency))
+        feeder = asyncio.create_task(self._feed(items))
+        try:
+            await self._done.wait()
+        finally:
+            for t in (feeder, *workers):
+                t.cancel()
+            await asyncio.gather(feeder, *workers, return_exceptions=True)
+        return self
+
+    async def _feed(self, items: Iterable[Any]):
+        seq = 0
+        iterator = iter(items)
+        while True:
+            async with self._cond:
+                while self.limit is not None and self.accepted + self._in_flight >= self.limit:
+                    if self._in_flight == 0:
+                        break
+                    await self._cond.wait()
+                if self.limit is not None and self.accepted >= self.limit:
+                    # 已达上限：输入中是否还有剩余条目决定了调用方是否视为“未处理完”
+                    self.exhausted = next(iterator, _DROPPED) is _DROPPED
+                    break
+                item = next(iterator, _DROPPED)
+                if item is _DROPPED:
+                    self.exhausted = True
+                    break
+                self._in_flight += 1
+            await self._queues[0].put((seq, item))
+            seq += 1
+        self._feed_done = True
+        async with self._cond:
+            self._check_done()
+
+    def _check_done(self):
+        if self._feed_done and self._in_flight == 0:
+            self._done.set()
+
+    async def _finish(self, accepted: bool):
+        async with self._cond:
+            self._in_flight -= 1
+            if accepted:
+                self.accepted += 1
+            self._cond.notify_all()
+            self._check_done()
+
+    async def _worker(self, idx: int):
+        queue = self._queues[idx]
+        while True:
+            seq, item = await queue.get()
+            if not self.stages[idx].ordered:
+                await self._process(idx, seq, item)
+                continue
+            buffer = self._reorder[idx]
+            buffer[seq] = item
+            while self._next_seq[idx] in buffer:
+                cur = self._next_seq[idx]
+                self._next_seq[idx] = cur + 1
+                await self._process(idx, cur, buffer.pop(cur))
+
+    async def _process(self, idx: int, seq: int, item: Any):
+        stage = self.stages[idx]
+        result = _DROPPED
+        if item is not _DROPPED:
+            try:
+                result = await stage.fn(item)
+            except StopPipeline:
+                self.stopped = True
+                self._done.set()
+                return
+            except Exception as e:
+                self.errors += 1
+                print(f"[流水线] {self.name} 阶段 {stage.name} 出错: {e}")
+                result = None
+            if result is None:
+                self.dropped[stage.name] += 1
+                result = _DROPPED
+        last = idx == len(self.stages) - 1
+        if last or (result is _DROPPED and not self._ordered_after[idx]):
+            await self._finish(result is not _DROPPED)
+            return
+        await self._queues[idx + 1].put((seq, result))
@@ -0,0 +1,146 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import config
+import metrics
+
+
+class _TokenBucket:
+    """
+    单个域名的令牌桶：按 rate（次/秒）补充令牌，最多积累 burst 个；每次取令牌后附加随机抖动。
+
+    自适应：收到限流/风控信号时 penalize() 将速率减半（不低于 min_rate），
+    之后每次成功 reward() 按 base_rate 的 1/10 逐步恢复，直到回到配置的速率。
+    """
+
+    def __init__(self, domain: str, *, rate: float, burst: float = 1,
+                 jitter_ms=(0, 0), min_rate: Optional[float] = None):
+        self.domain = domain
+        self.base_rate = max(0.01, float(rate))
+        self.rate = self.base_rate
+        self.burst = max(1.0, float(burst))
+        self.min_rate = max(0.01, float(min_rate if min_rate is not None else self.base_rate / 8))
+        lo, hi = (list(jitter_ms) + [0, 0])[:2] if jitter_ms else (0, 0)
+        self.jitter_ms = (max(0, int(lo)), max(0, int(hi)))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.waited_sec = 0.0
+        self.penalties = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        started = time.monotonic()
+        # 持锁排队，保证同一域名的请求按到达顺序依次取令牌
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+            lo, hi = self.jitter_ms
+            if hi > 0:
+                await asyncio.sleep(random.uniform(lo, max(lo, hi)) / 1000)
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.waited_sec += waited
+        metrics.observe("rate_limit_wait", waited)
+
+    def penalize(self, reason: str = ""):
+        new_rate = max(self.min_rate, self.rate / 2)
+        self.penalties += 1
+        if new_rate < self.rate:
+            print(f"[限速] {self.domain} 触发限流{f'（{reason}）' if reason else ''}，速率降为 {new_rate:.2f} 次/秒")
+        self.rate = new_rate
+        # 清空积累的令牌，避免降速后仍以突发方式请求
+        self._tokens = min(self._tokens, 0)
+
+    def reward(self):
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+class RateLimiter:
+    """按目标域名分桶的限速器，未配置的域名不限速。配置见 config.RATE_LIMITS。"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict]] = None):
+        limits = limits if limits is not None else (getattr(config, "RATE_LIMITS", {}) or {})
+        self._buckets: Dict[str, _TokenBucket] = {}
+        for domain, conf in limits.items():
+            if not conf or not conf.get("rate"):
+                continue
+            self._buckets[domain.lower()] = _TokenBucket(
+                domain.lower(),
+                rate=conf["rate"],
+                burst=conf.get("burst", 1),
+                jitter_ms=conf.get("jitter_ms") or (0, 0),
+                min_rate=conf.get("min_rate"),
+            )
+
+    def _bucket_for(self, target: str) -> Optional[_TokenBucket]:
+        if not target:
+            return None
+        host = target.lower()
+        if "://" in host:
+            try:
+                host = (urlparse(host).hostname or "").lower()
+            except Exception:
+                return None
+        for domain, bucket in self._buckets.items():
+            if host == domain or host.endswith("." + domain):
+                return bucket
+        return None
+
+    async def acquire(self, target: str):
+        """target 可以是完整 URL 或域名。"""
+        bucket = self._bucket_for(target)
+        if bucket is not None:
+            await bucket.acquire()
+
+    def penalize(self, target: str, reason: str = ""):
+        bucket = self._bucket_for(target)
+        if bucket is not None:
+            bucket.penalize(reason)
+
+    def reward(self, target: str):
+        bucket = self._bucket_for(target)
+        if bucket is not None:
+            bucket.reward()
+
+    def format_stats(self) -> str:
+        lines = []
+        for domain, bucket in self._buckets.items():
+            if not bucket.acquired:
+                continue
+            lines.append(
+                f"[限速] {domain}: 请求 {bucket.acquired} 次，累计等待 {bucket.waited_sec:.1f}s，"
+                f"限流降速 {bucket.penalties} 次，当前速率 {bucket.rate:.2f} 次/秒"
+            )
+        return "\n".join(lines)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """进程内共享的限速器，跨账号、跨任务生效。"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def reset_rate_limiter(limits: Optional[Dict[str, Dict]] = None) -> RateLimiter:
+    """按给定配置重建进程内限速器（如基准测试传入 {} 关闭限速），返回新的实例。"""
+    global _rate_limiter
+    _rate_limiter = RateLimiter(limits)
+    return _rate_limiter
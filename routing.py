@@ -0,0 +1,103 @@
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Route
+
+import config
+
+
+# 路由档位：
+# - off：不拦截；
+# - default：拦截视频/音频、字体、埋点上报，保留图片（DOM 引擎会读取图片尺寸与懒加载地址）；
+# - lean：在 default 基础上同时拦截图片本体，页面中的 img src 仍然保留，只丢弃二进制内容。
+# 注意：Playwright 在页面启用路由后会关闭该页面的 HTTP 缓存，需要依赖缓存时可切换为 off。
+ROUTING_PROFILES: Dict[str, Dict] = {
+    "off": {},
+    "default": {
+        "resource_types": {"media", "texttrack", "font", "ping"},
+        "block_trackers": True,
+    },
+    "lean": {
+        "resource_types": {"media", "texttrack", "font", "ping", "image"},
+        "block_trackers": True,
+    },
+}
+
+# 被拦截请求无法得知真实体积，按资源类型的经验均值估算节省的流量
+_ESTIMATED_BYTES = {
+    "image": 80 * 1024,
+    "media": 1024 * 1024,
+    "font": 40 * 1024,
+    "texttrack": 4 * 1024,
+    "ping": 512,
+    "tracker": 2 * 1024,
+}
+
+# 各平台的拦截统计：{platform: {"blocked": {类型: 次数}, "allowed": n, "estimated_bytes": n}}
+ROUTING_STATS: Dict[str, Dict] = {}
+
+
+def _stats_for(platform: str) -> Dict:
+    return ROUTING_STATS.setdefault(platform, {"blocked": {}, "allowed": 0, "estimated_bytes": 0})
+
+
+def _tracker_hosts(platform: str):
+    hosts = getattr(config, "ROUTING_TRACKER_HOSTS", {}) or {}
+    return tuple(h.lower() for h in list(hosts.get("common", [])) + list(hosts.get(platform, [])) if h)
+
+
+def _is_tracker(url: str, tracker_hosts) -> bool:
+    try:
+        host = (urlparse(url).hostname or "").lower()
+    except Exception:
+        return False
+    return any(host == h or host.endswith("." + h) for h in tracker_hosts)
+
+
+async def install_routing(page: Page, platform: str, profile: Optional[str]) -> bool:
+    """按档位为页面安装请求拦截；档位为空、off 或未知时不做任何处理，返回是否已安装。"""
+    rules = ROUTING_PROFILES.get((profile or "off").strip().lower())
+    if not rules:
+        return False
+    blocked_types = set(rules.get("resource_types") or ())
+    tracker_hosts = _tracker_hosts(platform) if rules.get("block_trackers") else ()
+    stats = _stats_for(platform)
+
+    async def _handle(route: Route):
+        request = route.request
+        kind = request.resource_type
+        if kind not in blocked_types and tracker_hosts and _is_tracker(request.url, tracker_hosts):
+            kind = "tracker"
+        if kind in blocked_types or kind == "tracker":
+            stats["blocked"][kind] = stats["blocked"].get(kind, 0) + 1
+            stats["estimated_bytes"] += _ESTIMATED_BYTES.get(kind, 0)
+            try:
+                await route.abort("blockedbyclient")
+            except Exception:
+                pass
+            return
+        stats["allowed"] += 1
+        try:
+            await route.continue_()
+        except Exception:
+            # 页面已关闭或请求已被处理
+            pass
+
+    await page.route("**/*", _handle)
+    return True
+
+
+def format_routing_stats() -> str:
+    """返回各平台拦截统计的可读摘要；没有拦截记录时返回空字符串。"""
+    lines = []
+    for platform, stats in ROUTING_STATS.items():
+        blocked = stats.get("blocked") or {}
+        total = sum(blocked.values())
+        if not total:
+            continue
+        detail = "，".join(f"{k} {v}" for k, v in sorted(blocked.items(), key=lambda kv: -kv[1]))
+        lines.append(
+            f"[请求拦截] {platform}: 拦截 {total} 个（{detail}），放行 {stats.get('allowed', 0)} 个，"
+            f"估算节省 {stats.get('estimated_bytes', 0) / 1024 / 1024:.1f} MB"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+
+import config
+
+
+class RunJournal:
+    """
+    运行日志（JSONL，逐行追加），记录每个任务/账号/内容的进度，用于中断后 --resume 续跑。
+
+    事件：
+    - run_start / run_resume / run_done：一次运行的开始、续跑与正常结束；
+    - listed：账号列表抓取结果（续跑时直接复用，不再打开主页）；
+    - detail：单条内容的详情数据（续跑时未写入的内容直接提交，不再抓详情）；
+    - written：飞书写入成功；
+    - account_done / task_done：账号/任务的全部写入已落盘（在批量写入器清空后记录）。
+
+    每条事件写入后立即 flush，收到 SIGTERM 时再 fsync 一次，进程被杀也最多丢失最后一行。
+    """
+
+    def __init__(self, path: Optional[str] = None, *, resume: bool = False):
+        self.path = path or getattr(config, "RUN_JOURNAL_PATH", "run_journal.jsonl")
+        self._listed: Dict[Tuple[str, str], List[Dict]] = {}
+        self._details: Dict[Tuple[str, str, str], Dict] = {}
+        self._written: Set[Tuple[str, str]] = set()
+        self._accounts_done: Set[Tuple[str, str]] = set()
+        self._tasks_done: Set[str] = set()
+        self.resumed = False
+        self.run_id = ""
+
+        if resume:
+            finished = self._load()
+            if self.run_id and not finished:
+                self.resumed = True
+            elif self.run_id:
+                print(f"[运行日志] {self.path} 记录的上一次运行已正常结束，本次从头开始。")
+            else:
+                print(f"[运行日志] 未找到可续跑的运行日志 {self.path}，本次从头开始。")
+        if not self.resumed:
+            self._reset_state()
+            self.run_id = uuid.uuid4().hex[:12]
+        self._fp = open(self.path, "a" if self.resumed else "w", encoding="utf-8")
+        if self.resumed:
+            self.record("run_resume")
+            print(
+                f"[运行日志] 续跑 run_id={self.run_id}：已完成任务 {len(self._tasks_done)} 个、"
+                f"账号 {len(self._accounts_done)} 个，已缓存列表 {len(self._listed)} 个、详情 {len(self._details)} 条。"
+            )
+        else:
+            self.record("run_start")
+
+    def _reset_state(self):
+        self._listed.clear()
+        self._details.clear()
+        self._written.clear()
+        self._accounts_done.clear()
+        self._tasks_done.clear()
+
+    def _load(self) -> bool:
+        """读取已有日志，返回上一次运行是否正常结束。"""
+        if not os.path.exists(self.path):
+            return False
+        finished = False
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # 进程被杀时最后一行可能不完整
+                    continue
+                ev = event.get("ev")
+                task = str(event.get("task") or "")
+                account = str(event.get("account") or "")
+                if ev == "run_start":
+                    self._reset_state()
+                    self.run_id = str(event.get("run_id") or "")
+                    finished = False
+                elif ev == "run_done":
+                    finished = True
+                elif ev == "listed":
+                    self._listed[(task, account)] = list(event.get("notes") or [])
+                elif ev == "detail":
+                    note_id = str(event.get("note_id") or "").strip().lower()
+                    if note_id and isinstance(event.get("details"), dict):
+                        self._details[(task, account, note_id)] = event["details"]
+                elif ev == "written":
+                    note_id = str(event.get("note_id") or "").strip().lower()
+                    if note_id:
+                        self._written.add((task, note_id))
+                elif ev == "account_done":
+                    self._accounts_done.add((task, account))
+                elif ev == "task_done":
+                    self._tasks_done.add(task)
+        return finished
+
+    def record(self, ev: str, **fields):
+        event = {"ev": ev, "run_id": self.run_id, "ts": int(time.time() * 1000)}
+        event.update(fields)
+        try:
+            self._fp.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+            self._fp.flush()
+        except Exception as e:
+            print(f"[运行日志] 写入失败: {e}")
+
+    def flush(self):
+        try:
+            self._fp.flush()
+            os.fsync(self._fp.fileno())
+        except Exception:
+            pass
+
+    def close(self, *, completed: bool = False):
+        if completed:
+            self.record("run_done")
+        self.flush()
+        try:
+            self._fp.close()
+        except Exception:
+            pass
+
+    # ---- 续跑查询 ----
+    def task_done(self, task: str) -> bool:
+        return task in self._tasks_done
+
+    def account_done(self, task: str, account: str) -> bool:
+        return (task, account) in self._accounts_done
+
+    def listed_notes(self, task: str, account: str) -> Optional[List[Dict]]:
+        return self._listed.get((task, account))
+
+    def cached_details(self, task: str, account: str, note_id: str) -> Optional[Dict]:
+        return self._details.get((task, account, str(note_id).strip().lower()))
+
+    def is_written(self, task: str, note_id: str) -> bool:
+        return (task, str(note_id).strip().lower()) in self._written
@@ -1,40 +1,204 @@
-import random
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
 
 from playwright.async_api import BrowserContext, Page, TimeoutError as PlaywrightTimeoutError
 
+import time_parser
+import metrics
+import watermark
+from rate_limiter import get_rate_limiter
+from routing import install_routing
+
 
 class WeiboHomeScraper:
     """
     负责抓取微博主页内容的 Playwright 封装。
     """
 
-    def __init__(self, context: BrowserContext):
+    # 微博 Web 端 JSON 接口域名
+    API_BASE = "https://weibo.com"
+    # 用户时间线接口单页约 20 条，按 since_id 游标翻页
+    TIMELINE_API_PATH = "/ajax/statuses/mymblog"
+
+    # 主页虚拟列表收集器：条目一渲染即按 data-index（无则按 mid/header id）记入缓冲，节点被回收也不会丢失
+    _SCROLLER_HARVEST_JS = """() => {
+        if (window.__wbScrollerHarvest) window.__wbScrollerHarvest.stop();
+        const normalizeHref = (u) => {
+            if (!u) return '';
+            const val = String(u).trim();
+            if (!val) return '';
+            if (/\\.(?:jpe?g|png|gif|webp|svg)(\\?|$)/i.test(val)) return '';
+            return val;
+        };
+        const linkSelectors = [
+            'a[class*="head-info_time_"]',
+            'a[href*="m.weibo.cn/detail"]',
+            'a[href*="/status/"]',
+            'a[href*="/detail/"]',
+            'a[href*="/profile/"]',
+        ];
+        const extract = (item) => {
+            const dataset = item.dataset || {};
+            const idxAttr = item.getAttribute('data-index') ?? dataset.index ?? '';
+            let idxNum = null;
+            if (idxAttr !== '') {
+                const num = Number(idxAttr);
+                if (!Number.isNaN(num)) idxNum = num;
+            }
+            const article = item.querySelector('article');
+            const header = (article && article.querySelector('header')) || item.querySelector('header');
+            let link = header ? header.querySelector('a[class*="_time_"]') : null;
+            if (!link) {
+                for (const sel of linkSelectors) {
+                    const candidate = item.querySelector(sel);
+                    if (candidate) { link = candidate; break; }
+                }
+            }
+            const headerEl = header && header.hasAttribute('id') ? header : item.querySelector('header[id]');
+            const headerId = headerEl ? (headerEl.getAttribute('id') || '') : '';
+            const headerLink = headerEl ? headerEl.querySelector('a[class*="_time_"], a[class*="time_"]') : null;
+            const authorEl = item.querySelector('a[class*="head-info_nick_"], a[class*="name"], a[node-type="feed_list_originNick"]');
+            const rect = item.getBoundingClientRect();
+            return {
+                idxRaw: idxAttr,
+                idxNum,
+                headerHref: normalizeHref(headerLink ? (headerLink.getAttribute('href') || '') : ''),
+                href: normalizeHref(link ? (link.getAttribute('href') || '') : ''),
+                rawTime: link ? (link.textContent || '').trim() : '',
+                headerId,
+                author: authorEl ? (authorEl.textContent || '').trim() : '',
+                top: (rect.top || 0) + (window.scrollY || 0),
+                mid: item.getAttribute('mid') || dataset.mid || '',
+                feedId: item.getAttribute('data-id') || dataset.id || '',
+                hasVideo: !!item.querySelector('[class*="card-video"]'),
+                // 置顶微博在正文上方带“置顶”标签
+                isPinned: Array.from(item.querySelectorAll('span, div[class*="title"], div[class*="tag"]'))
+                    .some(el => el.childElementCount === 0 && (el.textContent || '').trim() === '置顶'),
+            };
+        };
+        const WRAPPER = '.vue-recycle-scroller__item-wrapper';
+        const ITEM = '.wbpro-scroller-item';
+        const state = { seen: new Set(), buffer: [], observer: null, root: null };
+        state.record = (item) => {
+            const entry = extract(item);
+            // 尚未填充内容的占位节点跳过，等内容渲染后的下一次变更再记录
+            if (!entry.href && !entry.headerId && !entry.mid) return;
+            const key = entry.idxRaw !== '' ? 'i:' + entry.idxRaw : 'm:' + (entry.headerId || entry.mid || entry.href);
+            const contentKey = key + '|' + (entry.headerId || entry.href || entry.mid);
+            if (state.seen.has(contentKey)) return;
+            state.seen.add(contentKey);
+            state.buffer.push(entry);
+        };
+        state.scan = () => {
+            document.querySelectorAll(WRAPPER + ' ' + ITEM).forEach(state.record);
+        };
+        // 只提取本批变更涉及的条目：属性/子节点变化所在的条目，以及新插入的条目
+        const onMutations = (mutations) => {
+            const items = new Set();
+            for (const m of mutations) {
+                const owner = m.target.nodeType === 1 ? m.target.closest(ITEM) : null;
+                if (owner) items.add(owner);
+                m.addedNodes.forEach(node => {
+                    if (node.nodeType !== 1) return;
+                    if (node.matches(ITEM)) items.add(node);
+                    else node.querySelectorAll(ITEM).forEach(el => items.add(el));
+                });
+            }
+            items.forEach(state.record);
+        };
+        // 只观察虚拟列表容器；容器尚未渲染或被整体替换时，下次 attach（清空缓冲/逐屏滚动时）重新挂上
+        state.attach = () => {
+            const wrapper = document.querySelector(WRAPPER);
+            if (!wrapper || wrapper === state.root) return;
+            if (state.observer) state.observer.disconnect();
+            state.root = wrapper;
+            state.observer = new MutationObserver(onMutations);
+            state.observer.observe(wrapper, {
+                childList: true, subtree: true, attributes: true, attributeFilter: ['data-index', 'href', 'id'],
+            });
+        };
+        state.maxIndex = () => {
+            let maxIdx = -1;
+            document.querySelectorAll('.wbpro-scroller-item[data-virtual-index]').forEach(el => {
+                const v = parseInt(el.getAttribute('data-virtual-index'), 10);
+                if (!Number.isNaN(v) && v > maxIdx) maxIdx = v;
+            });
+            return maxIdx;
+        };
+        state.stop = () => {
+            if (state.observer) { state.observer.disconnect(); state.observer = null; }
+            state.root = null;
+        };
+        state.scan();
+        // 节点复用时内容与属性原地替换，回调在同一轮微任务内提取变更的条目，赶在下一次回收之前
+        state.attach();
+        window.__wbScrollerHarvest = state;
+        return state.buffer.length;
+    }"""
+
+    # 取出收集器缓冲中的条目
+    _SCROLLER_DRAIN_JS = """() => {
+        const state = window.__wbScrollerHarvest;
+        if (!state) return [];
+        state.attach();
+        state.scan();
+        const out = state.buffer;
+        state.buffer = [];
+        return out;
+    }"""
+
+    # 在一次调用内按视口高度逐屏滚到底部，让途经的每个条目都渲染一次；返回滚动前的最大 data-virtual-index
+    _SCROLLER_SWEEP_JS = """async () => {
+        const state = window.__wbScrollerHarvest;
+        const before = state ? state.maxIndex() : -1;
+        const frame = () => new Promise(r => requestAnimationFrame(() => setTimeout(r, 60)));
+        const step = Math.max(300, Math.floor((window.innerHeight || 800) * 0.8));
+        for (let i = 0; i < 50; i++) {
+            const bottom = (document.documentElement.scrollHeight || document.body.scrollHeight) - (window.innerHeight || 800);
+            if ((window.scrollY || 0) >= bottom - 2) break;
+            window.scrollBy(0, step);
+            await frame();
+            if (state) state.attach();
+        }
+        return before;
+    }"""
+
+    def __init__(self, context: BrowserContext, routing_profile: Optional[str] = None):
         self.context = context
         self.page: Optional[Page] = None
+        # 请求拦截档位（见 routing.ROUTING_PROFILES），为空时不拦截
+        self.routing_profile = routing_profile
 
     async def _new_prepared_page(self) -> Page:
         page = await self.context.new_page()
         await page.add_init_script(
             "Object.defineProperty(navigator, 'webdriver', { get: () => undefined });"
         )
+        await install_routing(page, "weibo", self.routing_profile)
         return page
 
+    async def create_prepared_page(self) -> Page:
+        """创建一个带有最小防检测脚本的新页面，供调用方在多条详情之间复用"""
+        return await self._new_prepared_page()
+
     async def _ensure_page(self) -> Page:
         if self.page is None or self.page.is_closed():
             self.page = await self._new_prepared_page()
         return self.page
 
     async def _goto_page(self, page: Page, url: str) -> None:
+        await get_rate_limiter().acquire(url)
         try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            with metrics.timed("navigation"):
+                await page.goto(url, wait_until="domcontentloaded", timeout=60000)
             return
         except PlaywrightTimeoutError:
             pass
         # In headless mode, the "load" event can hang; fall back to commit.
-        await page.goto(url, wait_until="commit", timeout=30000)
+        with metrics.timed("navigation"):
+            await page.goto(url, wait_until="commit", timeout=30000)
 
     async def close(self):
         try:
@@ -91,163 +255,16 @@ class WeiboHomeScraper:
 
     @staticmethod
     def _normalize_post_time(raw: Optional[str]) -> str:
-        if not raw:
-            return ""
-        raw_str = str(raw).strip()
-        if not raw_str:
-            return ""
-
-        now = datetime.now()
-
-        # 预处理文本：去除冗余信息、统一分隔符
-        text = raw_str.replace("\u3000", " ").replace("：", ":").replace("／", "/")
-        # 去掉来源等附加信息
-        text = re.split(r"\s*(?:来自|from)\s*", text, 1)[0]
-        text = text.split("·")[0]
-        text = re.sub(r"\s+", " ", text).strip()
-        if not text:
-            return ""
-
-        lower_text = text.lower()
-        # AM/PM 标记
-        ampm = None
-        if any(word in text for word in ("下午", "晚上", "夜间", "傍晚", "午后", "晚间")) or re.search(r"\bpm\b", lower_text):
-            ampm = "pm"
-        elif any(word in text for word in ("上午", "清晨", "凌晨", "早上")) or re.search(r"\bam\b", lower_text):
-            ampm = "am"
-
-        # 去除 AM/PM 用语后用于解析
-        text_clean = re.sub(r"(上午|下午|晚上|夜间|凌晨|清晨|早上|午后|晚间|AM|PM|am|pm)", "", text, flags=re.I).strip()
-
-        def apply_ampm(dt: datetime, include_time: bool) -> datetime:
-            if not include_time or ampm is None:
-                return dt
-            hour = dt.hour
-            if ampm == "pm" and hour < 12:
-                hour += 12
-            elif ampm == "am" and hour == 12:
-                hour = 0
-            return dt.replace(hour=hour)
-
-        def format_dt(dt: datetime, include_time: bool) -> str:
-            dt = dt.replace(microsecond=0)
-            if include_time:
-                if dt.second:
-                    return dt.strftime("%Y-%m-%d %H:%M:%S")
-                return dt.strftime("%Y-%m-%d %H:%M")
-            return dt.strftime("%Y-%m-%d")
-
-        # 相对时间（秒/分钟/小时/天/周/月/年）
-        rel_map = [
-            (r"(\d+)\s*秒前", lambda n: timedelta(seconds=n)),
-            (r"(\d+)\s*分钟前", lambda n: timedelta(minutes=n)),
-            (r"(\d+)\s*小?时前", lambda n: timedelta(hours=n)),
-            (r"(\d+)\s*天前", lambda n: timedelta(days=n)),
-            (r"(\d+)\s*周前", lambda n: timedelta(weeks=n)),
-            (r"(\d+)\s*月前", lambda n: timedelta(days=30 * n)),
-            (r"(\d+)\s*年前", lambda n: timedelta(days=365 * n)),
-        ]
-        for pat, delta_fn in rel_map:
-            mr = re.search(pat, text_clean)
-            if mr:
-                n = int(mr.group(1))
-                dt = now - delta_fn(n)
-                dt = dt.replace(microsecond=0)
-                return format_dt(dt, include_time=True)
-
-        # 特殊关键字：今天/昨天/前天
-        day_keywords = (
-            ("今天", 0),
-            ("昨日", 1),
-            ("昨天", 1),
-            ("前天", 2),
-        )
-        for keyword, days_ago in day_keywords:
-            if keyword in text_clean:
-                time_match = re.search(rf"{keyword}\s*(\d{{1,2}}):(\d{{1,2}})(?::(\d{{1,2}}))?", text_clean)
-                base_dt = (now - timedelta(days=days_ago)).replace(microsecond=0)
-                if time_match:
-                    hour = int(time_match.group(1))
-                    minute = int(time_match.group(2))
-                    second = int(time_match.group(3) or 0)
-                    dt = base_dt.replace(hour=hour, minute=minute, second=second)
-                    dt = apply_ampm(dt, include_time=True)
-                    return format_dt(dt, include_time=True)
-                dt = base_dt.replace(hour=0, minute=0, second=0)
-                return format_dt(dt, include_time=False)
-
-        if "刚刚" in text_clean:
-            return format_dt(now, include_time=True)
-
-        # 绝对日期解析
-        normalized = text_clean
-        normalized = re.sub(r"(星期|周)[一二三四五六日天]", "", normalized)
-        normalized = normalized.replace("年", "-").replace("月", "-").replace("日", "")
-        normalized = normalized.replace("/", "-").replace(".", "-")
-        normalized = re.sub(r"\s+", " ", normalized).strip(" ,-")
-
-        fmt_candidates = [
-            ("%Y-%m-%d %H:%M:%S", True),
-            ("%Y-%m-%d %H:%M", True),
-            ("%Y-%m-%d %H:%M:%S %z", True),
-            ("%Y-%m-%d", False),
-        ]
-        for fmt, include_time in fmt_candidates:
-            try:
-                dt = datetime.strptime(normalized, fmt)
-                dt = apply_ampm(dt, include_time)
-                return format_dt(dt, include_time=include_time)
-            except Exception:
-                continue
-
-        # 处理两位年份，如 "25-12-21 15:46" 表示 2025-12-21
-        yymmdd_match = re.match(
-            r"(?P<yy>\d{2})-(?P<month>\d{1,2})-(?P<day>\d{1,2})(?:\s+(?P<hour>\d{1,2}):(?P<minute>\d{1,2})(?::(?P<second>\d{1,2}))?)?$",
-            normalized,
-        )
-        if yymmdd_match:
-            yy = int(yymmdd_match.group("yy"))
-            year = 2000 + yy if yy < 100 else yy
-            month = int(yymmdd_match.group("month"))
-            day = int(yymmdd_match.group("day"))
-            hour = int(yymmdd_match.group("hour") or 0)
-            minute = int(yymmdd_match.group("minute") or 0)
-            second = int(yymmdd_match.group("second") or 0)
-            try:
-                dt = datetime(year, month, day, hour, minute, second)
-                dt = apply_ampm(dt, include_time=True)
-                return format_dt(dt, include_time=True)
-            except Exception:
-                pass
+        """把页面上的时间文本整理为 YYYY-MM-DD[ HH:MM[:SS]]，无法解析时返回空字符串。"""
+        return time_parser.format_post_time(time_parser.parse(raw))
 
-        # 处理缺少年份的情况，例如 "11-4 20:16"
-        mmdd_match = re.match(
-            r"(?P<month>\d{1,2})-(?P<day>\d{1,2})(?:\s+(?P<hour>\d{1,2}):(?P<minute>\d{1,2})(?::(?P<second>\d{1,2}))?)?$",
-            normalized,
-        )
-        if mmdd_match:
-            month = int(mmdd_match.group("month"))
-            day = int(mmdd_match.group("day"))
-            hour = int(mmdd_match.group("hour") or 0)
-            minute = int(mmdd_match.group("minute") or 0)
-            second = int(mmdd_match.group("second") or 0)
-            year = now.year
-            try:
-                dt = datetime(year, month, day, hour, minute, second)
-            except ValueError:
-                # 回退一分钟以防止无效日期
-                return ""
-            if dt > now + timedelta(days=1):
-                # 跨年情况：例如当前为 1 月，却出现 11 月，判定为上一年
-                try:
-                    dt = dt.replace(year=year - 1)
-                except ValueError:
-                    return ""
-            dt = apply_ampm(dt, include_time=bool(mmdd_match.group("hour")))
-            return format_dt(dt, include_time=bool(mmdd_match.group("hour")))
-
-        # 无法解析时返回空
-        return ""
+    @staticmethod
+    def _post_time_fields(raw: Optional[str]) -> tuple:
+        """解析一次，同时返回展示用的 post_time 与 post_timestamp。"""
+        parsed = time_parser.parse(raw)
+        if not parsed:
+            return "", None
+        return time_parser.format_post_time(parsed), time_parser.to_timestamp(parsed.dt)
 
     @staticmethod
     async def _first_text(page: Page, selectors: List[str]) -> str:
@@ -267,40 +284,208 @@ class WeiboHomeScraper:
                 continue
         return ""
 
+    @staticmethod
+    def _parse_uid(user_url: str) -> str:
+        try:
+            path = urlparse(user_url).path
+        except Exception:
+            path = user_url or ""
+        m = re.match(r"^/(?:u/|profile/)?(\d{5,})(?:/|$)", path or "")
+        return m.group(1) if m else ""
+
+    @staticmethod
+    def _parse_created_at(raw: Optional[str]) -> Optional[datetime]:
+        """解析接口返回的 created_at，如 "Sat Oct 18 10:23:45 +0800 2025"，返回本地时间（naive）。"""
+        return time_parser.parse_post_time(raw)
+
+    async def _api_get_json(self, path: str, params: Dict, referer: str) -> Optional[Dict]:
+        """使用浏览器上下文（共享登录 Cookie）请求微博 JSON 接口。"""
+        headers = {
+            "Accept": "application/json, text/plain, */*",
+            "Referer": referer,
+            "X-Requested-With": "XMLHttpRequest",
+        }
+        try:
+            cookies = await self.context.cookies(self.API_BASE)
+            xsrf = next((c.get("value") for c in cookies if c.get("name") == "XSRF-TOKEN"), "")
+            if xsrf:
+                headers["X-XSRF-TOKEN"] = xsrf
+        except Exception:
+            pass
+        limiter = get_rate_limiter()
+        await limiter.acquire(self.API_BASE)
+        resp = await self.context.request.get(
+            f"{self.API_BASE}{path}", params=params, headers=headers, timeout=20000
+        )
+        resp_url = (resp.url or "").lower()
+        if "passport.weibo.com" in resp_url or "weibo.com/login" in resp_url:
+            raise RuntimeError("微博登录状态已失效，请重新运行 weibo_login_helper.py 更新会话。")
+        # 微博对频繁请求返回 414/418/429，降低后续请求速率
+        if resp.status in (414, 418, 429):
+            limiter.penalize(self.API_BASE, f"HTTP {resp.status}")
+        elif resp.ok:
+            limiter.reward(self.API_BASE)
+        if not resp.ok:
+            print(f"[WeiboHomeScraper] 接口 {path} 请求失败: HTTP {resp.status}")
+            return None
+        try:
+            data = await resp.json()
+        except Exception:
+            print(f"[WeiboHomeScraper] 接口 {path} 未返回 JSON，可能需要重新登录。")
+            return None
+        return data if isinstance(data, dict) else None
+
+    # api 详情引擎从列表条目复用的 status 字段；其余字段（评论预览、可见性、标签等）不随条目保存，避免撑大运行日志
+    _DETAIL_STATUS_KEYS = (
+        "mblogid", "idstr", "created_at", "text_raw", "isLongText", "page_info",
+        "pic_ids", "pic_infos", "mix_media_info", "attitudes_count", "comments_count", "reposts_count",
+    )
+
+    @classmethod
+    def _slim_status(cls, status: Dict) -> Dict:
+        """只保留 _scrape_post_details_via_api 用到的字段（转发的原微博同样裁剪）。"""
+        slim = {k: status[k] for k in cls._DETAIL_STATUS_KEYS if k in status}
+        user = status.get("user")
+        if isinstance(user, dict):
+            slim["user"] = {k: user[k] for k in ("idstr", "id", "screen_name") if k in user}
+        retweeted = status.get("retweeted_status")
+        if isinstance(retweeted, dict):
+            slim["retweeted_status"] = cls._slim_status(retweeted)
+        return slim
+
+    def _entry_from_status(self, status: Dict, idx: int) -> Optional[Dict]:
+        """将时间线接口中的单条微博转换为与 DOM 列表一致的条目结构。"""
+        if not isinstance(status, dict):
+            return None
+        user = status.get("user") or {}
+        uid = str(user.get("idstr") or user.get("id") or "")
+        mblogid = str(status.get("mblogid") or "")
+        mid = str(status.get("mid") or status.get("idstr") or status.get("id") or "")
+        note_id = mblogid or mid
+        if not note_id:
+            return None
+        url = f"{self.API_BASE}/{uid}/{note_id}" if uid else f"{self.API_BASE}/detail/{note_id}"
+        created = self._parse_created_at(status.get("created_at"))
+        post_time = ""
+        if created:
+            post_time = time_parser.format_post_time(time_parser.ParsedTime(created, True))
+        page_info = status.get("page_info") or {}
+        return {
+            "idx": idx,
+            "idx_raw": idx,
+            "note_id": note_id,
+            "mid": mid,
+            "url": url,
+            "raw_href": url,
+            "header_href": url,
+            "post_time": post_time,
+            "post_timestamp": time_parser.to_timestamp(created),
+            "author_name": user.get("screen_name") or "",
+            "raw_time": status.get("created_at") or "",
+            "top": float(idx),
+            "is_video": page_info.get("object_type") == "video",
+            "is_pinned": status.get("isTop") in (1, True) or status.get("mblogtype") == 2,
+            "status": self._slim_status(status),
+        }
+
+    async def _scrape_home_posts_via_api(self, user_url: str, max_posts: int, scrolls: int,
+                                         stop_at: Optional[Dict] = None) -> Optional[List[Dict]]:
+        """按 since_id 游标翻页请求用户时间线 JSON；无法识别 uid 或接口不可用时返回 None。"""
+        uid = self._parse_uid(user_url)
+        if not uid:
+            print(f"[WeiboHomeScraper] 无法从 {user_url} 解析 uid，改用页面抓取。")
+            return None
+        referer = f"{self.API_BASE}/u/{uid}"
+        entries: List[Dict] = []
+        seen_ids: set[str] = set()
+        since_id = ""
+        max_pages = max(scrolls + 1, -(-max_posts // 10), 2)
+        for page_no in range(1, max_pages + 1):
+            params = {"uid": uid, "page": page_no, "feature": 0}
+            if since_id:
+                params["since_id"] = since_id
+            data = await self._api_get_json(self.TIMELINE_API_PATH, params, referer)
+            if data is None or data.get("ok") not in (1, True):
+                return entries if entries else None
+            payload = data.get("data") or {}
+            statuses = payload.get("list") or []
+            added = 0
+            for status in statuses:
+                entry = self._entry_from_status(status, len(entries))
+                if not entry or entry["note_id"] in seen_ids:
+                    continue
+                seen_ids.add(entry["note_id"])
+                entries.append(entry)
+                added += 1
+            print(f"[WeiboHomeScraper] 时间线第 {page_no} 页返回 {len(statuses)} 条，新增 {added} 条。")
+            since_id = str(payload.get("since_id") or "")
+            if watermark.find_position(entries, stop_at) is not None:
+                print("[WeiboHomeScraper] 已到达上次水位线，停止翻页。")
+                break
+            if len(entries) >= max_posts or not statuses or not added or not since_id:
+                break
+        print(f"[WeiboHomeScraper] 共收集 {len(entries)} 条帖子（接口）。")
+        return entries[:max_posts]
+
     async def scrape_home_posts(
         self,
         user_url: str,
         max_posts: int = 20,
         scrolls: int = 1,
+        engine: str = "api",
+        stop_at: Optional[Dict] = None,
     ) -> List[Dict]:
         """
         爬取微博主页的内容列表。
+        engine="api" 时通过时间线 JSON 接口分页获取，接口不可用时回退到页面滚动抓取（"dom"）。
+        stop_at 为该账号的增量水位线（见 watermark.py），翻页/滚动到水位线即停止，截断交给调用方。
         """
+        if engine == "api":
+            try:
+                entries = await self._scrape_home_posts_via_api(user_url, max_posts, scrolls, stop_at=stop_at)
+            except RuntimeError:
+                raise
+            except Exception as e:
+                print(f"[WeiboHomeScraper] 时间线接口异常: {e}")
+                entries = None
+            if entries is not None:
+                return entries
+        return await self._scrape_home_posts_via_dom(user_url, max_posts, scrolls, stop_at=stop_at)
+
+    async def _scrape_home_posts_via_dom(
+        self,
+        user_url: str,
+        max_posts: int = 20,
+        scrolls: int = 1,
+        stop_at: Optional[Dict] = None,
+    ) -> List[Dict]:
+        """页面滚动抓取：在虚拟列表中逐屏收集条目。"""
         page = await self._ensure_page()
         await self._goto_page(page, user_url)
 
         try:
-            await page.wait_for_selector(
-                'article, div[class*="vue-recycle-list"], div[class*="Feed"]',
-                timeout=20000,
-            )
+            with metrics.timed("selector_wait"):
+                await page.wait_for_selector(
+                    'article, div[class*="vue-recycle-list"], div[class*="Feed"]',
+                    timeout=20000,
+                )
         except Exception:
-            await page.wait_for_timeout(2000)
+            with metrics.timed("sleep"):
+                await page.wait_for_timeout(2000)
 
         # 初次加载后等待，确保首屏渲染完整
-        await page.wait_for_timeout(1000)
+        with metrics.timed("sleep"):
+            await page.wait_for_timeout(1000)
         await self._ensure_logged_in(page)
 
-        seen_ids: set[str] = set()
         collected_by_idx: Dict[int, Dict] = {}
-        collected_order: List[Dict] = []
+        collected_by_id: Dict[str, Dict] = {}
 
         def _parse_idx(raw_val, num_val) -> Optional[int]:
             if raw_val is not None:
                 raw_str = str(raw_val).strip()
                 if raw_str:
-                    import re as _re
-                    m = _re.search(r"-?\d+", raw_str)
+                    m = re.search(r"-?\d+", raw_str)
                     if m:
                         try:
                             return int(m.group(0))
@@ -315,274 +500,116 @@ class WeiboHomeScraper:
                     pass
             return None
 
-        async def collect_current(stage: str) -> bool:
-            """采集当前 wrapper 中的所有条目，按 data-index 去重并收集。"""
-            start_scroll: Optional[float] = None
-            targeted_indices: set[int] = set()
-
-            def _next_missing_idx() -> int:
-                idx = 0
-                while idx in collected_by_idx:
-                    idx += 1
-                return idx
-
-            def _stage_target_limit() -> Optional[int]:
-                if "首屏" in stage or "滚动前" in stage:
-                    return 3
-                return None
-
-            target_limit = _stage_target_limit()
-
-            attempt = 0
-            max_attempts = 4
-            while attempt < max_attempts:
-                data = await page.evaluate(
-                    """() => {
-                        const wrapper = document.querySelector('.vue-recycle-scroller__item-wrapper');
-                        if (!wrapper) return [];
-                        const items = Array.from(wrapper.querySelectorAll('.wbpro-scroller-item'));
-                        return items.map((item, order) => {
-                            const dataset = item.dataset || {};
-                            const idxAttr = item.getAttribute('data-index') ?? dataset.index ?? '';
-                            let idxNum = null;
-                            if (idxAttr !== undefined && idxAttr !== null && idxAttr !== '') {
-                                const num = Number(idxAttr);
-                                if (!Number.isNaN(num)) {
-                                    idxNum = num;
-                                }
-                            }
-                            const article = item.querySelector('article');
-                            const header = (article && article.querySelector('header')) || item.querySelector('header');
-                            const timeLink = header ? header.querySelector('a[class*=\"_time_\"]') : null;
-                            const linkSelectors = [
-                                'a[class*=\"head-info_time_\"]',
-                                'a[href*=\"m.weibo.cn/detail\"]',
-                                'a[href*=\"/status/\"]',
-                                'a[href*=\"/detail/\"]',
-                                'a[href*=\"/profile/\"]',
-                            ];
-                            let link = timeLink || null;
-                            if (!link) {
-                                for (const sel of linkSelectors) {
-                                    const candidate = item.querySelector(sel);
-                                    if (candidate) { link = candidate; break; }
-                                }
-                            }
-                            const normalizeHref = (u) => {
-                                if (!u) return '';
-                                const val = String(u).trim();
-                                if (!val) return '';
-                                if (/\\.(?:jpe?g|png|gif|webp|svg)(\\?|$)/i.test(val)) return '';
-                                return val;
-                            };
-                            const headerEl = header && header.hasAttribute('id') ? header : item.querySelector('header[id]');
-                            const headerId = headerEl ? (headerEl.getAttribute('id') || '') : '';
-                            const headerLink = headerEl ? headerEl.querySelector('a[class*=\"_time_\"], a[class*=\"time_\"]') : null;
-                            const headerHref = normalizeHref(headerLink ? (headerLink.getAttribute('href') || '') : '');
-                            const href = normalizeHref(link ? (link.getAttribute('href') || '') : '');
-                            const rawTime = link ? (link.textContent || '').trim() : '';
-                            const rect = item.getBoundingClientRect();
-                            const authorEl = item.querySelector('a[class*=\"head-info_nick_\"], a[class*=\"name\"], a[node-type=\"feed_list_originNick\"]');
-                            const author = authorEl ? (authorEl.textContent || '').trim() : '';
-                            const mid = item.getAttribute('mid') || dataset.mid || '';
-                            const feedId = item.getAttribute('data-id') || dataset.id || '';
-                            const hasVideo = !!item.querySelector('[class*="card-video"]');
-                            return {
-                                idxRaw: idxAttr,
-                                idxNum,
-                                order,
-                                headerHref,
-                                href,
-                                rawTime,
-                                headerId,
-                                author,
-                                top: (rect.top || 0) + (window.scrollY || 0),
-                                mid,
-                                feedId,
-                                hasVideo,
-                            };
-                        });
-                    }"""
-                )
-                if not isinstance(data, list):
-                    return False
-
-                def _sort_key(item):
-                    idx_val = _parse_idx(item.get("idxRaw"), item.get("idxNum"))
-                    top_val = item.get("top", float("inf"))
-                    order_val = item.get("order", 0)
-                    if idx_val is None:
-                        return (float("inf"), top_val, order_val)
-                    return (idx_val, top_val, order_val)
-
-                data_sorted = sorted(data, key=_sort_key)
-
-                before_count = len(collected_by_idx)
-                suffix = "" if attempt == 0 else f" (nudge {attempt})"
-                print(f"[WeiboHomeScraper] {stage}{suffix} 当前 wrapper 条目：")
-                for entry in data_sorted:
-                    idx_val = _parse_idx(entry.get("idxRaw"), entry.get("idxNum"))
-                    if idx_val is None and entry.get("idxRaw"):
-                        print(f"[WeiboHomeScraper] 无法解析 idxRaw={entry.get('idxRaw')} idxNum={entry.get('idxNum')} order={entry.get('order')} top={entry.get('top')}")
-                    header_href = entry.get("headerHref") or ""
-                    href = header_href or entry.get("href") or ""
-                    candidate_mid = entry.get("mid") or entry.get("feedId") or ""
-                    header_id = entry.get("headerId") or ""
-                    note_id = header_id or self._normalize_post_id(href)
-                    if not note_id and candidate_mid:
-                        note_id = candidate_mid.strip()
-                    if not note_id:
-                        raw_href = href or ""
-                        if raw_href:
-                            import urllib.parse as _urlparse
-                            try:
-                                parsed = _urlparse.urlparse(raw_href)
-                                qs = _urlparse.parse_qs(parsed.query or "")
-                                for key in ("mid", "id", "rid", "weibo_id"):
-                                    if key in qs and qs[key]:
-                                        note_id = qs[key][0]
-                                        break
-                            except Exception:
-                                note_id = None
-                    raw_time = entry.get("rawTime") or ""
-                    author_name = entry.get("author") or ""
-                    top_val = entry.get("top", float("inf"))
-                    idx_display = entry.get("idxRaw")
-                    if idx_display is None or idx_display == "":
-                        idx_display = idx_val if idx_val is not None else "N/A"
-                    is_new_idx = idx_val is not None and idx_val not in collected_by_idx
-                    is_new_note = note_id and note_id not in seen_ids
-                    tag = "     "
-
-                    if is_new_idx:
-                        post_time = self._normalize_post_time(raw_time)
-                        entry_data = {
-                            "idx": idx_val,
-                            "idx_raw": idx_display,
-                            "note_id": note_id or "",
-                            "url": self._normalize_url(href),
-                            "raw_href": href,
-                            "header_href": header_href,
-                            "post_time": post_time,
-                            "author_name": author_name,
-                            "raw_time": raw_time,
-                            "top": top_val,
-                            "is_video": bool(entry.get("hasVideo")),
-                        }
-                        collected_by_idx[idx_val] = entry_data
-                        collected_order.append(entry_data)
-                        tag = "(new-idx)"
-                    elif is_new_note:
-                        tag = "(new-note)"
-
-                    if is_new_note:
-                        seen_ids.add(note_id)
-
-                    print(
-                        f"  idx={idx_display} {tag} note_id={note_id or 'N/A'} header_id={header_id or 'N/A'} time_text={raw_time} author={author_name} href={href} header_href={header_href or 'N/A'} mid={candidate_mid or ''} top={top_val:.1f}"
-                    )
-                    if is_new_idx and len(collected_by_idx) >= max_posts:
-                        return True
-
-                added_new = len(collected_by_idx) > before_count
-                if len(collected_by_idx) >= max_posts:
-                    return True
-
-                next_missing = _next_missing_idx()
-                need_more = target_limit is not None and next_missing <= target_limit
-                if need_more:
-                    try:
-                        targeted_indices.add(next_missing)
-                        target_found = await page.evaluate(
-                            """(idx) => {
-                                const wrapper = document.querySelector('.vue-recycle-scroller__item-wrapper');
-                                if (!wrapper) return false;
-                                const selectors = [
-                                    `.wbpro-scroller-item[data-index='${idx}']`,
-                                    `.wbpro-scroller-item[data-virtual-index='${idx}']`,
-                                    `.wbpro-scroller-item[data-index="${idx}"]`,
-                                    `.wbpro-scroller-item[data-virtual-index="${idx}"]`
-                                ];
-                                let el = null;
-                                for (const sel of selectors) {
-                                    el = wrapper.querySelector(sel);
-                                    if (el) break;
-                                }
-                                if (el) {
-                                    el.style.outline = '2px solid rgba(255,0,0,0.3)';
-                                    if (typeof el.scrollIntoView === 'function') {
-                                        el.scrollIntoView({ block: 'center' });
-                                        return true;
-                                    }
-                                }
-                                return false;
-                            }""",
-                            next_missing,
-                        )
-                        if target_found:
-                            await page.wait_for_timeout(600)
-                            continue
-                    except Exception:
-                        pass
-
-                if need_more:
-                    # 仍有缺失索引需要加载，尝试轻推
-                    pass
-                else:
-                    if added_new:
-                        return False
-                    else:
-                        break
-
-                if attempt < max_attempts - 1:
+        def _absorb(items, stage: str) -> int:
+            """把收集器缓冲中的条目整理后并入结果，返回新增条数。"""
+            added = 0
+            for entry in items or []:
+                idx_val = _parse_idx(entry.get("idxRaw"), entry.get("idxNum"))
+                header_href = entry.get("headerHref") or ""
+                href = header_href or entry.get("href") or ""
+                candidate_mid = entry.get("mid") or entry.get("feedId") or ""
+                header_id = entry.get("headerId") or ""
+                note_id = header_id or self._normalize_post_id(href)
+                if not note_id and candidate_mid:
+                    note_id = candidate_mid.strip()
+                if not note_id and href:
                     try:
-                        if start_scroll is None:
-                            start_scroll = await page.evaluate("() => window.scrollY || 0")
-                        await page.evaluate(
-                            """(step) => {
-                                const current = window.scrollY || 0;
-                                const vh = window.innerHeight || 800;
-                                const base = Math.max(vh * 0.4, 220);
-                                const extra = Math.min(vh * 0.35, 280);
-                                const offset = base + extra * step;
-                                window.scrollTo(0, current + offset);
-                            }""",
-                            attempt,
-                        )
-                        await page.wait_for_timeout(300)
-                        if start_scroll is not None:
-                            await page.evaluate(
-                                """(target) => { window.scrollTo(0, target); }""",
-                                start_scroll,
-                            )
-                        await page.wait_for_timeout(250)
+                        qs = parse_qs(urlparse(href).query or "")
+                        for key in ("mid", "id", "rid", "weibo_id"):
+                            if key in qs and qs[key]:
+                                note_id = qs[key][0]
+                                break
                     except Exception:
-                        pass
-                    attempt += 1
+                        note_id = None
+                if idx_val is not None and idx_val in collected_by_idx:
                     continue
-                break
-            return len(collected_by_idx) >= max_posts
+                if idx_val is None and (not note_id or note_id in collected_by_id):
+                    continue
+                raw_time = entry.get("rawTime") or ""
+                post_time, post_timestamp = self._post_time_fields(raw_time)
+                idx_display = entry.get("idxRaw")
+                if idx_display is None or idx_display == "":
+                    idx_display = idx_val if idx_val is not None else "N/A"
+                entry_data = {
+                    "idx": idx_val,
+                    "idx_raw": idx_display,
+                    "note_id": note_id or "",
+                    "url": self._normalize_url(href),
+                    "raw_href": href,
+                    "header_href": header_href,
+                    "post_time": post_time,
+                    "post_timestamp": post_timestamp,
+                    "author_name": entry.get("author") or "",
+                    "raw_time": raw_time,
+                    "top": entry.get("top", float("inf")),
+                    "is_video": bool(entry.get("hasVideo")),
+                    "is_pinned": bool(entry.get("isPinned")),
+                }
+                if idx_val is not None:
+                    collected_by_idx[idx_val] = entry_data
+                if note_id:
+                    collected_by_id.setdefault(note_id, entry_data)
+                added += 1
+                print(
+                    f"  [{stage}] idx={idx_display} note_id={note_id or 'N/A'} header_id={header_id or 'N/A'} "
+                    f"time_text={raw_time} author={entry_data['author_name']} href={href} mid={candidate_mid or ''}"
+                )
+            return added
+
+        def _collected_count() -> int:
+            return len(collected_by_idx) + sum(1 for e in collected_by_id.values() if e.get("idx") is None)
 
-        await collect_current("首屏")
+        # 虚拟列表会回收节点：在页面内用 MutationObserver 记录每个渲染出来的条目，滚动后一次性取出缓冲
+        try:
+            await page.evaluate(self._SCROLLER_HARVEST_JS)
+            _absorb(await page.evaluate(self._SCROLLER_DRAIN_JS), "首屏")
+        except Exception as e:
+            print(f"[WeiboHomeScraper] 安装条目收集器失败: {e}")
 
+        stalls = 0
         for scroll_idx in range(max(0, scrolls)):
-            if await collect_current(f"第 {scroll_idx + 1} 次滚动前"):
+            if _collected_count() >= max_posts:
                 break
-            await page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
-            await page.wait_for_timeout(1000)
-            if await collect_current(f"第 {scroll_idx + 1} 次滚动后"):
+            if watermark.find_position(list(collected_by_idx.values()) + list(collected_by_id.values()), stop_at) is not None:
+                print("[WeiboHomeScraper] 已到达上次水位线，停止滚动。")
+                break
+            # 滚动会触发时间线接口请求，同样计入站点限速
+            await get_rate_limiter().acquire(self.API_BASE)
+            try:
+                prev_max_index = await page.evaluate(self._SCROLLER_SWEEP_JS)
+            except Exception:
+                prev_max_index = -1
+            # 等待下一页条目渲染（最大 data-virtual-index 增长）
+            try:
+                with metrics.timed("selector_wait"):
+                    await page.wait_for_function(
+                        "(prev) => !!window.__wbScrollerHarvest && window.__wbScrollerHarvest.maxIndex() > prev",
+                        arg=prev_max_index,
+                        timeout=3000,
+                    )
+            except Exception:
+                pass
+            try:
+                added = _absorb(await page.evaluate(self._SCROLLER_DRAIN_JS), f"第 {scroll_idx + 1} 次滚动")
+            except Exception as e:
+                print(f"[WeiboHomeScraper] 读取条目缓冲失败: {e}")
+                added = 0
+            if added:
+                stalls = 0
+                continue
+            stalls += 1
+            if stalls >= 2:
+                print("[WeiboHomeScraper] 连续两次滚动没有新条目，停止滚动。")
                 break
 
-        if collected_by_idx:
-            entries_sorted = sorted(
-                collected_by_idx.values(),
-                key=lambda item: (
-                    item.get("idx") if item.get("idx") is not None else float("inf"),
-                    item.get("top", float("inf")),
-                ),
-            )
+        try:
+            await page.evaluate("() => window.__wbScrollerHarvest && window.__wbScrollerHarvest.stop()")
+        except Exception:
+            pass
+
+        entries = list(collected_by_idx.values()) + [e for e in collected_by_id.values() if e.get("idx") is None]
         entries_sorted = sorted(
-            collected_by_idx.values(),
+            entries,
             key=lambda item: (
                 item.get("idx") if item.get("idx") is not None else float("inf"),
                 item.get("top", float("inf")),
@@ -591,7 +618,125 @@ class WeiboHomeScraper:
         print(f"[WeiboHomeScraper] 共收集 {len(entries_sorted)} 条帖子。")
         return entries_sorted[:max_posts]
 
-    async def scrape_post_details(self, post_ref: Dict) -> Optional[Dict]:
+    @staticmethod
+    def _status_pic_urls(status: Dict) -> List[str]:
+        """按 pic_ids 顺序取每张图的最大尺寸链接；混排媒体从 mix_media_info 中取图片项。"""
+        urls: List[str] = []
+        pic_infos = status.get("pic_infos") or {}
+
+        def _best(info: Dict) -> str:
+            for key in ("largest", "mw2000", "original", "large", "bmiddle", "thumbnail"):
+                candidate = (info.get(key) or {}).get("url") if isinstance(info.get(key), dict) else ""
+                if candidate:
+                    return candidate
+            return info.get("url") or ""
+
+        for pid in status.get("pic_ids") or []:
+            info = pic_infos.get(pid) or {}
+            url = _best(info) if isinstance(info, dict) else ""
+            if url and url not in urls:
+                urls.append(url)
+        if not urls:
+            for item in (status.get("mix_media_info") or {}).get("items") or []:
+                if not isinstance(item, dict) or item.get("type") != "pic":
+                    continue
+                url = _best(item.get("data") or {})
+                if url and url not in urls:
+                    urls.append(url)
+        return [("https:" + u) if u.startswith("//") else u for u in urls]
+
+    async def _scrape_post_details_via_api(self, post_ref: Dict) -> Optional[Dict]:
+        """通过 statuses/show（正文被截断时再请求 statuses/longtext）构建详情，不再渲染页面。
+        列表阶段已带回原始 status 时直接复用，仅在需要展开长文时发起请求。"""
+        note_id = str(post_ref.get("note_id") or "").strip()
+        if not note_id:
+            return None
+        referer = self._normalize_url(post_ref.get("url") or "") or f"{self.API_BASE}/"
+        status = post_ref.get("status")
+        if not isinstance(status, dict) or not status:
+            data = await self._api_get_json(
+                "/ajax/statuses/show", {"id": note_id, "locale": "zh-CN", "isGetLongText": "true"}, referer
+            )
+            if not data or not (data.get("mblogid") or data.get("idstr")):
+                return None
+            status = data
+
+        content_text = (status.get("text_raw") or "").strip()
+        if status.get("isLongText"):
+            long_data = await self._api_get_json("/ajax/statuses/longtext", {"id": note_id}, referer)
+            long_text = ((long_data or {}).get("data") or {}).get("longTextContent") or ""
+            if long_text.strip():
+                content_text = long_text.strip()
+        if not content_text:
+            print(f"[WeiboDetail] note_id={note_id} 原因=接口正文为空")
+            return None
+
+        retweeted = status.get("retweeted_status") if isinstance(status.get("retweeted_status"), dict) else None
+        page_info = status.get("page_info") or (retweeted or {}).get("page_info") or {}
+        is_video = page_info.get("object_type") == "video" or bool(post_ref.get("is_video"))
+        if is_video:
+            image_urls = ["视频"]
+        else:
+            image_urls = self._status_pic_urls(status)
+            if not image_urls and retweeted:
+                image_urls = self._status_pic_urls(retweeted)
+
+        user = status.get("user") or {}
+        uid = str(user.get("idstr") or user.get("id") or "")
+        mblogid = str(status.get("mblogid") or note_id)
+        post_url = f"{self.API_BASE}/{uid}/{mblogid}" if uid else (self._normalize_url(post_ref.get("url") or "") or f"{self.API_BASE}/detail/{mblogid}")
+        created = self._parse_created_at(status.get("created_at"))
+        if created:
+            post_time = time_parser.format_post_time(time_parser.ParsedTime(created, True))
+        else:
+            post_time = post_ref.get("post_time") or ""
+
+        title = content_text.split("\n", 1)[0][:60] or f"微博-{post_ref.get('note_id')}"
+        details = {
+            "note_id": post_ref.get("note_id"),
+            "post_url": post_url,
+            "title": title,
+            "author_name": user.get("screen_name") or post_ref.get("author_name", ""),
+            "content": content_text,
+            "images": image_urls,
+            "post_time": post_time,
+            "post_timestamp": time_parser.to_timestamp(created) if created else post_ref.get("post_timestamp"),
+            "tags": "",
+            "likes_count": self._normalize_stat(status.get("attitudes_count")),
+            "collections_count": "0",
+            "comments_count": self._normalize_stat(status.get("comments_count")),
+            "shares_count": self._normalize_stat(status.get("reposts_count")),
+            "platform": "微博",
+            "is_video": is_video,
+            "isRetweet": "是" if retweeted else "否",
+        }
+        print(
+            f"[WeiboDetail] note_id={note_id} 接口抓取完成 post_time={post_time} "
+            f"author={details['author_name']} imgs={len(image_urls)} is_video={is_video} "
+            f"shares={details['shares_count']} comments={details['comments_count']} likes={details['likes_count']}"
+        )
+        return details
+
+    async def scrape_post_details(self, post_ref: Dict, engine: str = "api", page: Optional[Page] = None) -> Optional[Dict]:
+        """
+        根据列表项抓取详情并整理为统一结构。
+        engine="api" 时通过状态 JSON 接口获取，失败时回退到打开详情页抓取（"dom"）。
+        传入 page 时 dom 引擎复用该页面且不关闭，否则每条详情新开一个页面。
+        """
+        if engine == "api":
+            try:
+                details = await self._scrape_post_details_via_api(post_ref)
+            except RuntimeError as e:
+                print(f"[WeiboDetail] note_id={post_ref.get('note_id') or 'N/A'} {e}")
+                return None
+            except Exception as e:
+                print(f"[WeiboDetail] note_id={post_ref.get('note_id') or 'N/A'} 接口异常: {e}")
+                details = None
+            if details:
+                return details
+        return await self._scrape_post_details_via_dom(post_ref, page=page)
+
+    async def _scrape_post_details_via_dom(self, post_ref: Dict, page: Optional[Page] = None) -> Optional[Dict]:
         """
         根据列表项打开详情，抓取内容并整理为统一结构。
         """
@@ -626,8 +771,9 @@ class WeiboHomeScraper:
             return None
 
         detail_page: Optional[Page] = None
+        owns_page = page is None or page.is_closed()
         try:
-            detail_page = await self._new_prepared_page()
+            detail_page = await self._new_prepared_page() if owns_page else page
             await self._goto_page(detail_page, detail_url)
 
             try:
@@ -637,14 +783,20 @@ class WeiboHomeScraper:
                 return None
 
             try:
-                await detail_page.wait_for_selector(
-                    "article, div[class*='detail_wbtext_'], div[class*='WB_detail']",
-                    timeout=15000,
-                )
+                with metrics.timed("selector_wait"):
+                    await detail_page.wait_for_selector(
+                        "article, div[class*='detail_wbtext_'], div[class*='WB_detail']",
+                        timeout=15000,
+                    )
             except Exception:
                 pass
 
-            await detail_page.wait_for_timeout(2000)
+            # 等待正文区域的异步请求结束（图片、互动数等），最多 3 秒
+            try:
+                with metrics.timed("selector_wait"):
+                    await detail_page.wait_for_load_state("networkidle", timeout=3000)
+            except Exception:
+                pass
             is_video_detail = False
             has_video_box_in_content = False
             try:
@@ -672,7 +824,8 @@ class WeiboHomeScraper:
             try:
                 for _ in range(3):
                     await detail_page.evaluate("window.scrollBy(0, Math.max(400, window.innerHeight))")
-                    await detail_page.wait_for_timeout(600)
+                    with metrics.timed("sleep"):
+                        await detail_page.wait_for_timeout(600)
             except Exception:
                 pass
 
@@ -783,11 +936,12 @@ class WeiboHomeScraper:
                 "div[class*='WB_from'] a",
             ]
             detail_time_raw = await self._first_text(detail_page, time_selectors)
-            post_time = self._normalize_post_time(detail_time_raw)
+            post_time, post_timestamp = self._post_time_fields(detail_time_raw)
             if not post_time:
                 post_time = post_ref.get("post_time") or ""
+                post_timestamp = post_ref.get("post_timestamp")
             if not post_time and post_ref.get("raw_time"):
-                post_time = self._normalize_post_time(post_ref.get("raw_time"))
+                post_time, post_timestamp = self._post_time_fields(post_ref.get("raw_time"))
 
             image_urls: List[str] = []
             is_video_from_picture = False
@@ -1051,6 +1205,7 @@ class WeiboHomeScraper:
                 "content": content_text,
                 "images": image_urls,
                 "post_time": post_time,
+                "post_timestamp": post_timestamp,
                 "tags": "",
                 "likes_count": stat_map["likes_count"],
                 "collections_count": "0",
@@ -1070,7 +1225,7 @@ class WeiboHomeScraper:
             _log_detail(f"异常: {e}")
             return None
         finally:
-            if detail_page is not None:
+            if detail_page is not None and owns_page:
                 try:
                     await detail_page.close()
                 except Exception:
@@ -0,0 +1,237 @@
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+class ParsedTime(NamedTuple):
+    """解析结果：本地时间（naive）以及原文是否包含时分。"""
+    dt: datetime
+    has_time: bool
+
+
+# 预处理：来源等附加信息、星期、上午/下午用语
+_SOURCE_SPLIT_RE = re.compile(r"\s*(?:来自|from)\s*")
+_SPACES_RE = re.compile(r"\s+")
+_PM_RE = re.compile(r"下午|晚上|夜间|傍晚|午后|晚间|\bpm\b", re.I)
+_AM_RE = re.compile(r"上午|清晨|凌晨|早上|\bam\b", re.I)
+_AMPM_WORDS_RE = re.compile(r"(上午|下午|晚上|夜间|凌晨|清晨|早上|午后|晚间|傍晚|AM|PM)", re.I)
+_WEEKDAY_RE = re.compile(r"(星期|周)[一二三四五六日天]")
+
+# 相对时间：N 秒/分钟/小时/天/周/月/年 前
+_RELATIVE_RE = re.compile(r"(\d+)\s*(秒钟?|分钟|小?时|天|周|个?月|年)前")
+_RELATIVE_UNITS = {
+    "秒": lambda n: timedelta(seconds=n),
+    "分": lambda n: timedelta(minutes=n),
+    "时": lambda n: timedelta(hours=n),
+    "天": lambda n: timedelta(days=n),
+    "周": lambda n: timedelta(weeks=n),
+    "月": lambda n: timedelta(days=30 * n),
+    "年": lambda n: timedelta(days=365 * n),
+}
+_DAY_KEYWORDS = (("今天", 0), ("今日", 0), ("昨天", 1), ("昨日", 1), ("前天", 2))
+_DAY_KEYWORD_RE = re.compile(r"(今天|今日|昨天|昨日|前天)\s*(?:(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?")
+
+_TIME_PART = r"(?:\s*T?\s*(?P<hour>\d{1,2}):(?P<minute>\d{1,2})(?::(?P<second>\d{1,2}))?)?"
+# 完整日期：2025-10-18、2025/10/18、2025.10.18、2025年10月18日，可带时分秒
+_YMD_RE = re.compile(
+    r"(?P<year>(?:19|20)\d{2})\s*[-/.年]\s*(?P<month>\d{1,2})\s*[-/.月]\s*(?P<day>\d{1,2})\s*日?" + _TIME_PART
+)
+# 两位年份：25-12-21 15:46
+_YY_MD_RE = re.compile(
+    r"^(?P<year>\d{2})-(?P<month>\d{1,2})-(?P<day>\d{1,2})" + _TIME_PART + r"$"
+)
+# 缺少年份：11-04、11/4、11月4日，可带时分
+_MD_RE = re.compile(
+    r"(?<!\d)(?P<month>\d{1,2})\s*[-/.月]\s*(?P<day>\d{1,2})\s*日?" + _TIME_PART + r"(?!\d)"
+)
+# 接口时间：Sat Oct 18 10:23:45 +0800 2025
+_RFC_RE = re.compile(r"^[A-Za-z]{3} [A-Za-z]{3} \d{1,2} \d{2}:\d{2}:\d{2} [+-]\d{4} \d{4}$")
+# ISO 8601 带时区：2025-10-18T10:23:45+08:00 / Z
+_ISO_TZ_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})$")
+_EPOCH_RE = re.compile(r"^\d{10}(?:\d{3})?$")
+
+
+def _clean(text: str) -> str:
+    text = text.replace("　", " ").replace("：", ":").replace("／", "/")
+    text = _SOURCE_SPLIT_RE.split(text, 1)[0]
+    text = text.split("·")[0]
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def _apply_ampm(dt: datetime, ampm: Optional[str]) -> datetime:
+    if ampm == "pm" and dt.hour < 12:
+        return dt.replace(hour=dt.hour + 12)
+    if ampm == "am" and dt.hour == 12:
+        return dt.replace(hour=0)
+    return dt
+
+
+def _from_match(m: "re.Match", year: int, now: datetime, ampm: Optional[str], *, infer_year: bool) -> Optional[ParsedTime]:
+    has_time = m.group("hour") is not None
+    try:
+        dt = datetime(
+            year,
+            int(m.group("month")),
+            int(m.group("day")),
+            int(m.group("hour") or 0),
+            int(m.group("minute") or 0),
+            int(m.group("second") or 0),
+        )
+    except ValueError:
+        return None
+    # 缺少年份时日期落在未来一天以后，视为上一年（跨年）
+    if infer_year and dt > now + timedelta(days=1):
+        try:
+            dt = dt.replace(year=year - 1)
+        except ValueError:
+            return None
+    if has_time:
+        dt = _apply_ampm(dt, ampm)
+    return ParsedTime(dt, has_time)
+
+
+def search_full_date(text, *, now: Optional[datetime] = None) -> Optional[ParsedTime]:
+    """只在文本中查找带年份的完整日期（用于正文、脚本等噪声较多的文本）。"""
+    if not text:
+        return None
+    m = _YMD_RE.search(str(text))
+    if not m:
+        return None
+    return _from_match(m, int(m.group("year")), (now or datetime.now()), None, infer_year=False)
+
+
+def parse(raw, *, now: Optional[datetime] = None, search: bool = False,
+          allow_month_day: bool = True) -> Optional[ParsedTime]:
+    """
+    解析各平台的发布时间文本，返回本地时间。
+
+    支持：相对时间（N分钟前/小时前/天前…、刚刚）、今天/昨天/前天 [HH:MM]、完整日期、两位年份、缺少年份的月日、
+    接口时间（RFC 格式、带时区的 ISO 8601）以及 10/13 位时间戳。
+    search=True 时允许日期嵌在较长文本中（如 "09-01 江苏"），否则要求整段文本即为时间；
+    allow_month_day=False 时不识别缺少年份的月日，避免在正文中把 "3.5" 之类的数字误判为日期。
+    """
+    if raw is None or raw == "":
+        return None
+    now = (now or datetime.now()).replace(microsecond=0)
+    if isinstance(raw, (int, float)):
+        return from_timestamp(raw)
+    text = str(raw).strip()
+    if not text:
+        return None
+
+    if _EPOCH_RE.match(text):
+        return from_timestamp(int(text))
+    if _RFC_RE.match(text):
+        try:
+            dt = datetime.strptime(text, "%a %b %d %H:%M:%S %z %Y")
+            return ParsedTime(dt.astimezone().replace(tzinfo=None), True)
+        except ValueError:
+            pass
+    if _ISO_TZ_RE.match(text):
+        try:
+            dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+            return ParsedTime(dt.astimezone().replace(tzinfo=None).replace(microsecond=0), True)
+        except ValueError:
+            pass
+
+    text = _clean(text)
+    if not text:
+        return None
+    ampm = "pm" if _PM_RE.search(text) else ("am" if _AM_RE.search(text) else None)
+    text = _WEEKDAY_RE.sub("", _AMPM_WORDS_RE.sub("", text)).strip()
+
+    # 相对时间与今天/昨天等关键字特征明显，允许出现在文本任意位置
+    m = _RELATIVE_RE.search(text)
+    if m:
+        unit = m.group(2)
+        for key, delta_fn in _RELATIVE_UNITS.items():
+            if key in unit:
+                return ParsedTime(now - delta_fn(int(m.group(1))), True)
+    if "刚刚" in text:
+        return ParsedTime(now, True)
+
+    m = _DAY_KEYWORD_RE.search(text)
+    if m:
+        days_ago = dict(_DAY_KEYWORDS)[m.group(1)]
+        base = now - timedelta(days=days_ago)
+        if m.group(2) is not None:
+            try:
+                dt = base.replace(hour=int(m.group(2)), minute=int(m.group(3)), second=int(m.group(4) or 0))
+            except ValueError:
+                return None
+            return ParsedTime(_apply_ampm(dt, ampm), True)
+        return ParsedTime(base.replace(hour=0, minute=0, second=0), False)
+
+    matcher = _YMD_RE.search if search else _YMD_RE.fullmatch
+    m = matcher(text)
+    if m:
+        return _from_match(m, int(m.group("year")), now, ampm, infer_year=False)
+
+    normalized = text.replace("/", "-").replace(".", "-")
+    m = _YY_MD_RE.match(normalized)
+    if m:
+        return _from_match(m, 2000 + int(m.group("year")), now, ampm, infer_year=False)
+
+    if not allow_month_day:
+        return None
+    matcher = _MD_RE.search if search else _MD_RE.fullmatch
+    m = matcher(text)
+    if m:
+        return _from_match(m, now.year, now, ampm, infer_year=True)
+    return None
+
+
+def parse_post_time(raw, *, now: Optional[datetime] = None, search: bool = False) -> Optional[datetime]:
+    parsed = parse(raw, now=now, search=search)
+    return parsed.dt if parsed else None
+
+
+def parse_many(texts: Iterable, *, now: Optional[datetime] = None, search: bool = False) -> List[Optional[datetime]]:
+    """批量解析：共用同一个“当前时间”，重复文本只解析一次。"""
+    now = now or datetime.now()
+    cache: Dict = {}
+    results: List[Optional[datetime]] = []
+    for raw in texts:
+        key = raw if isinstance(raw, (str, int, float)) or raw is None else str(raw)
+        if key not in cache:
+            cache[key] = parse_post_time(raw, now=now, search=search)
+        results.append(cache[key])
+    return results
+
+
+def from_timestamp(ts) -> Optional[ParsedTime]:
+    """10 位秒或 13 位毫秒时间戳 -> 本地时间。"""
+    try:
+        value = int(ts)
+        if value > 10**12:
+            value //= 1000
+        return ParsedTime(datetime.fromtimestamp(value), True)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def to_timestamp(dt: Optional[datetime]) -> Optional[int]:
+    if dt is None:
+        return None
+    try:
+        return int(dt.timestamp())
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def format_post_time(parsed: Optional[ParsedTime]) -> str:
+    """展示格式：含时分时为 YYYY-MM-DD HH:MM（秒不为 0 时带秒），否则为 YYYY-MM-DD。"""
+    if not parsed:
+        return ""
+    dt = parsed.dt.replace(microsecond=0)
+    if parsed.has_time:
+        return dt.strftime("%Y-%m-%d %H:%M:%S" if dt.second else "%Y-%m-%d %H:%M")
+    return dt.strftime("%Y-%m-%d")
+
+
+def age_days(post_timestamp: Optional[int], *, now: Optional[datetime] = None) -> Optional[float]:
+    """距今天数（未来时间为负数），时间戳为空时返回 None。"""
+    if post_timestamp is None:
+        return None
+    now_ts = (now or datetime.now()).timestamp()
+    return (now_ts - float(post_timestamp)) / 86400
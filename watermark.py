@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+import config
+
+
+def _is_pinned(note: Dict, pinned_key: str) -> bool:
+    return bool(note.get(pinned_key))
+
+
+def find_position(
+    notes: Iterable[Dict],
+    watermark: Optional[Dict],
+    *,
+    id_key: str = "note_id",
+    ts_key: str = "post_timestamp",
+    pinned_key: str = "is_pinned",
+) -> Optional[int]:
+    """
+    返回列表（按新到旧排列）中第一条“已到达水位线”的位置，未到达时返回 None。
+
+    到达的判定：note_id 命中水位线记录的任一 id，或双方都有发布时间戳且该条早于水位线时间。
+    置顶内容可能是很久以前的旧帖，始终跳过，不参与判定。
+    """
+    if not watermark:
+        return None
+    known_ids = {str(i).strip().lower() for i in (watermark.get("note_ids") or []) if i}
+    wm_ts = watermark.get("post_timestamp")
+    for pos, note in enumerate(notes):
+        if not isinstance(note, dict) or _is_pinned(note, pinned_key):
+            continue
+        note_id = str(note.get(id_key) or "").strip().lower()
+        if note_id and note_id in known_ids:
+            return pos
+        note_ts = note.get(ts_key)
+        if wm_ts is not None and note_ts is not None:
+            try:
+                if int(note_ts) < int(wm_ts):
+                    return pos
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+def newest_entries(notes: Iterable[Dict], *, id_key: str = "note_id", limit: Optional[int] = None) -> List[Dict]:
+    """列表中最新的若干条非置顶内容（保持原顺序），用于推进水位线。"""
+    limit = limit or max(1, int(getattr(config, "WATERMARK_KEEP_IDS", 5) or 1))
+    picked: List[Dict] = []
+    for note in notes:
+        if not isinstance(note, dict) or note.get("is_pinned"):
+            continue
+        if not str(note.get(id_key) or note.get("note_id") or "").strip():
+            continue
+        picked.append(note)
+        if len(picked) >= limit:
+            break
+    return picked
+
+
+class WatermarkStore:
+    """
+    增量抓取水位线（SQLite），按 (app_token, table_id, account) 记录每个账号上次处理到的最新内容。
+
+    - 记录最新的几条非置顶内容 id（WATERMARK_KEEP_IDS 条，最新一条被删除时仍能命中）及最新一条的发布时间戳；
+    - 列表抓取遇到水位线即停止，只处理其上方的新内容；
+    - 只有账号本次的新内容全部处理完（未被 per_account_limit 截断、没有抓取/写入失败）时才推进。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or getattr(config, "WATERMARK_PATH", "crawl_watermarks.sqlite3")
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS watermarks (
+                app_token TEXT NOT NULL,
+                table_id TEXT NOT NULL,
+                account TEXT NOT NULL,
+                note_ids TEXT NOT NULL DEFAULT '[]',
+                post_timestamp INTEGER,
+                updated_ms INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (app_token, table_id, account)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+    def get(self, app_token: str, table_id: str, account: str) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT note_ids, post_timestamp, updated_ms FROM watermarks "
+            "WHERE app_token = ? AND table_id = ? AND account = ?",
+            (app_token, table_id, account),
+        ).fetchone()
+        if not row:
+            return None
+        try:
+            note_ids = [str(i) for i in json.loads(row[0] or "[]") if i]
+        except ValueError:
+            note_ids = []
+        if not note_ids and row[1] is None:
+            return None
+        return {"note_ids": note_ids, "post_timestamp": row[1], "updated_ms": row[2]}
+
+    def advance(self, app_token: str, table_id: str, account: str, note_ids: Iterable[str],
+                post_timestamp: Optional[int] = None):
+        ids = [str(i).strip() for i in note_ids if i is not None and str(i).strip()]
+        if not ids:
+            return
+        # 时间戳只能前进：列表时间解析偏差或缺失不应让水位线回退
+        current = self.get(app_token, table_id, account)
+        if current and current.get("post_timestamp") is not None:
+            current_ts = int(current["post_timestamp"])
+            post_timestamp = current_ts if post_timestamp is None else max(int(post_timestamp), current_ts)
+        self._conn.execute(
+            "INSERT INTO watermarks (app_token, table_id, account, note_ids, post_timestamp, updated_ms) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (app_token, table_id, account) DO UPDATE SET "
+            "note_ids = excluded.note_ids, post_timestamp = excluded.post_timestamp, updated_ms = excluded.updated_ms",
+            (app_token, table_id, account, json.dumps(ids), post_timestamp, int(time.time() * 1000)),
+        )
+        self._conn.commit()
+
+    def reset(self, app_token: str, table_id: str, account: Optional[str] = None):
+        """清除水位线，下次运行从头列出（account 为空时清除整个表的水位线）。"""
+        if account is None:
+            self._conn.execute("DELETE FROM watermarks WHERE app_token = ? AND table_id = ?", (app_token, table_id))
+        else:
+            self._conn.execute(
+                "DELETE FROM watermarks WHERE app_token = ? AND table_id = ? AND account = ?",
+                (app_token, table_id, account),
+            )
+        self._conn.commit()
@@ -1,6 +1,5 @@
 
 import asyncio
-import random
 import re
 from playwright.async_api import (
     Page,
@@ -9,13 +8,213 @@ from playwright.async_api import (
     Error as PlaywrightError,
     TimeoutError as PlaywrightTimeoutError,
 )
-from urllib.parse import urlparse, urlunparse, urljoin
-from typing import List, Dict, Optional, Union
+from urllib.parse import urlparse, urlunparse, urljoin, quote
+from typing import Callable, Iterable, List, Dict, Optional, Union
+
+import time_parser
+import metrics
+import watermark
+from rate_limiter import get_rate_limiter
+from routing import install_routing
+
+class _KnownIds:
+    """
+    列表抓取时判断笔记是否已写入过：传入 id 集合时直接查集合；传入查询函数 lookup(ids) -> 已存在的 id 时，
+    只对本次列出的 id 分批查询并缓存结果，不把整张表的 id 读入内存。
+    """
+
+    def __init__(self, known_ids: Union[Iterable[str], Callable[[List[str]], Iterable[str]], None]):
+        self._lookup = known_ids if callable(known_ids) else None
+        self._known = set() if self._lookup else {str(k).strip().lower() for k in (known_ids or ()) if k}
+        self._checked: set = set()
+
+    def __bool__(self) -> bool:
+        return self._lookup is not None or bool(self._known)
+
+    def __contains__(self, note_id) -> bool:
+        return str(note_id or "").strip().lower() in self._known
+
+    def resolve(self, note_ids: Iterable[str]):
+        """查询尚未查过的 id；之后可用 in 判断。"""
+        if self._lookup is None:
+            return
+        pending = {str(n).strip().lower() for n in note_ids if n and str(n).strip()} - self._checked
+        if not pending:
+            return
+        self._checked |= pending
+        self._known.update(str(k).strip().lower() for k in (self._lookup(sorted(pending)) or ()))
+
 
 class XhsScraper:
-    def __init__(self, context: BrowserContext):
+    # 主页笔记分页接口（页面滚动时自行请求）
+    USER_POSTED_API_PATH = "/api/sns/web/v1/user_posted"
+
+    # 读取服务端渲染的首屏笔记；Vue 的 ref 需要解包，JSON 往返去掉不可序列化的字段
+    _INITIAL_NOTES_JS = """() => {
+        const unwrap = (v) => {
+            let cur = v;
+            for (let i = 0; i < 3 && cur && typeof cur === 'object' && !Array.isArray(cur); i++) {
+                if ('_rawValue' in cur) cur = cur._rawValue;
+                else if ('_value' in cur) cur = cur._value;
+                else if ('value' in cur && Object.keys(cur).length <= 3) cur = cur.value;
+                else break;
+            }
+            return cur;
+        };
+        const state = window.__INITIAL_STATE__;
+        if (!state || !state.user) return null;
+        const tabs = unwrap(state.user.notes);
+        if (!Array.isArray(tabs) || !tabs.length) return null;
+        const first = unwrap(tabs[0]);
+        const notes = Array.isArray(first) ? first : tabs.filter(n => n && !Array.isArray(n));
+        const queries = unwrap(state.user.noteQueries);
+        const q0 = Array.isArray(queries) ? unwrap(queries[0]) : null;
+        let hasMore = null;
+        if (q0 && typeof q0.hasMore === 'boolean') hasMore = q0.hasMore;
+        try {
+            return { notes: JSON.parse(JSON.stringify(notes)), hasMore };
+        } catch (e) {
+            return null;
+        }
+    }"""
+
+    # DOM 引擎：在主页安装卡片收集器。MutationObserver 在卡片渲染时即记录（按 note_id 去重，保留首次出现的位置），
+    # 滚动过程中只需读取增量，无需在结束时重新定位所有节点
+    _CARD_HARVEST_JS = """({container, anchorSelector}) => {
+        if (window.__xhsCardHarvest && window.__xhsCardHarvest.observer) {
+            window.__xhsCardHarvest.observer.disconnect();
+        }
+        const patterns = [
+            /\\/explore\\/([A-Za-z0-9]+)/,
+            /\\/user\\/profile\\/[^/]+\\/([A-Za-z0-9]+)/,
+            /\\/profile\\/[^/]+\\/([A-Za-z0-9]+)/,
+            /\\/note\\/([A-Za-z0-9]+)/,
+        ];
+        const parseId = (href) => {
+            let path = href;
+            try { if (/^https?:/.test(href)) path = new URL(href).pathname; } catch (e) {}
+            for (const re of patterns) {
+                const m = path.match(re);
+                if (m && m[1].length >= 8 && m[1].length <= 64) return m[1];
+            }
+            const segs = path.split('?')[0].split('/').filter(Boolean);
+            const last = segs.length ? segs[segs.length - 1] : '';
+            return /^[A-Za-z0-9]{8,64}$/.test(last) ? last : null;
+        };
+        const text = (el) => (el && (el.innerText || el.textContent) || '').trim();
+        const names = ['a.cover.mask.ld', 'a.cover.mask', 'a.cover.ld', 'a.cover', 'a:has(.cover.mask.ld)', 'a:has(.cover)'];
+        const state = { cards: new Map(), seq: 0, skipped: 0, selector: '', anchorCount: 0, observer: null };
+
+        state.collect = () => {
+            const root = document.querySelector(container) || document;
+            const all = Array.from(document.querySelectorAll(anchorSelector));
+            // 优先使用带 cover/mask/ld 的卡片链接，依次放宽
+            const chain = [
+                () => Array.from(root.querySelectorAll('a.cover.mask.ld')),
+                () => Array.from(root.querySelectorAll('a.cover.mask')),
+                () => Array.from(root.querySelectorAll('a.cover.ld')),
+                () => Array.from(root.querySelectorAll('a.cover')),
+                () => all.filter(a => a.querySelector('.cover.mask.ld')),
+                () => all.filter(a => a.querySelector('.cover')),
+            ];
+            let anchors = [];
+            let selector = '';
+            for (let i = 0; i < chain.length; i++) {
+                anchors = chain[i]();
+                if (anchors.length) { selector = names[i]; break; }
+            }
+            if (!anchors.length) { anchors = all; selector = anchorSelector; }
+            state.selector = selector;
+            state.anchorCount = Math.max(state.anchorCount, all.length);
+            const iconSel = '.play-icon, .play-icon-new, .video-icon, .icon-play';
+            for (const el of anchors) {
+                const link = el.getAttribute('href') ? el : el.closest('a');
+                const href = link && link.getAttribute('href');
+                if (!href) { state.skipped++; continue; }
+                const noteId = parseId(href);
+                if (!noteId || state.cards.has(noteId)) continue;
+                const card = el.closest('section.note-item, li.note-item, .note-item, .note-card') || el;
+                const r = card.getBoundingClientRect();
+                state.cards.set(noteId, {
+                    index: state.seq++,
+                    noteId,
+                    href,
+                    top: (r.top || 0) + window.scrollY,
+                    left: (r.left || 0) + window.scrollX,
+                    isVideo: !!(el.querySelector(iconSel) || (card !== el && card.querySelector(iconSel))),
+                    title: text(card.querySelector('.footer .title, a.title, .title')),
+                    likes: text(card.querySelector('.like-wrapper .count, .like-wrapper span.count, .count')),
+                    isPinned: !!card.querySelector('.top-tag-area, .top-tag, [class*="top-tag"]'),
+                });
+            }
+            return state.cards.size;
+        };
+
+        state.collect();
+        // 渲染批次合并处理，避免每个节点变更都全量扫描
+        let scheduled = false;
+        state.observer = new MutationObserver(() => {
+            if (scheduled) return;
+            scheduled = true;
+            setTimeout(() => { scheduled = false; state.collect(); }, 50);
+        });
+        state.observer.observe(document.querySelector(container) || document.body, { childList: true, subtree: true });
+        window.__xhsCardHarvest = state;
+        return state.cards.size;
+    }"""
+
+    # 读取收集器中 index >= since 的卡片；stop=true 时断开监听
+    _CARD_HARVEST_READ_JS = """({since, stop}) => {
+        const state = window.__xhsCardHarvest;
+        if (!state) return null;
+        state.collect();
+        if (stop && state.observer) { state.observer.disconnect(); state.observer = null; }
+        const cards = Array.from(state.cards.values()).filter(c => c.index >= since);
+        return { total: state.cards.size, cards, selector: state.selector, anchorCount: state.anchorCount, skipped: state.skipped };
+    }"""
+
+    # 详情页脚本中的发布时间字段（DOM 引擎兜底）
+    _PUBLISH_DATE_JSON_RE = re.compile(r'"(?:publish(?:Time|_time|Date|_date)|time)"\s*:\s*"(20\d{2}[-/\.]\d{1,2}[-/\.]\d{1,2})')
+    _PUBLISH_TS_JSON_RE = re.compile(r'"(?:publish(?:Time|_time)|time)"\s*:\s*(\d{10,13})')
+
+    # 详情数据接口（从发现页浮层打开笔记时由页面请求）
+    NOTE_FEED_API_PATH = "/api/sns/web/v1/feed"
+
+    # 读取服务端渲染的笔记详情；noteDetailMap 以 note_id 为键
+    _NOTE_STATE_JS = """(noteId) => {
+        const unwrap = (v) => {
+            let cur = v;
+            for (let i = 0; i < 3 && cur && typeof cur === 'object' && !Array.isArray(cur); i++) {
+                if ('_rawValue' in cur) cur = cur._rawValue;
+                else if ('_value' in cur) cur = cur._value;
+                else break;
+            }
+            return cur;
+        };
+        const state = window.__INITIAL_STATE__;
+        if (!state || !state.note) return null;
+        const map = unwrap(state.note.noteDetailMap) || {};
+        let entry = map[noteId];
+        if (!entry) {
+            entry = Object.values(map).find(e => {
+                const n = e && unwrap(e.note);
+                return n && (n.noteId === noteId || n.id === noteId);
+            });
+        }
+        const note = entry && unwrap(entry.note);
+        if (!note || typeof note !== 'object' || !Object.keys(note).length) return null;
+        try {
+            return JSON.parse(JSON.stringify(note));
+        } catch (e) {
+            return null;
+        }
+    }"""
+
+    def __init__(self, context: BrowserContext, routing_profile: Optional[str] = None):
         self.context = context
         self.page: Optional[Page] = None
+        # 请求拦截档位（见 routing.ROUTING_PROFILES），为空时不拦截
+        self.routing_profile = routing_profile
 
     async def _create_prepared_page(self) -> Page:
         page = await self.context.new_page()
@@ -23,6 +222,7 @@ class XhsScraper:
         await page.add_init_script("""
             Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
         """)
+        await install_routing(page, "xhs", self.routing_profile)
         return page
 
     async def create_prepared_page(self) -> Page:
@@ -40,10 +240,18 @@ class XhsScraper:
             await self.init_page()
             target_page = self.page
 
+        limiter = get_rate_limiter()
         last_error: Optional[Exception] = None
         for attempt in range(1, max(1, retries) + 1):
             try:
-                await target_page.goto(url, wait_until=wait_until)
+                await limiter.acquire(url)
+                with metrics.timed("navigation"):
+                    await target_page.goto(url, wait_until=wait_until)
+                # 被重定向到验证码/登录页视为风控信号，降低后续访问速率
+                if "captcha" in (target_page.url or "") or "website-login" in (target_page.url or ""):
+                    limiter.penalize(url, "跳转到验证页")
+                else:
+                    limiter.reward(url)
                 return
             except (PlaywrightTimeoutError, PlaywrightError) as exc:
                 msg = str(exc) if exc else ""
@@ -55,7 +263,8 @@ class XhsScraper:
                         await target_page.wait_for_load_state("load")
                     except Exception:
                         pass
-                    await target_page.wait_for_timeout(800)
+                    with metrics.timed("sleep"):
+                        await target_page.wait_for_timeout(800)
                     last_error = exc
                     continue
                 last_error = exc
@@ -91,7 +300,6 @@ class XhsScraper:
         print("正在检查登录状态...")
         # 访问一个需要登录才能正常显示的页面
         await self._goto_with_retry("https://www.xiaohongshu.com/explore")
-        await self.page.wait_for_timeout(random.randint(2000, 4000))
 
         # 寻找登录后才会出现的元素，例如首页的 '关注' '发现' tab
         # 使用更可靠的选择器，寻找“创作服务”链接，这是登录后才有的标志
@@ -126,25 +334,223 @@ class XhsScraper:
         print("登录状态失效或未登录。")
         return False
 
-    async def scrape_user_notes(self, user_url: str, max_notes: int = 10, scrolls: int = 1) -> List[Dict]:
+    async def scrape_user_notes(self, user_url: str, max_notes: int = 10, scrolls: int = 1, engine: str = "network",
+                                known_ids: Union[Iterable[str], Callable[[List[str]], Iterable[str]], None] = None,
+                                stop_at: Optional[Dict] = None) -> List[Dict]:
         """
         从指定用户主页爬取最新的笔记列表。
         :param user_url: 用户主页 URL
-        :param max_notes: 本次最多爬取的笔记数量
-        :param scrolls: 向下滚动次数，用于加载更多内容
+        :param max_notes: 本次需要收集的未见过笔记数量（不在 known_ids 中的笔记）
+        :param scrolls: 向下滚动次数上限；收集够 max_notes 条或列表不再增长时提前停止
+        :param engine: 列表引擎，"network" 直接解析主页自身的 JSON 数据，"dom" 逐个解析卡片节点
+        :param known_ids: 已写入过的笔记 id（集合，或按 id 列表查询已存在 id 的函数），只用于判断何时停止滚动，返回结果中仍包含它们
+        :param stop_at: 该账号的增量水位线（见 watermark.py），滚动到水位线即停止，截断交给调用方
         :return: 包含笔记基本信息的字典列表
         """
+        if engine == "network":
+            try:
+                notes = await self._scrape_user_notes_via_network(
+                    user_url, max_notes=max_notes, scrolls=scrolls, known_ids=known_ids, stop_at=stop_at
+                )
+            except Exception as e:
+                print(f"[network 引擎] 解析主页数据异常: {e}")
+                notes = []
+            if notes:
+                return notes
+            print("[network 引擎] 未拿到笔记数据，回退到 DOM 引擎。")
+        return await self._scrape_user_notes_via_dom(
+            user_url, max_notes=max_notes, scrolls=scrolls, known_ids=known_ids, stop_at=stop_at
+        )
+
+    @staticmethod
+    def _trim_to_unseen(notes: List[Dict], max_notes: int, known_lower: _KnownIds) -> List[Dict]:
+        """按顺序截取，直到包含 max_notes 条不在 known_lower 中的笔记为止（已知笔记保留，交给调用方去重）。"""
+        if not known_lower:
+            return notes[:max_notes]
+        known_lower.resolve(n.get("note_id") for n in notes)
+        trimmed: List[Dict] = []
+        unseen = 0
+        for note in notes:
+            if unseen >= max_notes:
+                break
+            trimmed.append(note)
+            if note.get("note_id") not in known_lower:
+                unseen += 1
+        return trimmed
+
+    @staticmethod
+    def _parse_user_id(user_url: str) -> str:
+        try:
+            path = urlparse(user_url).path
+        except Exception:
+            path = user_url or ""
+        m = re.search(r"/user/profile/([A-Za-z0-9]+)", path)
+        return m.group(1) if m else ""
+
+    @staticmethod
+    def _note_record_from_feed(item: Dict, user_id: str) -> Optional[Dict]:
+        """将主页数据中的单条笔记（接口 snake_case 或 __INITIAL_STATE__ camelCase）转换为列表记录。"""
+        if not isinstance(item, dict):
+            return None
+        card = item.get("note_card") or item.get("noteCard") or item
+        note_id = (
+            item.get("note_id") or item.get("noteId")
+            or card.get("note_id") or card.get("noteId")
+            or item.get("id")
+        )
+        if not note_id or not re.fullmatch(r"[A-Za-z0-9]{8,64}", str(note_id)):
+            return None
+        note_id = str(note_id)
+        xsec_token = (
+            item.get("xsec_token") or item.get("xsecToken")
+            or card.get("xsec_token") or card.get("xsecToken") or ""
+        )
+        cover = card.get("cover") or {}
+        cover_url = ""
+        if isinstance(cover, dict):
+            cover_url = cover.get("url_default") or cover.get("urlDefault") or cover.get("url") or ""
+            if not cover_url:
+                for info in cover.get("info_list") or cover.get("infoList") or []:
+                    if isinstance(info, dict) and info.get("url"):
+                        cover_url = info["url"]
+                        break
+        interact = card.get("interact_info") or card.get("interactInfo") or {}
+        liked = interact.get("liked_count") or interact.get("likedCount") or "0"
+        if user_id:
+            raw_href = f"/user/profile/{user_id}/{note_id}"
+        else:
+            raw_href = f"/explore/{note_id}"
+        if xsec_token:
+            raw_href += f"?xsec_token={quote(str(xsec_token), safe='')}&xsec_source=pc_user"
+        return {
+            "note_id": note_id,
+            "url": f"https://www.xiaohongshu.com{raw_href}",
+            "raw_href": raw_href,
+            "is_video": (card.get("type") or "") == "video",
+            "xsec_token": xsec_token,
+            "title": card.get("display_title") or card.get("displayTitle") or "",
+            "cover": cover_url,
+            "likes_count": str(liked),
+            "is_pinned": bool(interact.get("sticky")),
+        }
+
+    async def _scrape_user_notes_via_network(self, user_url: str, max_notes: int, scrolls: int,
+                                             known_ids: Union[Iterable[str], Callable[[List[str]], Iterable[str]], None] = None,
+                                             stop_at: Optional[Dict] = None) -> List[Dict]:
+        """监听主页自身的笔记列表接口响应构建列表，不再逐个访问卡片节点。
+        首屏数据由服务端渲染在 window.__INITIAL_STATE__ 中，后续分页来自 user_posted 接口。
+        """
+        if not self.page or self.page.is_closed():
+            await self.init_page()
+        page = self.page
+        user_id = self._parse_user_id(user_url)
+
+        scraped_notes: List[Dict] = []
+        seen_ids: set = set()
+        known_lower = _KnownIds(known_ids)
+        has_more = True
+        feed_arrived = asyncio.Event()
+        consumers: List[asyncio.Task] = []
+
+        def _merge(items) -> int:
+            added = 0
+            for item in items or []:
+                record = self._note_record_from_feed(item, user_id)
+                if not record or record["note_id"] in seen_ids:
+                    continue
+                seen_ids.add(record["note_id"])
+                record["index"] = len(scraped_notes)
+                scraped_notes.append(record)
+                added += 1
+            return added
+
+        async def _consume(response):
+            nonlocal has_more
+            try:
+                payload = await response.json()
+            except Exception:
+                return
+            data = (payload or {}).get("data") or {}
+            added = _merge(data.get("notes") or [])
+            if data.get("has_more") is False:
+                has_more = False
+            print(f"[network 引擎] 接口返回 {len(data.get('notes') or [])} 条，新增 {added} 条，has_more={has_more}")
+            feed_arrived.set()
+
+        def _on_response(response):
+            if self.USER_POSTED_API_PATH in response.url:
+                consumers.append(asyncio.ensure_future(_consume(response)))
+
+        page.on("response", _on_response)
+        try:
+            print(f"正在访问用户主页: {user_url}")
+            await self._goto_with_retry(user_url, page=page)
+            try:
+                with metrics.timed("selector_wait"):
+                    await page.wait_for_function(
+                        "() => !!(window.__INITIAL_STATE__ && window.__INITIAL_STATE__.user)",
+                        timeout=15000,
+                    )
+            except Exception:
+                pass
+            try:
+                initial = await page.evaluate(self._INITIAL_NOTES_JS)
+            except Exception:
+                initial = None
+            if isinstance(initial, dict):
+                added = _merge(initial.get("notes") or [])
+                if initial.get("hasMore") is False:
+                    has_more = False
+                print(f"[network 引擎] 首屏数据 {added} 条。")
+
+            # 收集到 max_notes 条未见过的笔记、到达水位线、接口表示没有更多或连续两次滚动无数据时停止，scrolls 仅作为上限
+            stalls = 0
+            for i in range(max(0, scrolls)):
+                known_lower.resolve(n["note_id"] for n in scraped_notes)
+                unseen = sum(1 for n in scraped_notes if n["note_id"] not in known_lower)
+                if unseen >= max_notes or not has_more:
+                    break
+                if watermark.find_position(scraped_notes, stop_at) is not None:
+                    print("[network 引擎] 已到达上次水位线，停止滚动。")
+                    break
+                print(f"正在进行第 {i+1} 次向下滚动（未见过 {unseen}/{max_notes}）...")
+                feed_arrived.clear()
+                # 滚动会触发分页接口请求，同样计入站点限速
+                await get_rate_limiter().acquire("xiaohongshu.com")
+                await page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
+                try:
+                    await asyncio.wait_for(feed_arrived.wait(), timeout=3)
+                    stalls = 0
+                except asyncio.TimeoutError:
+                    stalls += 1
+                    if stalls >= 2:
+                        print("[network 引擎] 连续两次滚动未返回数据，停止滚动。")
+                        break
+        finally:
+            page.remove_listener("response", _on_response)
+            if consumers:
+                await asyncio.gather(*consumers, return_exceptions=True)
+
+        scraped_notes = self._trim_to_unseen(scraped_notes, max_notes, known_lower)
+        print(f"[network 引擎] 最终收集到 {len(scraped_notes)} 条笔记。")
+        return scraped_notes
+
+    async def _scrape_user_notes_via_dom(self, user_url: str, max_notes: int = 10, scrolls: int = 1,
+                                         known_ids: Union[Iterable[str], Callable[[List[str]], Iterable[str]], None] = None,
+                                         stop_at: Optional[Dict] = None) -> List[Dict]:
+        """DOM 引擎：边滚动边收集渲染出的卡片节点（network 引擎失效时的兜底）。"""
         if not self.page:
             await self.init_page()
 
         print(f"正在访问用户主页: {user_url}")
-        await self._goto_with_retry(user_url)
+        await self._goto_with_retry(user_url, page=self.page)
 
         # 等待笔记的父容器加载完成（用户主页用 #userPostedFeeds 更稳）
         feeds_container_selector = "div#userPostedFeeds.feeds-container" if "/user/profile/" in user_url else "div.feeds-container"
         try:
             print(f"正在等待核心容器 '{feeds_container_selector}' 加载...")
-            await self.page.wait_for_selector(feeds_container_selector, timeout=20000)
+            with metrics.timed("selector_wait"):
+                await self.page.wait_for_selector(feeds_container_selector, timeout=20000)
             print("核心容器加载成功。")
         except Exception:
             print("在20秒内未找到核心容器，页面可能为空或结构已更改。")
@@ -158,112 +564,82 @@ class XhsScraper:
             f"{feeds_container_selector} a[href*='/explore/']"
         )
 
-        # 模拟向下滚动以加载更多笔记
-        for i in range(max(0, scrolls)):
-            print(f"正在进行第 {i+1} 次向下滚动...")
-            try:
-                prev_count = await self.page.locator(card_anchor_selector).count()
-            except Exception:
-                prev_count = 0
-            await self.page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
-            try:
-                await self.page.wait_for_function(
-                    "({selector, prev}) => document.querySelectorAll(selector).length > prev",
-                    {"selector": card_anchor_selector, "prev": prev_count},
-                    timeout=2000,
-                )
-            except Exception:
-                await self.page.wait_for_timeout(random.randint(800, 1200))
-
         # 确保至少有一个卡片出现
         try:
-            await self.page.wait_for_selector(
-                f"{feeds_container_selector} section.note-item a, {feeds_container_selector} a[href*='/explore/']",
-                timeout=20000
-            )
-        except Exception:
-            pass
-
-        # 回到页面顶部，确保从最上方开始抓取
-        try:
-            await self.page.evaluate("window.scrollTo(0, 0)")
-            await self.page.wait_for_timeout(300)
+            with metrics.timed("selector_wait"):
+                await self.page.wait_for_selector(
+                    f"{feeds_container_selector} section.note-item a, {feeds_container_selector} a[href*='/explore/']",
+                    timeout=20000
+                )
         except Exception:
             pass
 
-        # 现在在已加载的容器内查找可点击的卡片封面（优先 'cover mask ld' 元素）
-        notes_locator = None
+        # 安装卡片收集器后按需滚动：收集到 max_notes 条未见过的笔记、到达水位线或列表不再增长即停止，scrolls 仅作为上限
+        known_lower = _KnownIds(known_ids)
+        harvested: List[Dict] = []
+        snapshot: Dict = {}
+        stalls = 0
         try:
-            # 基础 anchors：主页中指向笔记详情的链接（同时覆盖 note-item 下的 cover 链接）
-            anchors_all = self.page.locator(card_anchor_selector)
-            count_all = await anchors_all.count()
-            print(f"候选锚点（含 '/explore/'）数量: {count_all}")
-
-            # 优先匹配带 cover/mask/ld 的卡片链接
-            preferred = self.page.locator(f"{feeds_container_selector} a.cover.mask.ld")
-            if await preferred.count() == 0:
-                preferred = self.page.locator(f"{feeds_container_selector} a.cover.mask")
-            if await preferred.count() == 0:
-                preferred = self.page.locator(f"{feeds_container_selector} a.cover.ld")
-            if await preferred.count() == 0:
-                preferred = self.page.locator(f"{feeds_container_selector} a.cover")
-            # 如果依旧没有，尝试：a 内部包含 .cover.mask.ld 的情况
-            if await preferred.count() == 0:
-                preferred = anchors_all.filter(has=self.page.locator('.cover.mask.ld'))
-            if await preferred.count() == 0:
-                preferred = anchors_all.filter(has=self.page.locator('.cover'))
-
-            preferred_count = await preferred.count()
-            if preferred_count > 0:
-                notes_locator = preferred
-                print(f"使用 'cover' 优先选择，命中 {preferred_count} 个卡片链接。")
-            else:
-                notes_locator = anchors_all
-                print("未命中 'cover' 相关选择器，回退到所有 '/explore/' 链接。")
+            await self.page.evaluate(
+                self._CARD_HARVEST_JS,
+                {"container": feeds_container_selector, "anchorSelector": card_anchor_selector},
+            )
+            snapshot = await self.page.evaluate(self._CARD_HARVEST_READ_JS, {"since": 0, "stop": False}) or {}
+            harvested.extend(snapshot.get("cards") or [])
+            print(f"首屏收集到 {len(harvested)} 张卡片。")
+            for i in range(max(0, scrolls)):
+                known_lower.resolve(c.get("noteId") for c in harvested)
+                unseen = sum(1 for c in harvested if c.get("noteId") not in known_lower)
+                if unseen >= max_notes:
+                    break
+                if watermark.find_position(harvested, stop_at, id_key="noteId", pinned_key="isPinned") is not None:
+                    print("已到达上次水位线，停止滚动。")
+                    break
+                print(f"正在进行第 {i+1} 次向下滚动（未见过 {unseen}/{max_notes}）...")
+                # 滚动会触发分页接口请求，同样计入站点限速
+                await get_rate_limiter().acquire("xiaohongshu.com")
+                await self.page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
+                try:
+                    with metrics.timed("selector_wait"):
+                        await self.page.wait_for_function(
+                            "(prev) => !!window.__xhsCardHarvest && window.__xhsCardHarvest.cards.size > prev",
+                            arg=len(harvested),
+                            timeout=3000,
+                        )
+                except Exception:
+                    pass
+                snapshot = await self.page.evaluate(
+                    self._CARD_HARVEST_READ_JS, {"since": len(harvested), "stop": False}
+                ) or {}
+                new_cards = snapshot.get("cards") or []
+                harvested.extend(new_cards)
+                if new_cards:
+                    stalls = 0
+                    continue
+                stalls += 1
+                if stalls >= 2:
+                    print("列表连续两次滚动未增长，视为已到底。")
+                    break
+            snapshot = await self.page.evaluate(
+                self._CARD_HARVEST_READ_JS, {"since": len(harvested), "stop": True}
+            ) or snapshot
+            harvested.extend(snapshot.get("cards") or [])
         except Exception as e:
-            print(f"定位主页卡片链接时异常: {e}")
-            notes_locator = self.page.locator(f"{feeds_container_selector} a[href*='/explore/']")
-        
+            print(f"收集主页卡片时异常: {e}")
 
-        def _parse_note_id(href: str) -> Optional[str]:
-            try:
-                if not href:
-                    return None
-                # 标准化路径部分
-                path = href
-                if href.startswith("http"):
-                    try:
-                        from urllib.parse import urlparse
-                        path = urlparse(href).path
-                    except Exception:
-                        path = href
-                # 常见匹配模式
-                patterns = [
-                    r"/explore/([A-Za-z0-9]+)",
-                    r"/user/profile/[^/]+/([A-Za-z0-9]+)",
-                    r"/profile/[^/]+/([A-Za-z0-9]+)",
-                    r"/note/([A-Za-z0-9]+)",
-                ]
-                for pat in patterns:
-                    m = re.search(pat, path)
-                    if m:
-                        part = m.group(1)
-                        if 8 <= len(part) <= 64:
-                            return part
-                # 兜底：取路径最后一段作为候选
-                segs = [s for s in path.split('/') if s]
-                if segs:
-                    cand = segs[-1]
-                    if re.fullmatch(r"[A-Za-z0-9]{8,64}", cand):
-                        return cand
-            except Exception:
-                pass
-            return None
+        print(
+            f"候选锚点（含 '/explore/'）数量: {snapshot.get('anchorCount', 0)}，"
+            f"使用选择器 '{snapshot.get('selector') or '-'}'，去重后 {len(harvested)} 条。"
+        )
+        if snapshot.get("skipped"):
+            print(f"有 {snapshot['skipped']} 个卡片未能提取有效链接，已跳过。")
 
-        count_found = await notes_locator.count()
-        max_count = min(count_found, max_notes)
-        print(f"准备从 {max_count}/{count_found} 个卡片中提取 href。")
-        if max_count == 0:
+        # 严格按页面“从上到下（再从左到右）”顺序排列
+        cards = sorted(
+            harvested,
+            key=lambda c: (float(c.get("top") or 0), float(c.get("left") or 0), int(c.get("index") or 0)),
+        )
+        if not cards:
             # 无卡片可用，保存调试信息
             try:
                 html_content = await self.page.content()
@@ -273,145 +649,261 @@ class XhsScraper:
                 print("已保存 debug_homepage.html 与 debug_screenshot_no_notes.png 以供分析。")
             except Exception as e:
                 print(f"保存首页调试信息失败: {e}")
-        # 严格按页面“从上到下（再从左到右）”顺序选取前 max_count 条
+
         scraped_notes = []
-        handles = []
+        for card in cards:
+            raw_href = card.get("href") or ""
+            full_url = raw_href if not raw_href.startswith('/') else f"https://www.xiaohongshu.com{raw_href}"
+            scraped_notes.append({
+                "note_id": card.get("noteId"),
+                "url": full_url,
+                "index": card.get("index", len(scraped_notes)),
+                "raw_href": raw_href,
+                "is_video": bool(card.get("isVideo")),
+                "title": card.get("title") or "",
+                "likes_count": self._normalize_count(card.get("likes")),
+                "is_pinned": bool(card.get("isPinned")),
+            })
+        scraped_notes = self._trim_to_unseen(scraped_notes, max_notes, known_lower)
+        print("已按页面位置排序（前序预览）：")
+        for i, note in enumerate(scraped_notes, start=1):
+            print(f"  #{i} id={note['note_id']} href={note['raw_href']}")
+
+        print(f"最终收集到 {len(scraped_notes)} 条笔记。")
+        return scraped_notes
+        
+
+    @staticmethod
+    def _build_direct_note_url(note_info: Dict) -> Optional[str]:
+        """返回用于直开的“正确链接”：优先 raw_href（包含 token 的真实路由），
+        如：/user/profile/<uid>/<note_id>?xsec_token=...。必要时补全域名。"""
         try:
-            handles = await notes_locator.element_handles()
-        except Exception as e:
-            print(f"获取卡片元素句柄时异常: {e}")
+            raw = note_info.get("raw_href") or note_info.get("url")
+            if not raw:
+                return None
+            if raw.startswith("http"):
+                return raw
+            if raw.startswith("/"):
+                return f"https://www.xiaohongshu.com{raw}"
+            return f"https://www.xiaohongshu.com/{raw}"
+        except Exception:
+            return None
 
-        positioned = []
-        skipped_handles = 0
-        for idx, h in enumerate(handles):
-            top, left = 1e9, 1e9
-            try:
-                pos = await h.evaluate(
-                    "el => {\n"
-                    "  const card = el.closest('section.note-item, li.note-item, .note-item, .note-card') || el;\n"
-                    "  const r = card.getBoundingClientRect();\n"
-                    "  return { t: (r.top || 0) + window.scrollY, l: (r.left || 0) + window.scrollX };\n"
-                    "}"
-                )
-                if pos:
-                    top = float(pos.get('t', 1e9))
-                    left = float(pos.get('l', 1e9))
-            except Exception:
-                pass
+    @staticmethod
+    def _build_explore_url_with_query(note_info: Dict) -> Optional[str]:
+        """从 raw_href 提取 query 并生成 /explore/<note_id>?<query> 链接（若可用）。"""
+        try:
+            raw = note_info.get("raw_href") or note_info.get("url")
+            nid = note_info.get("note_id")
+            if not raw or not nid:
+                return None
+            p = urlparse(raw if raw.startswith("http") else f"https://www.xiaohongshu.com{raw}")
+            qs = ("?" + p.query) if p.query else ""
+            return f"https://www.xiaohongshu.com/explore/{nid}{qs}"
+        except Exception:
+            return None
 
-            note_url = None
-            try:
-                note_url = await h.get_attribute('href')
-            except Exception:
-                note_url = None
-            if not note_url:
-                try:
-                    note_url = await h.evaluate("el => el.closest('a') && el.closest('a').getAttribute('href')")
-                except Exception:
-                    note_url = None
-            if not note_url:
-                skipped_handles += 1
-                continue
+    @staticmethod
+    def _normalize_count(raw) -> str:
+        """将 "1.2万" / "3k" / "10+" 等计数文本归一化为整数字符串，无法解析时返回 "0"。"""
+        if raw is None:
+            return "0"
+        if isinstance(raw, (int, float)):
+            return str(int(raw))
+        t = str(raw).strip().lower()
+        m = re.search(r"([\d\.]+)\s*([万wk]?)", t)
+        if not m:
+            return "0"
+        try:
+            num = float(m.group(1))
+        except ValueError:
+            return "0"
+        unit = m.group(2)
+        if unit in ("万", "w"):
+            num *= 10000
+        elif unit == "k":
+            num *= 1000
+        return str(int(num))
+
+    @classmethod
+    def _note_details_from_state(cls, note: Dict) -> Optional[Dict]:
+        """将 __INITIAL_STATE__.note.noteDetailMap[id].note（camelCase）或 feed 接口的
+        note_card（snake_case）映射为与 DOM 引擎一致的详情字段。"""
+        if not isinstance(note, dict):
+            return None
+
+        def pick(*keys, default=None):
+            for k in keys:
+                v = note.get(k)
+                if v not in (None, ""):
+                    return v
+            return default
+
+        content = str(pick("desc", default="") or "")
+        # 话题在 desc 中形如 "#漫展[话题]#"，与页面展示保持一致只保留 "#漫展"
+        content = re.sub(r"#([^#\[\n]+)\[[^\]]*\]#", r"#\1", content).strip()
 
-            note_id = _parse_note_id(note_url)
-            if not note_id:
+        images: List[str] = []
+        for img in pick("imageList", "image_list", default=[]) or []:
+            if not isinstance(img, dict):
                 continue
+            url = img.get("urlDefault") or img.get("url_default") or ""
+            if not url:
+                for info in img.get("infoList") or img.get("info_list") or []:
+                    if isinstance(info, dict) and info.get("url"):
+                        url = info["url"]
+                        if (info.get("imageScene") or info.get("image_scene")) == "WB_DFT":
+                            break
+            url = url or img.get("urlPre") or img.get("url_pre") or img.get("url") or ""
+            url = url.strip()
+            if url.startswith("//"):
+                url = "https:" + url
+            if url and not url.startswith("data:") and url not in images:
+                images.append(url)
+
+        post_time = ""
+        post_timestamp = None
+        # 只认发布时间 time；lastUpdateTime 是编辑时间，缺失时留空，由详情页 DOM 中的日期补齐
+        parsed_time = time_parser.from_timestamp(pick("time"))
+        if parsed_time:
+            post_timestamp = time_parser.to_timestamp(parsed_time.dt)
+            post_time = parsed_time.dt.strftime("%Y-%m-%d")
+
+        interact = pick("interactInfo", "interact_info", default={}) or {}
+        user = pick("user", default={}) or {}
+        tags = []
+        for tag in pick("tagList", "tag_list", default=[]) or []:
+            name = tag.get("name") if isinstance(tag, dict) else None
+            if name:
+                tags.append(str(name))
+
+        return {
+            "title": str(pick("title", default="") or "").strip(),
+            "author_name": str(user.get("nickname") or user.get("nickName") or user.get("nick_name") or "").strip(),
+            "tags": " ".join(tags),
+            "likes_count": cls._normalize_count(interact.get("likedCount") or interact.get("liked_count")),
+            "collections_count": cls._normalize_count(interact.get("collectedCount") or interact.get("collected_count")),
+            "comments_count": cls._normalize_count(interact.get("commentCount") or interact.get("comment_count")),
+            "shares_count": cls._normalize_count(interact.get("shareCount") or interact.get("share_count")),
+            "content": content,
+            "images": images,
+            "post_time": post_time,
+            "post_timestamp": post_timestamp,
+            "is_video": (pick("type", default="") or "") == "video",
+        }
+
+    async def scrape_note_details(self, note_info: Dict, page: Optional[Page] = None, engine: str = "state") -> Dict:
+        """
+        进入笔记详情页，爬取详细信息。
+        :param note_info: 包含笔记 ID 和 URL 的字典
+        :param page: 可选，自定义页面以避免复用主页
+        :param engine: 详情引擎，"state" 一次性读取页面状态 JSON，"dom" 按选择器逐项解析
+        :return: 包含笔记所有详细信息的字典
+        """
+        if engine == "state":
+            details = await self._scrape_note_details_via_state(note_info, page=page)
+            if details:
+                return details
+            print(f"[state 引擎] 笔记 {note_info.get('note_id')} 未取到状态数据，回退到 DOM 引擎。")
+        return await self._scrape_note_details_via_dom(note_info, page=page)
+
+    async def _scrape_note_details_via_state(self, note_info: Dict, page: Optional[Page] = None) -> Optional[Dict]:
+        """读取服务端渲染的 window.__INITIAL_STATE__（或导航期间截获的 feed 接口响应）中的笔记数据，
+        一次调用完成字段映射，不再逐个等待选择器。"""
+        note_id = note_info.get("note_id")
+        target_url = (
+            self._build_explore_url_with_query(note_info)
+            or self._build_direct_note_url(note_info)
+            or note_info.get("url")
+        )
+        if not note_id or not target_url:
+            return None
+
+        pg = page
+        owns_page = pg is None
+        if owns_page:
+            pg = await self._create_prepared_page()
+
+        feed_notes: List[Dict] = []
+        consumers: List[asyncio.Task] = []
 
-            full_url = note_url if not note_url.startswith('/') else f"https://www.xiaohongshu.com{note_url}"
-            positioned.append((top, left, idx, note_id, full_url, note_url))
+        async def _consume(response):
+            try:
+                payload = await response.json()
+            except Exception:
+                return
+            for item in ((payload or {}).get("data") or {}).get("items") or []:
+                card = (item or {}).get("note_card") or {}
+                if (item or {}).get("id") == note_id or card.get("note_id") == note_id:
+                    feed_notes.append(card)
 
-        if skipped_handles:
-            print(f"有 {skipped_handles} 个卡片未能提取有效链接，已跳过。")
+        def _on_response(response):
+            if self.NOTE_FEED_API_PATH in response.url:
+                consumers.append(asyncio.ensure_future(_consume(response)))
 
-        if positioned:
-            positioned.sort(key=lambda x: (x[0], x[1]))
-            seen_ids = set()
-            # DEBUG: 打印排序后的前若干条用于定位顺序问题
+        pg.on("response", _on_response)
+        try:
+            print(f"正在爬取笔记详情: {note_info['url']}")
             try:
-                preview = positioned[:max_count]
-                print("已按页面位置排序（前序预览）：")
-                for i, (t, l, oidx, nid, full_url, raw_href) in enumerate(preview, start=1):
-                    print(f"  #{i} y={int(t)} x={int(l)} id={nid} href={raw_href}")
+                await self._goto_with_retry(target_url, page=pg)
+            except Exception as nav_err:
+                print(f"导航至详情页失败: {nav_err}")
+                return None
+            note = None
+            try:
+                note = await pg.evaluate(self._NOTE_STATE_JS, note_id)
             except Exception:
-                pass
-            for _, __, orig_idx, note_id, full_url, raw_href in positioned:
-                if note_id in seen_ids:
-                    continue
-                seen_ids.add(note_id)
-                is_video = False
-                try:
-                    card = notes_locator.nth(orig_idx)
-                    if await card.count() > 0:
-                        try:
-                            icon_candidate = card.locator('.play-icon, .play-icon-new, .video-icon, .icon-play').first
-                            is_video = await icon_candidate.count() > 0
-                        except Exception:
-                            is_video = False
-                except Exception:
-                    is_video = False
-                scraped_notes.append({
-                    "note_id": note_id,
-                    "url": full_url,
-                    "index": orig_idx,
-                    "raw_href": raw_href,
-                    "is_video": is_video,
-                })
-                if len(scraped_notes) >= max_count:
-                    break
+                note = None
+            if not note:
+                if consumers:
+                    await asyncio.gather(*consumers, return_exceptions=True)
+                if feed_notes:
+                    note = feed_notes[-1]
+            if not note:
+                return None
 
-        if not scraped_notes and max_count > 0:
-            print("未能按位置排序卡片，回退到 DOM 顺序。")
-            seen_ids = set()
-            for idx in range(max_count):
-                note_handle = notes_locator.nth(idx)
-                note_url = None
+            details = self._note_details_from_state(note)
+            if not details or (not details["content"] and not details["images"]):
+                return None
+            if not details["post_time"]:
+                # 状态数据缺少发布时间：读取已渲染页面中的发布日期（与 DOM 引擎的首选来源一致）
                 try:
-                    note_url = await note_handle.get_attribute('href')
+                    date_text = await pg.evaluate(
+                        "() => { const d = document.querySelector('.note-content .date'); return d ? d.textContent : ''; }"
+                    )
                 except Exception:
-                    note_url = None
-                if not note_url:
-                    try:
-                        note_url = await note_handle.evaluate("el => el.closest('a') && el.closest('a').getAttribute('href')")
-                    except Exception:
-                        note_url = None
-                if not note_url:
-                    continue
-                note_id = _parse_note_id(note_url)
-                if not note_id or note_id in seen_ids:
-                    continue
-                seen_ids.add(note_id)
-                full_url = note_url if not note_url.startswith('/') else f"https://www.xiaohongshu.com{note_url}"
-                is_video = False
+                    date_text = ""
+                parsed_date = time_parser.parse(date_text, search=True) if date_text else None
+                if parsed_date:
+                    details["post_time"] = parsed_date.dt.strftime("%Y-%m-%d")
+                    details["post_timestamp"] = time_parser.to_timestamp(parsed_date.dt)
+            current_url = target_url
+            try:
+                if pg.url and not pg.url.startswith(("about:", "data:")):
+                    current_url = pg.url
+            except Exception:
+                pass
+            details.update({
+                "note_id": note_id,
+                "post_url": current_url,
+                "platform": "小红书",
+            })
+            print(f"笔记 {note_id} 详情爬取成功（state），URL: {current_url}")
+            return details
+        finally:
+            try:
+                pg.remove_listener("response", _on_response)
+            except Exception:
+                pass
+            if owns_page:
                 try:
-                    if await note_handle.count() > 0:
-                        try:
-                            icon_candidate = note_handle.locator('.play-icon, .play-icon-new, .video-icon, .icon-play').first
-                            is_video = await icon_candidate.count() > 0
-                        except Exception:
-                            is_video = False
+                    if not pg.is_closed():
+                        await pg.close()
                 except Exception:
-                    is_video = False
-                scraped_notes.append({
-                    "note_id": note_id,
-                    "url": full_url,
-                    "index": idx,
-                    "raw_href": note_url,
-                    "is_video": is_video,
-                })
-                if len(scraped_notes) >= max_count:
-                    break
-
-        print(f"最终收集到 {len(scraped_notes)} 条笔记。")
-        return scraped_notes
-        
+                    pass
 
-    async def scrape_note_details(self, note_info: Dict, page: Optional[Page] = None) -> Dict:
-        """
-        进入笔记详情页，爬取详细信息。
-        :param note_info: 包含笔记 ID 和 URL 的字典
-        :param page: 可选，自定义页面以避免复用主页
-        :return: 包含笔记所有详细信息的字典
-        """
+    async def _scrape_note_details_via_dom(self, note_info: Dict, page: Optional[Page] = None) -> Dict:
+        """DOM 引擎：按选择器逐项解析详情页（state 引擎失效时的兜底）。"""
         pg: Optional[Page] = page
         owns_page = pg is None
         if pg is None:
@@ -432,12 +924,14 @@ class XhsScraper:
 
         async def ensure_detail_ready(page: Union[Page, Frame]):
             try:
-                await page.wait_for_selector(content_wait_selector, timeout=6000)
+                with metrics.timed("selector_wait"):
+                    await page.wait_for_selector(content_wait_selector, timeout=6000)
             except Exception:
                 pass
             image_ready = False
             try:
-                await page.wait_for_selector(image_wait_selector, timeout=4000)
+                with metrics.timed("selector_wait"):
+                    await page.wait_for_selector(image_wait_selector, timeout=4000)
                 image_ready = True
             except Exception:
                 image_ready = False
@@ -448,7 +942,8 @@ class XhsScraper:
                         await page.evaluate("window.scrollBy(0, Math.max(window.innerHeight, 400))")
                     except Exception:
                         break
-                    await page.wait_for_timeout(400)
+                    with metrics.timed("sleep"):
+                        await page.wait_for_timeout(400)
                     try:
                         if await page.locator(image_wait_selector).count() > 0:
                             break
@@ -461,35 +956,11 @@ class XhsScraper:
         except Exception:
             restore_url = None
 
-        def _build_direct_note_url() -> Optional[str]:
-            """返回用于直开的“正确链接”：优先 raw_href（包含 token 的真实路由），
-            如：/user/profile/<uid>/<note_id>?xsec_token=...。必要时补全域名。"""
-            try:
-                raw = note_info.get("raw_href") or note_info.get("url")
-                if not raw:
-                    return None
-                if raw.startswith("http"):
-                    return raw
-                if raw.startswith("/"):
-                    return f"https://www.xiaohongshu.com{raw}"
-                return f"https://www.xiaohongshu.com/{raw}"
-            except Exception:
-                return None
-
-        def _build_explore_url_with_query() -> Optional[str]:
-            """从 raw_href 提取 query 并生成 /explore/<note_id>?<query> 链接（若可用）。"""
-            try:
-                raw = note_info.get("raw_href") or note_info.get("url")
-                nid = note_info.get("note_id")
-                if not raw or not nid:
-                    return None
-                p = urlparse(raw if raw.startswith("http") else f"https://www.xiaohongshu.com{raw}")
-                qs = ("?" + p.query) if p.query else ""
-                return f"https://www.xiaohongshu.com/explore/{nid}{qs}"
-            except Exception:
-                return None
-
-        target_url = _build_explore_url_with_query() or _build_direct_note_url() or note_info.get("url")
+        target_url = (
+            self._build_explore_url_with_query(note_info)
+            or self._build_direct_note_url(note_info)
+            or note_info.get("url")
+        )
         if not target_url:
             print(f"笔记 {note_info.get('note_id')} 缺少可访问的详情 URL，跳过。")
             return None
@@ -590,61 +1061,15 @@ class XhsScraper:
             - 4天前 上海 -> 以当前时间回推 4 天
             其次再回退到 time[datetime]、meta、正文文本与脚本。
             """
-            import re as _re
-            from datetime import datetime, timedelta
-
-            def _fmt(y: int, m: int, d: int) -> str:
-                return f"{y:04d}-{m:02d}-{d:02d}"
-
-            now = datetime.now()
+            def _fmt(parsed) -> str:
+                return parsed.dt.strftime("%Y-%m-%d") if parsed else ""
 
             # 0) 优先从 .note-content .date 读取
             try:
                 date_text = await first_text([".note-content .date"], page)
-                if date_text:
-                    t = date_text.strip()
-                    # 先尝试完整日期（含年）
-                    m = _re.search(r"(20\d{2})[-/\.](\d{1,2})[-/\.]([0-3]?\d)", t)
-                    if m:
-                        return _fmt(int(m.group(1)), int(m.group(2)), int(m.group(3)))
-                    # 再尝试 MM-DD（忽略后续的城市）
-                    m2 = _re.search(r"(\d{1,2})[-/\.](\d{1,2})", t)
-                    if m2:
-                        return _fmt(now.year, int(m2.group(1)), int(m2.group(2)))
-                    # 相对时间（X分钟前/小时前/天前/周前/月前/年前，或 昨天/前天/今天）
-                    rel_pats = [
-                        (r"(\d+)\s*分钟前", 'minutes'),
-                        (r"(\d+)\s*小?时前", 'hours'),
-                        (r"(\d+)\s*天前", 'days'),
-                        (r"(\d+)\s*周前", 'weeks'),
-                        (r"(\d+)\s*月前", 'months'),
-                        (r"(\d+)\s*年前", 'years'),
-                    ]
-                    for pat, unit in rel_pats:
-                        mr = _re.search(pat, t)
-                        if mr:
-                            n = int(mr.group(1))
-                            if unit == 'minutes':
-                                dt = now - timedelta(minutes=n)
-                            elif unit == 'hours':
-                                dt = now - timedelta(hours=n)
-                            elif unit == 'days':
-                                dt = now - timedelta(days=n)
-                            elif unit == 'weeks':
-                                dt = now - timedelta(weeks=n)
-                            elif unit == 'months':
-                                dt = now - timedelta(days=30 * n)
-                            else:
-                                dt = now - timedelta(days=365 * n)
-                            return _fmt(dt.year, dt.month, dt.day)
-                    if '昨天' in t:
-                        dt = now - timedelta(days=1)
-                        return _fmt(dt.year, dt.month, dt.day)
-                    if '前天' in t:
-                        dt = now - timedelta(days=2)
-                        return _fmt(dt.year, dt.month, dt.day)
-                    if '今天' in t:
-                        return _fmt(now.year, now.month, now.day)
+                parsed = time_parser.parse(date_text, search=True) if date_text else None
+                if parsed:
+                    return _fmt(parsed)
             except Exception:
                 pass
 
@@ -661,85 +1086,41 @@ class XhsScraper:
                     "  return '';\n"
                     "}"
                 )
-                if dt_attr:
-                    m = _re.search(r"(\d{4})[-/\.](\d{1,2})[-/\.]([0-3]?\d)", dt_attr)
-                    if m:
-                        return _fmt(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+                parsed = (time_parser.parse(dt_attr) or time_parser.search_full_date(dt_attr)) if dt_attr else None
+                if parsed:
+                    return _fmt(parsed)
             except Exception:
                 pass
 
-            # 2) 正文文本/相对时间
+            # 2) 正文文本：先找带年份的完整日期，再找相对时间/昨天等（不识别无年份的月日，避免误判数字）
             try:
                 body_text = await page.evaluate("document.body.innerText")
-                m = _re.search(r"(20\d{2})[-/\.](0?[1-9]|1[0-2])[-/\.]((?:0?[1-9])|[12]\d|3[01])", body_text)
-                if m:
-                    return _fmt(int(m.group(1)), int(m.group(2)), int(m.group(3)))
-                m2 = _re.search(r"(20\d{2})年\s*(\d{1,2})月\s*(\d{1,2})日", body_text)
-                if m2:
-                    return _fmt(int(m2.group(1)), int(m2.group(2)), int(m2.group(3)))
-                rel_patterns = [
-                    (r"(\d+)\s*分钟前", 'minutes'),
-                    (r"(\d+)\s*小?时前", 'hours'),
-                    (r"(\d+)\s*天前", 'days'),
-                    (r"(\d+)\s*周前", 'weeks'),
-                    (r"(\d+)\s*月前", 'months'),
-                    (r"(\d+)\s*年前", 'years'),
-                ]
-                for pat, unit in rel_patterns:
-                    mr = _re.search(pat, body_text)
-                    if mr:
-                        n = int(mr.group(1))
-                        if unit == 'minutes':
-                            dt = now - timedelta(minutes=n)
-                        elif unit == 'hours':
-                            dt = now - timedelta(hours=n)
-                        elif unit == 'days':
-                            dt = now - timedelta(days=n)
-                        elif unit == 'weeks':
-                            dt = now - timedelta(weeks=n)
-                        elif unit == 'months':
-                            dt = now - timedelta(days=30 * n)
-                        else:
-                            dt = now - timedelta(days=365 * n)
-                        return _fmt(dt.year, dt.month, dt.day)
-                if '昨天' in body_text:
-                    dt = now - timedelta(days=1)
-                    return _fmt(dt.year, dt.month, dt.day)
-                if '前天' in body_text:
-                    dt = now - timedelta(days=2)
-                    return _fmt(dt.year, dt.month, dt.day)
-                if '今天' in body_text:
-                    return _fmt(now.year, now.month, now.day)
+                parsed = time_parser.search_full_date(body_text) or time_parser.parse(
+                    body_text, search=True, allow_month_day=False
+                )
+                if parsed:
+                    return _fmt(parsed)
             except Exception:
                 pass
 
             # 3) 退化：候选选择器文本
             try:
                 t_text = await first_text(time_candidates, page)
-                if t_text:
-                    m = _re.search(r"(20\d{2})[-/\.](0?[1-9]|1[0-2])[-/\.]((?:0?[1-9])|[12]\d|3[01])", t_text)
-                    if m:
-                        return _fmt(int(m.group(1)), int(m.group(2)), int(m.group(3)))
-                    m2 = _re.search(r"(20\d{2})年\s*(\d{1,2})月\s*(\d{1,2})日", t_text)
-                    if m2:
-                        return _fmt(int(m2.group(1)), int(m2.group(2)), int(m2.group(3)))
+                parsed = time_parser.search_full_date(t_text) if t_text else None
+                if parsed:
+                    return _fmt(parsed)
             except Exception:
                 pass
 
             # 4) HTML 中的 JSON/脚本查找
             try:
                 html = await page.content()
-                m = _re.search(r'"(?:publish(?:Time|_time|Date|_date)|time)"\s*:\s*"(20\d{2}[-/\.]\d{1,2}[-/\.]\d{1,2})', html)
+                m = self._PUBLISH_DATE_JSON_RE.search(html)
                 if m:
-                    y, mo, d = [int(x) for x in _re.split(r"[-/.]", m.group(1))]
-                    return _fmt(y, mo, d)
-                m2 = _re.search(r'"(?:publish(?:Time|_time)|time)"\s*:\s*(\d{10,13})', html)
+                    return _fmt(time_parser.search_full_date(m.group(1)))
+                m2 = self._PUBLISH_TS_JSON_RE.search(html)
                 if m2:
-                    ts = int(m2.group(1))
-                    if ts > 10**12:
-                        ts = ts // 1000
-                    dt = datetime.fromtimestamp(ts)
-                    return _fmt(dt.year, dt.month, dt.day)
+                    return _fmt(time_parser.from_timestamp(m2.group(1)))
             except Exception:
                 pass
             return ""
@@ -981,7 +1362,11 @@ class XhsScraper:
             need_fallback = (not content or not content.strip() or not unique_image_urls)
             if need_fallback:
                 try:
-                    fb_url = _build_direct_note_url() or _build_explore_url_with_query() or note_info.get('url')
+                    fb_url = (
+                        self._build_direct_note_url(note_info)
+                        or self._build_explore_url_with_query(note_info)
+                        or note_info.get('url')
+                    )
                     if fb_url and fb_url.startswith('/'):
                         fb_url = f"https://www.xiaohongshu.com{fb_url}"
                 except Exception:
@@ -993,7 +1378,7 @@ class XhsScraper:
                     try:
                         extra_note_page = await self.create_prepared_page()
                         detail_page_to_close = extra_note_page
-                        await extra_note_page.goto(fb_url, wait_until="domcontentloaded")
+                        await self._goto_with_retry(fb_url, page=extra_note_page, retries=1)
                         await ensure_detail_ready(extra_note_page)
 
                         # 切换解析上下文为新开的详情页
@@ -1089,6 +1474,7 @@ class XhsScraper:
                 "content": (content or "").strip(),
                 "images": unique_image_urls,
                 "post_time": post_time,
+                "post_timestamp": time_parser.to_timestamp(time_parser.parse_post_time(post_time)),
                 "platform": "小红书",
             })
 